@@ -0,0 +1,91 @@
+from georunes.modmin.norm.engine import StepNorm, Allocation, Pooling, SilicaSaturation, Desilication, \
+    cation_components
+
+# Barth, T.F.W., 1959. Principles of classification and norm calculations of metamorphic rocks. The Journal of
+# Geology, 67(2), pp.135-152.
+# Niggli, P., 1936. Über Molekularnormen zur Gesteinsberechnung. Schweizerische Mineralogische und Petrographische
+# Mitteilungen, 16, pp.295-317.
+
+cation_norm_oxides = ['SiO2', 'TiO2', 'Al2O3', 'Fe2O3', 'FeO', 'MnO', 'MgO', 'CaO', 'Na2O', 'K2O', 'P2O5',
+                      'ZrO2', 'Cr2O3', 'NiO', 'CoO', 'BaO', 'SrO', 'Rb2O', 'Cs2O', 'Li2O']
+cation_norm_components = cation_components(cation_norm_oxides, custom={'FeO': 'Fe2', 'Fe2O3': 'Fe3'})
+cation_norm_folding = {
+    'Fe2': ['Mn', 'Ni', 'Co'],
+    'Ca': ['Ba', 'Sr'],
+    'K': ['Rb', 'Cs'],
+    'Na': ['Li'],
+}
+
+# Cations per formula unit of the normative phases
+catanorm_formulas = {
+    'Z': {'Zr': 1, 'Si': 1},
+    'Ap': {'Ca': 5, 'P': 3},
+    'Cm': {'Fe2': 1, 'Cr': 2},
+    'Il': {'Fe2': 1, 'Ti': 1},
+    'Or': {'K': 1, 'Al': 1, 'Si': 3},
+    'Ks': {'K': 2, 'Si': 1},
+    'Ab': {'Na': 1, 'Al': 1, 'Si': 3},
+    'Ac': {'Na': 1, 'Fe3': 1, 'Si': 2},
+    'Ns': {'Na': 2, 'Si': 1},
+    'An': {'Ca': 1, 'Al': 2, 'Si': 2},
+    'C': {'Al': 2},
+    'Tn': {'Ca': 1, 'Ti': 1, 'Si': 1},
+    'Ru': {'Ti': 1},
+    'Mt': {'Fe2': 1, 'Fe3': 2},
+    'Hm': {'Fe3': 2},
+    'Di': {'Ca': 1, 'FeMg': 1, 'Si': 2},
+    'Wo': {'Ca': 1, 'Si': 1},
+    'Hy': {'FeMg': 1, 'Si': 1},
+    'Q': {'Si': 1},
+    'Ol': {'FeMg': 2, 'Si': 1},
+    'Pf': {'Ca': 1, 'Ti': 1},
+    'Ne': {'Na': 1, 'Al': 1, 'Si': 1},
+    'Lc': {'K': 1, 'Al': 1, 'Si': 2},
+    'Cs': {'Ca': 2, 'Si': 1},
+    'Kp': {'K': 1, 'Al': 1, 'Si': 1},
+}
+
+# Same sequence as the CIPW norm, on a cation basis
+catanorm_steps = (
+    Allocation('Z'),
+    Allocation('Ap'),
+    Allocation('Cm'),
+    Allocation('Il'),
+    Allocation('Or'),
+    Allocation('Ks'),
+    Allocation('Ab'),
+    Allocation('Ac'),
+    Allocation('Ns'),
+    Allocation('An'),
+    Allocation('C'),
+    Allocation('Tn'),
+    Allocation('Ru'),
+    Allocation('Mt'),
+    Allocation('Hm'),
+    Pooling('FeMg', ['Fe2', 'Mg']),
+    Allocation('Di'),
+    Allocation('Wo'),
+    Allocation('Hy'),
+    SilicaSaturation('Q'),
+    Desilication('Hy', {'Ol': 1 / 2}, 1 / 2),
+    Desilication('Tn', {'Pf': 1}, 1),
+    Desilication('Ab', {'Ne': 1}, 2),
+    Desilication('Or', {'Lc': 1}, 1),
+    Desilication('Wo', {'Cs': 1 / 2}, 1 / 2),
+    Desilication('Di', {'Cs': 1 / 2, 'Ol': 1 / 2}, 1),
+    Desilication('Lc', {'Kp': 1}, 1),
+)
+
+
+class BarthNiggliNorm(StepNorm):
+    """
+    Cation norm (catanorm) of Barth and Niggli, in cation %
+    """
+    components = cation_norm_components
+    folding = cation_norm_folding
+    formulas = catanorm_formulas
+    steps = catanorm_steps
+
+    def __init__(self, **kwargs):
+        StepNorm.__init__(self, **kwargs)
+        self.notif = ">>>>>> Barth-Niggli cation norm"
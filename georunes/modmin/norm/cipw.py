@@ -1,30 +1,19 @@
 import warnings
 import numpy as np
-from pandas import Series
-from georunes.tools.chemistry import ratio_el_to_ox, molar_mass, el_molar_mass
+from pandas import DataFrame
+from georunes.tools.chemistry import molar_mass, el_molar_mass
+from georunes.modmin.norm.engine import list_major_ox, list_minor_el, list_ox_from_minor_el, oxide_corresp, \
+    minor_oxides_folding, minor_elements_to_oxides, molar_proportions, fold_minor_components, allocate, \
+    pool_components, desilicate
+from georunes.modmin.norm.fe_oxidation import total_iron_as_fe2o3, fe_oxidation_ratio, split_total_iron
 from georunes.modmin.optim.base import BaseOptimizer
 from georunes.tools.warnings import DataIntegrityWarning
 
-list_major_ox = ['SiO2', 'Na2O', 'K2O', 'CaO', 'MnO', 'FeO', 'Fe2O3', 'MgO', 'TiO2', 'Al2O3', 'P2O5']
-list_minor_el = ['F', 'Cl', 'S', 'Ni', 'Co', 'Ba', 'Sr', 'Rb', 'Cs', 'Li', 'Zr', 'Cr', 'V']
-list_ox_from_minor_el = ['SO3', 'NiO', 'CoO', 'BaO', 'SrO', 'Rb2O', 'Cs2O', 'Li2O', 'ZrO2', 'Cr2O3', 'V2O3']
 list_all_ox_el = [*list_major_ox, 'CO2', 'F', 'Cl', 'S', *list_ox_from_minor_el]
+list_total_fe = ['FeOt', 'Fe2O3t']
 final_list_min = ['Q', 'Or', 'Ab', 'An', 'C', 'Wo', 'Cs', 'Tn', 'Pf', 'Cc', 'Mt', 'Hm', 'Il', 'Ru',
                   'Ne', 'Th', 'Nc', 'Ac', 'Ns', 'Lc', 'Kp', 'Ks', 'Z', 'Hl', 'Fr', 'Pr', 'Cm']
 
-oxide_corresp = {
-    'Ni': 'NiO',
-    'Co': 'CoO',
-    'Ba': 'BaO',
-    'Sr': 'SrO',
-    'Rb': 'Rb2O',
-    'Cs': 'Cs2O',
-    'Li': 'Li2O',
-    'Zr': 'ZrO2',
-    'Cr': 'Cr2O3',
-    'V': 'V2O3'
-}
-
 _mol_w = dict()
 for _oxel in list_all_ox_el:
     if _oxel in molar_mass:
@@ -44,7 +33,13 @@ class CIPWNorm(BaseOptimizer):
         self.notif = ">>>>>> CIPW norm"
 
     def compute(self, raw_data, skip_cols, normalize_entry=False, minor_included=False, to_round=4,
-                co2_cancrinite=False, co2_calcite=False):
+                co2_cancrinite=False, co2_calcite=False, fe_adjustment=None, rock_type="volcanic"):
+        """
+        Compute the CIPW norm, for all the compositions at once
+        :param fe_adjustment: None to keep FeO and Fe2O3 as analysed, or the method used to split the total iron
+        (FeOt, Fe2O3t or FeO + Fe2O3) : 'Middlemost', 'LeMaitre', or a fixed Fe2O3/FeO weight ratio (float)
+        :param rock_type: 'volcanic' or 'plutonic', for the Fe2O3/FeO equations of Le Maitre (1976)
+        """
 
         # 1 / Preparing data
         if self.verbose > 1: print("Step 1 - Prepare data")
@@ -55,7 +50,7 @@ class CIPWNorm(BaseOptimizer):
         raw_data_keys = raw_data.iloc[:, skip_cols:].keys()
 
         for oxel in raw_data_keys:
-            if oxel in [*list_all_ox_el, *list_minor_el]:
+            if oxel in [*list_all_ox_el, *list_minor_el] or (fe_adjustment is not None and oxel in list_total_fe):
                 data[oxel] = raw_data[oxel]
 
         if 'Total' in raw_data_keys or 'Sum' in raw_data_keys:
@@ -71,18 +66,11 @@ class CIPWNorm(BaseOptimizer):
             if ox not in data_keys:
                 data[ox] = 0.
 
-        n_phase = data.iloc[:, :skip_cols].copy()
-        next_step = Series(np.array([""] * len(data.index)))
-        si_deff = data.iloc[:, :skip_cols].copy()
-        prop = data.iloc[:, :skip_cols].copy()
+        index = data.index
         free = data.iloc[:, :skip_cols].copy()
         partitions = data.iloc[:, :skip_cols].copy()
         suppl = data.iloc[:, :skip_cols].copy()
 
-        # Initializing columns for SiO2 deficiency calculation
-        si_deff['Y'] = 0.
-        si_deff['D'] = 0.
-
         # 2 / CO2 handling options
         if self.verbose > 1: print("Step 2 - CO2 handling options")
 
@@ -95,25 +83,23 @@ class CIPWNorm(BaseOptimizer):
         # 3 / Conversion of trace oxide/element units
         if self.verbose > 1: print("Step 3 - Conversion of trace oxide/element units")
 
+        # If some minor oxide/element does not exist in data, the corresponding oxide is added with zero values for
+        # treatment.
         if minor_included:
-            data_keys = data.keys()
-            for oxel in data_keys:
-                if oxel in list_minor_el and oxel not in ['F', 'Cl', 'S']:
-                    oxide = oxide_corresp[oxel]
-                    data[oxide] = data[oxel] / (ratio_el_to_ox[oxide] * 10000)
-                    data = data.drop(columns=oxel)
-                elif oxel in ['F', 'Cl', 'S']:
-                    data[oxel] = data[oxel] / 10000
-
-            # If some minor oxide/element does not exist in data, add the corresponding oxide with zero values for
-            # treatment. Also add other required oxels that are missing.
-
-            data_keys = data.keys()
-            for ox in list_ox_from_minor_el:
-                if ox not in data_keys:
-                    data[ox] = 0.
-            if 'F' not in data_keys:
-                data['F'] = 0.
+            data = minor_elements_to_oxides(data)
+
+        # 3b / Adjustment of the iron oxidation ratio, before totals and normalization
+        if fe_adjustment is not None:
+            if self.verbose > 1: print("Step 3b - Adjustment of the Fe2O3/FeO ratio")
+
+            fe2o3t = total_iron_as_fe2o3(data['FeO'], data['Fe2O3'], data.get('FeOt'), data.get('Fe2O3t'))
+            data = data.drop(columns=[col for col in list_total_fe if col in data.keys()])
+            anhydrous_sum = data[[ox for ox in list_major_ox if ox not in ('FeO', 'Fe2O3')]].sum(axis=1) + fe2o3t
+            sio2 = 100 * data['SiO2'] / anhydrous_sum
+            alkali = 100 * (data['Na2O'].fillna(0) + data['K2O'].fillna(0)) / anhydrous_sum
+            fe_ratio = fe_oxidation_ratio(sio2, alkali, method=fe_adjustment, rock_type=rock_type)
+            data['FeO'], data['Fe2O3'] = split_total_iron(fe2o3t, fe_ratio)
+            suppl['Fe2O3/FeO'] = fe_ratio
 
         # 4-5 / Adjust components to 100%
         if self.verbose > 1: print("Step 4, 5 - Adjust components to 100%")
@@ -144,96 +130,40 @@ class CIPWNorm(BaseOptimizer):
         suppl['pp_Mg#'] = 100 * (data['MgO'] / _mol_w['MgO']) / (
                 data['MgO'] / _mol_w['MgO'] + data['FeO'] / _mol_w['FeO'])
 
-        for i in data.index:
-            if data.loc[i, 'SiO2'] > 5 and 1 < suppl.loc[i, 'pp_ratio_K2O_Na2O'] < 2.5:
-                suppl.loc[i, 'pp_AR'] = (data.loc[i, 'Al2O3'] + data.loc[i, 'CaO'] + 2 * data.loc[i, 'Na2O']) / (
-                        data.loc[i, 'Al2O3'] + data.loc[i, 'CaO'] - 2 * data.loc[i, 'Na2O'])
-            else:
-                suppl.loc[i, 'pp_AR'] = (data.loc[i, 'Al2O3'] + data.loc[i, 'CaO'] + data.loc[i, 'Na2O'] + data.loc[
-                    i, 'K2O']) / (data.loc[i, 'Al2O3'] + data.loc[i, 'CaO'] - data.loc[i, 'Na2O'] - data.loc[i, 'K2O'])
+        potassic = (data['SiO2'] > 5) & (suppl['pp_ratio_K2O_Na2O'] > 1) & (suppl['pp_ratio_K2O_Na2O'] < 2.5)
+        suppl['pp_AR'] = np.where(
+            potassic,
+            (data['Al2O3'] + data['CaO'] + 2 * data['Na2O']) / (data['Al2O3'] + data['CaO'] - 2 * data['Na2O']),
+            (data['Al2O3'] + data['CaO'] + data['Na2O'] + data['K2O']) / (
+                    data['Al2O3'] + data['CaO'] - data['Na2O'] - data['K2O']))
 
         # 6 / Mole computations
         if self.verbose > 1: print("Step 6 - Mole computations")
 
         data_n = data.copy().drop(['Total'], axis=1).fillna(0)
+        data_n_keys = data_n.keys()
 
         if self.verbose > 1:
             print(">>> Initial compositions (wt %)")
             print(data_n.to_string())
 
-        for oxel in data_n.keys():
-            if oxel in list_all_ox_el:
-                data_n[oxel] = data_n[oxel] / _mol_w[oxel]
+        moles = molar_proportions(data_n, {oxel: (oxel, 1) for oxel in list_all_ox_el})
 
         if self.verbose:
             print(">>> Initial molar concentrations (mol)")
-            print(data_n.to_string())
+            print(DataFrame(moles, index=index).to_string())
 
         # 7-8 / Minor oxides combination and oxide molecular weight computations
         if self.verbose > 1: print(
             "Step 7, 8 - Minor oxides combination and oxide molecular weight computations")
 
-        if minor_included:
-            FeO_corr = data_n['FeO'] + data_n['MnO'] + data_n['NiO'] + data_n['CoO']
-            CaO_corr = data_n['CaO'] + data_n['BaO'] + data_n['SrO']
-            K2O_corr = data_n['K2O'] + data_n['Rb2O'] + data_n['Cs2O']
-            Na2O_corr = data_n['Na2O'] + data_n['Li2O']
-            Cr2O3_corr = data_n['Cr2O3'] + data_n['V2O3']
-            xFeO = data_n['FeO'] / FeO_corr
-            xMnO = data_n['MnO'] / FeO_corr
-            xNiO = data_n['NiO'] / FeO_corr
-            xCoO = data_n['CoO'] / FeO_corr
-            xCaO = data_n['CaO'] / CaO_corr
-            xBaO = data_n['BaO'] / CaO_corr
-            xSrO = data_n['SrO'] / CaO_corr
-            xK2O = data_n['K2O'] / K2O_corr
-            xRb2O = data_n['Rb2O'] / K2O_corr
-            xCs2O = data_n['Cs2O'] / K2O_corr
-            xNa2O = data_n['Na2O'] / Na2O_corr
-            xLi2O = data_n['Li2O'] / Na2O_corr
-            xCr2O3 = data_n['Cr2O3'] / Cr2O3_corr
-            xV2O3 = data_n['V2O3'] / Cr2O3_corr
-
-            data_n['FeO'] = data_n['FeO'] + data_n['MnO'] + data_n['NiO'] + data_n['CoO']
-            data_n['CaO'] = data_n['CaO'] + data_n['BaO'] + data_n['SrO']
-            data_n['K2O'] = data_n['K2O'] + data_n['Rb2O'] + data_n['Cs2O']
-            data_n['Na2O'] = data_n['Na2O'] + data_n['Li2O']
-            data_n['Cr2O3'] = data_n['Cr2O3'] + data_n['V2O3']
-
-            # Other oxides to zero
-            for ox in ['MnO', 'NiO', 'CoO', 'BaO', 'SrO', 'Rb2O', 'Cs2O', 'Li2O', 'V2O3']:
-                data_n[ox] = 0.
-
-        else:
-            FeO_corr = data_n['MnO'] + data_n['FeO']
-            xFeO = data_n['FeO'] / FeO_corr
-            xMnO = data_n['MnO'] / FeO_corr
-            data_n['FeO'] = data_n['FeO'] + data_n['MnO']
-            data_n['MnO'] = 0.
+        folding = minor_oxides_folding if minor_included else {'FeO': ['MnO']}
+        corr_mol_w = _mol_w.copy()  # Each value will be a number or an array of numbers (for FeO for example)
+        corr_mol_w.update(fold_minor_components(moles, folding, _mol_w))
 
         if self.verbose:
             print(">>> Corrected molar concentrations (mol)")
-            print(data_n.to_string())
-
-        # Molecular weight correction
-        corr_mol_w = _mol_w.copy()  # Each value will be a number of a list of number (for FeO for example)
-        if minor_included:
-            corr_mol_w['FeO'] = xFeO * _mol_w['FeO'] + xMnO * _mol_w['MnO'] + \
-                                xNiO * _mol_w['NiO'] + xCoO * _mol_w['CoO']
-            corr_mol_w['CaO'] = xCaO * _mol_w['CaO'] + xBaO * _mol_w['BaO'] + xSrO * _mol_w['SrO']
-            corr_mol_w['K2O'] = xK2O * _mol_w['K2O'] + xRb2O * _mol_w['Cs2O'] + xCs2O * _mol_w['Cs2O']
-            corr_mol_w['Na2O'] = xNa2O * _mol_w['Na2O'] + xLi2O * _mol_w['Li2O']
-            corr_mol_w['Cr2O3'] = xCr2O3 * _mol_w['Cr2O3'] + xV2O3 * _mol_w['V2O3']
-
-            corr_mol_w['FeO'] = corr_mol_w['FeO'].fillna(0)
-            corr_mol_w['CaO'] = corr_mol_w['CaO'].fillna(0)
-            corr_mol_w['K2O'] = corr_mol_w['K2O'].fillna(0)
-            corr_mol_w['Na2O'] = corr_mol_w['Na2O'].fillna(0)
-            corr_mol_w['Cr2O3'] = corr_mol_w['Cr2O3'].fillna(0)
-
-        else:
-            corr_mol_w['FeO'] = xFeO * _mol_w['FeO'] + xMnO * _mol_w['MnO']
-            corr_mol_w['FeO'] = corr_mol_w['FeO'].fillna(0)
+            print(DataFrame(moles, index=index).to_string())
 
         # 9-10 / Correction of normative mineral molecular weights
         if self.verbose > 1: print("Step 9, 10 - Correction of normative mineral molecular weights")
@@ -277,49 +207,38 @@ class CIPWNorm(BaseOptimizer):
             'Pr': (corr_mol_w['FeO'] - _mol_w['O']) + 2 * _mol_w['S']
         }
 
+        n_phase = dict()  # Molar proportions of the normative phases, provisional ones included
+        free_n = dict()  # Molar proportions of the free oxides/elements
+        silica_needed = np.zeros(len(index))  # Provisional SiO2 required by the normative phases
+
         # 11 / Normative zircon
         if self.verbose > 1: print("Step 11 - Normative zircon")
 
         if minor_included:
-            for i in data_n.index:
-                if data_n.loc[i, 'SiO2'] > data_n.loc[i, 'ZrO2']:
-                    n_phase.loc[i, 'Z'] = data_n.loc[i, 'ZrO2']
-                    si_deff.loc[i, 'Y'] = si_deff.loc[i, 'Y'] + n_phase.loc[i, 'Z']
-                    data_n.loc[i, 'ZrO2'] = 0.
-                else:
-                    print('WARNING : No further SiO2 after zircon attribution for composition ' + str(
-                        i) + '. Check data.')
+            zircon = moles['SiO2'] > moles['ZrO2']
+            n_phase['Z'] = np.where(zircon, moles['ZrO2'], 0.)
+            silica_needed = silica_needed + n_phase['Z']
+            moles['ZrO2'] = np.where(zircon, 0., moles['ZrO2'])
+            if not zircon.all():
+                warnings.warn("No further SiO2 after zircon attribution for compositions " +
+                              str(list(index[~zircon])) + ". Check data.", DataIntegrityWarning)
 
         # 12 / Normative apatite
         if self.verbose > 1: print("Step 12 - Normative apatite")
 
-        temp_ap = np.zeros(shape=[len(data_n.index), 1])
-        for i in data_n.index:
-            if data_n.loc[i, 'CaO'] >= (3 + 1 / 3) * data_n.loc[i, 'P2O5']:
-                temp_ap[i] = data_n.loc[i, 'P2O5']
-                data_n.loc[i, 'CaO'] = data_n.loc[i, 'CaO'] - (3 + 1 / 3) * data_n.loc[i, 'P2O5']
-            else:
-                temp_ap[i] = data_n.loc[i, 'CaO'] / (3 + 1 / 3)
-                data_n.loc[i, 'CaO'] = 0.
-                free.loc[i, 'P2O5'] = data_n.loc[i, 'P2O5'] - temp_ap[i]
-            free.loc[i, 'P2O5'] = data_n.loc[i, 'P2O5'] - temp_ap[i]
-            data_n.loc[i, 'P2O5'] = 0.
-
-        n_phase['Ap-F'] = 0.
-        n_phase['Ap-O'] = 0.
+        temp_ap = allocate(moles, {'P2O5': 1, 'CaO': 3 + 1 / 3})
+        free_n['P2O5'] = moles['P2O5']
+        moles['P2O5'] = np.zeros(len(index))
+
         if minor_included:
-            for i in data_n.index:
-                if data_n.loc[i, 'F'] >= 2 / 3 * temp_ap[i]:
-                    n_phase.loc[i, 'Ap-F'] = temp_ap[i]
-                    free.loc[i, 'O_12b'] = 1 / 3 * n_phase.loc[i, 'Ap-F']
-                    data_n.loc[i, 'F'] = data_n.loc[i, 'F'] - 2 / 3 * n_phase.loc[i, 'Ap-F']
-                else:
-                    n_phase.loc[i, 'Ap-F'] = 1.5 * data_n.loc[i, 'F']
-                    n_phase.loc[i, 'Ap-O'] = temp_ap[i] - 1.5 * data_n.loc[i, 'F']
-                    free.loc[i, 'O_12c'] = data_n.loc[i, 'F'] / 2
-                    data_n.loc[i, 'F'] = 0.
-            n_phase['Ap'] = n_phase['Ap-F'] + n_phase['Ap-O']
+            fluorapatite = moles['F'] >= 2 / 3 * temp_ap
+            n_phase['Ap-F'] = np.where(fluorapatite, temp_ap, 1.5 * moles['F'])
+            n_phase['Ap-O'] = np.where(fluorapatite, 0., temp_ap - 1.5 * moles['F'])
+            free_n['O_12b'] = np.where(fluorapatite, 1 / 3 * n_phase['Ap-F'], 0.)
+            free_n['O_12c'] = np.where(fluorapatite, 0., moles['F'] / 2)
+            moles['F'] = np.where(fluorapatite, moles['F'] - 2 / 3 * n_phase['Ap-F'], 0.)
         else:
+            n_phase['Ap-F'] = np.zeros(len(index))
             n_phase['Ap-O'] = temp_ap
         n_phase['Ap'] = n_phase['Ap-O'] + n_phase['Ap-F']
 
@@ -327,405 +246,198 @@ class CIPWNorm(BaseOptimizer):
         if self.verbose > 1: print("Step 13 - Normative fluorite")
 
         if minor_included:
-            for i in data_n.index:
-                if data_n.loc[i, 'CaO'] >= data_n.loc[i, 'F'] / 2:
-                    n_phase.loc[i, 'Fr'] = data_n.loc[i, 'F'] / 2
-                    data_n.loc[i, 'CaO'] = data_n.loc[i, 'CaO'] - data_n.loc[i, 'F'] / 2
-                    data_n.loc[i, 'F'] = 0.
-                else:
-                    n_phase.loc[i, 'Fr'] = data_n.loc[i, 'CaO']
-                    data_n.loc[i, 'CaO'] = 0.
-                    free.loc[i, 'F'] = data_n.loc[i, 'F'] - 2 * n_phase.loc[i, 'Fr']  # Unused F
-                    data_n.loc[i, 'F'] = 0.
-                free.loc[i, 'O_13'] = n_phase.loc[i, 'Fr']
+            n_phase['Fr'] = allocate(moles, {'CaO': 1, 'F': 2})
+            free_n['F'] = moles['F']  # Unused F
+            free_n['O_13'] = n_phase['Fr']
+            moles['F'] = np.zeros(len(index))
 
         # 14 / Normative halite
         if self.verbose > 1: print("Step 14 - Normative halite")
 
-        if minor_included and 'Cl' in data_n.keys():
-            for i in data_n.index:
-                if data_n.loc[i, 'Na2O'] >= 2 * data_n.loc[i, 'Cl']:
-                    n_phase.loc[i, 'Hl'] = data_n.loc[i, 'Cl']
-                    data_n.loc[i, 'Na2O'] = data_n.loc[i, 'Na2O'] - n_phase.loc[i, 'Hl'] / 2
-                    free.loc[i, 'O_14'] = n_phase.loc[i, 'Hl'] / 2
-                    data_n.loc[i, 'Cl'] = 0.
-                else:
-                    n_phase.loc[i, 'Hl'] = data_n.loc[i, 'Na2O'] / 2
-                    free.loc[i, 'Cl'] = data_n.loc[i, 'Cl'] - n_phase.loc[i, 'Hl']
-                    data_n.loc[i, 'Na2O'] = 0.
+        if minor_included and 'Cl' in data_n_keys:
+            n_phase['Hl'] = allocate(moles, {'Na2O': 1 / 2, 'Cl': 1})
+            free_n['Cl'] = moles['Cl']
+            free_n['O_14'] = n_phase['Hl'] / 2
+            moles['Cl'] = np.zeros(len(index))
 
         # 15 / Normative thenardite
         if self.verbose > 1: print("Step 15 - Normative thenardite")
 
-        if minor_included and 'SO3' in data_n.keys():
-            for i in data_n.index:
-                if data_n.loc[i, 'Na2O'] >= 2 * data_n.loc[i, 'SO3']:
-                    n_phase.loc[i, 'Th'] = data_n.loc[i, 'SO3']
-                    data_n.loc[i, 'Na2O'] = data_n.loc[i, 'Na2O'] - n_phase.loc[i, 'Th']
-                    data_n.loc[i, 'SO3'] = 0.
-                else:
-                    n_phase.loc[i, 'Th'] = data_n.loc[i, 'Na2O']
-                    free.loc[i, 'SO3'] = data_n.loc[i, 'SO3'] - n_phase.loc[i, 'Th']
-                    data_n.loc[i, 'Na2O'] = 0.
+        if minor_included and 'SO3' in data_n_keys:
+            n_phase['Th'] = allocate(moles, {'Na2O': 1, 'SO3': 1})
+            free_n['SO3'] = moles['SO3']
+            moles['SO3'] = np.zeros(len(index))
 
         # 16 / Normative pyrite
         if self.verbose > 1: print("Step 16 - Normative pyrite")
 
-        if minor_included and 'S' in data_n.keys():
-            for i in data_n.index:
-                if data_n.loc[i, 'FeO'] >= 2 * data_n.loc[i, 'S']:
-                    n_phase.loc[i, 'Pr'] = data_n.loc[i, 'S'] / 2
-                    data_n.loc[i, 'FeO'] = data_n.loc[i, 'FeO'] - n_phase.loc[i, 'Pr']
-                    data_n.loc[i, 'S'] = 0.
-                else:
-                    n_phase.loc[i, 'Pr'] = data_n.loc[i, 'FeO']
-                    free.loc[i, 'S'] = data_n.loc[i, 'S'] - 2 * n_phase.loc[i, 'Pr']
-                    data_n.loc[i, 'FeO'] = 0.
-                free.loc[i, 'O_16'] = n_phase.loc[i, 'Pr']
+        if minor_included and 'S' in data_n_keys:
+            n_phase['Pr'] = allocate(moles, {'FeO': 1, 'S': 2})
+            free_n['S'] = moles['S']
+            free_n['O_16'] = n_phase['Pr']
+            moles['S'] = np.zeros(len(index))
 
         # 17 / Normative sodium carbonate or calcite
         if self.verbose > 1: print("Step 17 - Normative sodium carbonate or calcite")
 
-        if minor_included:
-            if 'CO2' in data_keys:
-                free['CO2'] = 0.
-                if co2_cancrinite == co2_calcite == 0:
-                    for i in data_n.index:
-                        free.loc[i, 'CO2'] = data_n.loc[i, 'CO2']
-                        data_n.loc[i, 'CO2'] = 0.
-                else:
-                    # Cancrinite
-                    for i in data_n.index:
-                        if data_n.loc[i, 'CO2'] > 0:
-                            if data_n.loc[i, 'Na2O'] >= data_n.loc[i, 'CO2'] * co2_cancrinite:
-                                n_phase.loc[i, 'Nc'] = data_n.loc[i, 'CO2'] * co2_cancrinite
-                                data_n.loc[i, 'Na2O'] = data_n.loc[i, 'Na2O'] - n_phase.loc[i, 'Nc']
-                            else:
-                                n_phase.loc[i, 'Nc'] = data_n.loc[i, 'Na2O']
-                                data_n.loc[i, 'Na2O'] = 0.
-                                free.loc[i, 'CO2'] = free.loc[i, 'CO2'] + data_n.loc[i, 'CO2'] * co2_cancrinite \
-                                                     - n_phase.loc[i, 'Nc']  # Free CO2
-                            data_n.loc[i, 'CO2'] = data_n.loc[i, 'CO2'] * (1 - co2_cancrinite)
-
-                    # Calcite, with all the rest of CO2
-                    for i in data_n.index:
-                        if data_n.loc[i, 'CO2'] > 0:
-                            if data_n.loc[i, 'CaO'] > data_n.loc[i, 'CO2']:
-                                n_phase.loc[i, 'Cc'] = data_n.loc[i, 'CO2']
-                                data_n.loc[i, 'CaO'] = data_n.loc[i, 'CaO'] - n_phase.loc[i, 'Cc']
-                            else:
-                                n_phase.loc[i, 'Cc'] = data_n.loc[i, 'CaO']
-                                data_n.loc[i, 'CaO'] = 0.
-                                free.loc[i, 'CO2'] = free.loc[i, 'CO2'] + data_n.loc[i, 'CO2'] - n_phase.loc[
-                                    i, 'Cc']  # CO2 to free
-                            data_n.loc[i, 'CO2'] = 0.
+        if minor_included and 'CO2' in data_keys:
+            co2 = moles['CO2']
+            if co2_cancrinite == co2_calcite == 0:
+                free_n['CO2'] = co2
+            else:
+                # Cancrinite
+                moles['CO2'] = co2 * co2_cancrinite
+                n_phase['Nc'] = allocate(moles, {'Na2O': 1, 'CO2': 1})
+                free_co2 = moles['CO2']
+
+                # Calcite, with all the rest of CO2
+                moles['CO2'] = co2 * (1 - co2_cancrinite)
+                n_phase['Cc'] = allocate(moles, {'CaO': 1, 'CO2': 1})
+                free_n['CO2'] = free_co2 + moles['CO2']
+            moles['CO2'] = np.zeros(len(index))
 
         # 18 / Normative chromite
         if self.verbose > 1: print("Step 18 - Normative chromite")
 
         if minor_included:
-            for i in data_n.index:
-                if 0 < data_n.loc[i, 'Cr2O3'] <= data_n.loc[i, 'FeO']:
-                    n_phase.loc[i, 'Cm'] = data_n.loc[i, 'Cr2O3']
-                    data_n.loc[i, 'FeO'] = data_n.loc[i, 'FeO'] - n_phase.loc[i, 'Cm']
-                    data_n.loc[i, 'Cr2O3'] = 0.
-                elif data_n.loc[i, 'FeO'] < data_n.loc[i, 'Cr2O3']:
-                    n_phase.loc[i, 'Cm'] = data_n.loc[i, 'FeO']
-                    free.loc[i, 'Cr2O3'] = data_n.loc[i, 'Cr2O3'] - n_phase.loc[i, 'Cm']
-                    data_n.loc[i, 'FeO'] = 0.
-                    data_n.loc[i, 'Cr2O3'] = 0.
+            n_phase['Cm'] = allocate(moles, {'FeO': 1, 'Cr2O3': 1})
+            free_n['Cr2O3'] = moles['Cr2O3']
+            moles['Cr2O3'] = np.zeros(len(index))
 
         # 19 / Normative ilmenite
         if self.verbose > 1: print("Step 19 - Normative ilmenite")
 
-        for i in data_n.index:
-            if data_n.loc[i, 'FeO'] >= data_n.loc[i, 'TiO2']:
-                n_phase.loc[i, 'Il'] = data_n.loc[i, 'TiO2']
-                data_n.loc[i, 'FeO'] = data_n.loc[i, 'FeO'] - n_phase.loc[i, 'Il']
-                data_n.loc[i, 'TiO2'] = 0.
-            else:
-                n_phase.loc[i, 'Il'] = data_n.loc[i, 'FeO']
-                data_n.loc[i, 'TiO2'] = data_n.loc[i, 'TiO2'] - n_phase.loc[i, 'Il']
-                data_n.loc[i, 'FeO'] = 0.
+        n_phase['Il'] = allocate(moles, {'FeO': 1, 'TiO2': 1})
 
         # 20 / Normative orthoclase or potassium metasilicate
         if self.verbose > 1: print("Step 20 - Normative orthoclase or potassium metasilicate")
 
-        for i in data_n.index:
-            if data_n.loc[i, 'Al2O3'] >= data_n.loc[i, 'K2O']:
-                n_phase.loc[i, 'Orp'] = data_n.loc[i, 'K2O']
-                data_n.loc[i, 'Al2O3'] = data_n.loc[i, 'Al2O3'] - n_phase.loc[i, 'Orp']
-                data_n.loc[i, 'K2O'] = 0.
-                si_deff.loc[i, 'Y'] = si_deff.loc[i, 'Y'] + 6 * n_phase.loc[i, 'Orp']
-            else:
-                n_phase.loc[i, 'Orp'] = data_n.loc[i, 'Al2O3']
-                n_phase.loc[i, 'Ks'] = data_n.loc[i, 'K2O'] - n_phase.loc[i, 'Orp']  # Rest of K2O to Ks
-                data_n.loc[i, 'Al2O3'] = 0.
-                data_n.loc[i, 'K2O'] = 0.
-                si_deff.loc[i, 'Y'] = si_deff.loc[i, 'Y'] + 6 * n_phase.loc[i, 'Orp'] + n_phase.loc[i, 'Ks']
+        n_phase['Orp'] = allocate(moles, {'K2O': 1, 'Al2O3': 1})
+        n_phase['Ks'] = moles['K2O']  # Rest of K2O to Ks
+        moles['K2O'] = np.zeros(len(index))
+        silica_needed = silica_needed + 6 * n_phase['Orp'] + n_phase['Ks']
 
         # 21 / Normative albite
         if self.verbose > 1: print("Step 21 - Normative albite")
 
-        for i in data_n.index:
-            if data_n.loc[i, 'Al2O3'] >= data_n.loc[i, 'Na2O']:
-                n_phase.loc[i, 'Abp'] = data_n.loc[i, 'Na2O']
-                data_n.loc[i, 'Al2O3'] = data_n.loc[i, 'Al2O3'] - n_phase.loc[i, 'Abp']
-                data_n.loc[i, 'Na2O'] = 0.
-            else:
-                n_phase.loc[i, 'Abp'] = data_n.loc[i, 'Al2O3']
-                data_n.loc[i, 'Na2O'] = data_n.loc[i, 'Na2O'] - n_phase.loc[i, 'Abp']  # Rest of Na2O to Ab
-                data_n.loc[i, 'Al2O3'] = 0.
-            si_deff.loc[i, 'Y'] = si_deff.loc[i, 'Y'] + 6 * n_phase.loc[i, 'Abp']
+        n_phase['Abp'] = allocate(moles, {'Na2O': 1, 'Al2O3': 1})  # Rest of Na2O to Ac and Ns
+        silica_needed = silica_needed + 6 * n_phase['Abp']
 
         # 22 / Normative acmite or sodium metasilicate
         if self.verbose > 1: print("Step 22 - Normative acmite or sodium metasilicate")
 
-        for i in data_n.index:
-            if data_n.loc[i, 'Na2O'] >= data_n.loc[i, 'Fe2O3']:
-                n_phase.loc[i, 'Ac'] = data_n.loc[i, 'Fe2O3']
-                n_phase.loc[i, 'Ns'] = data_n.loc[i, 'Na2O'] - n_phase.loc[i, 'Ac']  # Rest of Na2O to Ns
-                data_n.loc[i, 'Na2O'] = 0.
-                data_n.loc[i, 'Fe2O3'] = 0.
-                si_deff.loc[i, 'Y'] = si_deff.loc[i, 'Y'] + 4 * n_phase.loc[i, 'Ac'] + n_phase.loc[i, 'Ns']
-            else:
-                n_phase.loc[i, 'Ac'] = data_n.loc[i, 'Na2O']
-                data_n.loc[i, 'Fe2O3'] = data_n.loc[i, 'Fe2O3'] - n_phase.loc[i, 'Ac']
-                data_n.loc[i, 'Na2O'] = 0.
-                si_deff.loc[i, 'Y'] = si_deff.loc[i, 'Y'] + 4 * n_phase.loc[i, 'Ac']
+        n_phase['Ac'] = allocate(moles, {'Na2O': 1, 'Fe2O3': 1})
+        n_phase['Ns'] = moles['Na2O']  # Rest of Na2O to Ns
+        moles['Na2O'] = np.zeros(len(index))
+        silica_needed = silica_needed + 4 * n_phase['Ac'] + n_phase['Ns']
 
         # 23 / Normative anorthite or corundum
         if self.verbose > 1: print("Step 23 - Normative anorthite or corundum")
 
-        for i in data_n.index:
-            if data_n.loc[i, 'Al2O3'] >= data_n.loc[i, 'CaO']:
-                n_phase.loc[i, 'An'] = data_n.loc[i, 'CaO']
-                n_phase.loc[i, 'C'] = data_n.loc[i, 'Al2O3'] - data_n.loc[i, 'CaO']  # Rest of Al2O3 in C
-                data_n.loc[i, 'CaO'] = 0.
-                data_n.loc[i, 'Al2O3'] = 0.
-            else:
-                n_phase.loc[i, 'An'] = data_n.loc[i, 'Al2O3']
-                data_n.loc[i, 'CaO'] = data_n.loc[i, 'CaO'] - n_phase.loc[i, 'An']
-                data_n.loc[i, 'Al2O3'] = 0.
-            si_deff.loc[i, 'Y'] = si_deff.loc[i, 'Y'] + 2 * n_phase.loc[i, 'An']
+        n_phase['An'] = allocate(moles, {'CaO': 1, 'Al2O3': 1})
+        n_phase['C'] = moles['Al2O3']  # Rest of Al2O3 in C
+        moles['Al2O3'] = np.zeros(len(index))
+        silica_needed = silica_needed + 2 * n_phase['An']
 
         # 24 / Normative sphene / rutile
         if self.verbose > 1: print("Step 24 - Normative sphene / rutile")
 
-        for i in data_n.index:
-            if data_n.loc[i, 'CaO'] >= data_n.loc[i, 'TiO2']:
-                n_phase.loc[i, 'Tnp'] = data_n.loc[i, 'TiO2']
-                data_n.loc[i, 'CaO'] = data_n.loc[i, 'CaO'] - n_phase.loc[i, 'Tnp']
-                data_n.loc[i, 'TiO2'] = 0.
-            else:
-                n_phase.loc[i, 'Tnp'] = data_n.loc[i, 'CaO']
-                n_phase.loc[i, 'Ru'] = data_n.loc[i, 'TiO2'] - n_phase.loc[i, 'Tnp']  # Rest of TiO2 in Ru
-                data_n.loc[i, 'CaO'] = 0.
-                data_n.loc[i, 'TiO2'] = 0.
-            si_deff.loc[i, 'Y'] = si_deff.loc[i, 'Y'] + n_phase.loc[i, 'Tnp']
+        n_phase['Tnp'] = allocate(moles, {'CaO': 1, 'TiO2': 1})
+        n_phase['Ru'] = moles['TiO2']  # Rest of TiO2 in Ru
+        moles['TiO2'] = np.zeros(len(index))
+        silica_needed = silica_needed + n_phase['Tnp']
 
         # 25 / Normative magnetite or hematite
         if self.verbose > 1: print("Step 25 - Normative magnetite or hematite")
 
-        for i in data_n.index:
-            if data_n.loc[i, 'Fe2O3'] >= data_n.loc[i, 'FeO']:
-                n_phase.loc[i, 'Mt'] = data_n.loc[i, 'FeO']
-                n_phase.loc[i, 'Hm'] = data_n.loc[i, 'Fe2O3'] - n_phase.loc[i, 'Mt']  # Rest of Fe2O3 in Mt
-                data_n.loc[i, 'FeO'] = 0.
-                data_n.loc[i, 'Fe2O3'] = 0.
-            else:
-                n_phase.loc[i, 'Mt'] = data_n.loc[i, 'Fe2O3']
-                data_n.loc[i, 'FeO'] = data_n.loc[i, 'FeO'] - n_phase.loc[i, 'Mt']
-                data_n.loc[i, 'Fe2O3'] = 0.
+        n_phase['Mt'] = allocate(moles, {'FeO': 1, 'Fe2O3': 1})
+        n_phase['Hm'] = moles['Fe2O3']  # Rest of Fe2O3 in Hm
+        moles['Fe2O3'] = np.zeros(len(index))
 
         # 26 / Subdivision of Mg and Fe in some minerals
         if self.verbose > 1: print("Step 26 - Repartition of Mg and Fe in minerals")
 
-        data_n['FeMgO'] = data_n['MgO'] + data_n['FeO']
-        prop['xMg'] = data_n['MgO'] / (data_n['MgO'] + data_n['FeO'])
-        prop['xFe'] = data_n['FeO'] / (data_n['MgO'] + data_n['FeO'])
-        data_n['MgO'] = 0.
-        data_n['FeO'] = 0.
+        prop = pool_components(moles, 'FeMgO', ['MgO', 'FeO'])
 
         # 27 / Provisional normative diopside, wollastonite or hypersthene
         if self.verbose > 1: print("Step 27 - normative diopside, wollastonite or hypersthene")
 
-        n_phase['Wop'] = 0.
-        for i in data_n.index:
-            if data_n.loc[i, 'CaO'] >= data_n.loc[i, 'FeMgO']:
-                n_phase.loc[i, 'Dip'] = data_n.loc[i, 'FeMgO']
-                n_phase.loc[i, 'Wop'] = data_n.loc[i, 'CaO'] - n_phase.loc[i, 'Dip']
-                data_n.loc[i, 'CaO'] = 0.
-                data_n.loc[i, 'FeMgO'] = 0.
-                si_deff.loc[i, 'Y'] = si_deff.loc[i, 'Y'] + 2 * n_phase.loc[i, 'Dip'] + n_phase.loc[i, 'Wop']
-                n_phase.loc[i, 'Hyp'] = 0.
-            else:
-                n_phase.loc[i, 'Dip'] = data_n.loc[i, 'CaO']
-                n_phase.loc[i, 'Hyp'] = data_n.loc[i, 'FeMgO'] - n_phase.loc[i, 'Dip']
-                data_n.loc[i, 'CaO'] = 0.
-                data_n.loc[i, 'FeMgO'] = 0.
-                si_deff.loc[i, 'Y'] = si_deff.loc[i, 'Y'] + 2 * n_phase.loc[i, 'Dip'] + n_phase.loc[i, 'Hyp']
+        n_phase['Dip'] = allocate(moles, {'CaO': 1, 'FeMgO': 1})
+        n_phase['Wop'] = moles['CaO']
+        n_phase['Hyp'] = moles['FeMgO']
+        moles['CaO'] = np.zeros(len(index))
+        moles['FeMgO'] = np.zeros(len(index))
+        silica_needed = silica_needed + 2 * n_phase['Dip'] + n_phase['Wop'] + n_phase['Hyp']
 
         # 28 / Normative quartz and Si deficiency
         if self.verbose > 1: print("Step 28 - Normative quartz and Si deficiency")
-        n_phase['Q'] = 0.
-        for i in data_n.index:
-            if data_n.loc[i, 'SiO2'] >= si_deff.loc[i, 'Y']:
-                n_phase.loc[i, 'Q'] = data_n.loc[i, 'SiO2'] - si_deff.loc[i, 'Y']
-                data_n.loc[i, 'SiO2'] = 0.
-                next_step[i] = '36b'  # Instead of 36a which is obligatory in this algorithm
-                if self.verbose: print("Si saturated for the composition", i)
-            else:
-                si_deff.loc[i, 'D'] = si_deff.loc[i, 'Y'] - data_n.loc[i, 'SiO2']
-                data_n.loc[i, 'SiO2'] = 0.
-                next_step[i] = '29'
+
+        saturated = moles['SiO2'] >= silica_needed
+        n_phase['Q'] = np.where(saturated, moles['SiO2'] - silica_needed, 0.)
+        deficit = np.where(saturated, 0., silica_needed - moles['SiO2'])
+        moles['SiO2'] = np.zeros(len(index))
+        if self.verbose: print("Si saturated for the compositions", list(index[saturated]))
+
+        # 29-35 / Conversion of the provisional phases into silica-poorer phases, while SiO2 is deficient. The phases
+        # are unchanged once the deficiency is compensated (36 / Definite mineral proportions).
 
         # 29 / Normative olivine or hypersthene
         if self.verbose > 1: print("Step 29 - Normative olivine or hypersthene")
-        for i in data_n.index:
-            if next_step[i] == '29':
-                if si_deff.loc[i, 'D'] < n_phase.loc[i, 'Hyp'] / 2:
-                    n_phase.loc[i, 'Ol'] = si_deff.loc[i, 'D']
-                    n_phase.loc[i, 'Hy'] = n_phase.loc[i, 'Hyp'] - 2 * si_deff.loc[i, 'D']
-                    next_step[i] = '36b'
-                else:
-                    n_phase.loc[i, 'Ol'] = n_phase.loc[i, 'Hyp'] / 2
-                    n_phase.loc[i, 'Hy'] = 0.
-                    si_deff.loc[i, 'D1'] = si_deff.loc[i, 'D'] - n_phase.loc[i, 'Hyp'] / 2
-                    next_step[i] = '30'
-            else:
-                n_phase.loc[i, 'Hy'] = n_phase.loc[i, 'Hyp']
-                n_phase.loc[i, 'Ol'] = 0.
+
+        converted, deficit = desilicate(deficit, n_phase['Hyp'], 1 / 2)
+        n_phase['Hy'] = n_phase['Hyp'] - converted
+        n_phase['Ol'] = converted / 2
 
         # 30 / Normative sphene or perovskite
         if self.verbose > 1: print("Step 30 - Normative sphene or perovskite")
 
-        for i in data_n.index:
-            if next_step[i] == '30':
-                if si_deff.loc[i, 'D1'] < n_phase.loc[i, 'Tnp']:
-                    n_phase.loc[i, 'Tn'] = n_phase.loc[i, 'Tnp'] - si_deff.loc[i, 'D1']
-                    n_phase.loc[i, 'Pf'] = si_deff.loc[i, 'D1']
-                    next_step[i] = '36c'
-                else:
-                    n_phase.loc[i, 'Pf'] = n_phase.loc[i, 'Tnp']
-                    n_phase.loc[i, 'Tn'] = 0.
-                    si_deff.loc[i, 'D2'] = si_deff.loc[i, 'D1'] - n_phase.loc[i, 'Tnp']
-                    next_step[i] = '31'
+        converted, deficit = desilicate(deficit, n_phase['Tnp'], 1)
+        n_phase['Tn'] = n_phase['Tnp'] - converted
+        n_phase['Pf'] = converted
 
         # 31 / Normative nepheline or albite
         if self.verbose > 1: print("Step 31 - Normative nepheline or albite")
 
-        for i in data_n.index:
-            if next_step[i] == '31':
-                if si_deff.loc[i, 'D2'] < 4 * n_phase.loc[i, 'Abp']:
-                    n_phase.loc[i, 'Ab'] = n_phase.loc[i, 'Abp'] - si_deff.loc[i, 'D2'] / 4
-                    n_phase.loc[i, 'Ne'] = si_deff.loc[i, 'D2'] / 4
-                    next_step[i] = '36d'
-                else:
-                    n_phase.loc[i, 'Ne'] = n_phase.loc[i, 'Abp']
-                    n_phase.loc[i, 'Ab'] = 0
-                    si_deff.loc[i, 'D3'] = si_deff.loc[i, 'D2'] - 4 * n_phase.loc[i, 'Abp']
-                    next_step[i] = '32'
+        converted, deficit = desilicate(deficit, n_phase['Abp'], 4)
+        n_phase['Ab'] = n_phase['Abp'] - converted
+        n_phase['Ne'] = converted
 
         # 32 / Normative leucite or orthoclase
         if self.verbose > 1: print("Step 32 - Normative leucite or orthoclase")
 
-        n_phase['Lcp'] = 0.
-        for i in data_n.index:
-            if next_step[i] == '32':
-                if si_deff.loc[i, 'D3'] < 2 * n_phase.loc[i, 'Orp']:
-                    n_phase.loc[i, 'Or'] = n_phase.loc[i, 'Orp'] - si_deff.loc[i, 'D3'] / 2
-                    n_phase.loc[i, 'Lc'] = si_deff.loc[i, 'D3'] / 2
-                    next_step[i] = '36e'
-                else:
-                    n_phase.loc[i, 'Lcp'] = n_phase.loc[i, 'Orp']
-                    n_phase.loc[i, 'Or'] = 0.
-                    si_deff.loc[i, 'D4'] = si_deff.loc[i, 'D3'] - 2 * n_phase.loc[i, 'Orp']
-                    next_step[i] = '33'
+        converted, deficit = desilicate(deficit, n_phase['Orp'], 2)
+        n_phase['Or'] = n_phase['Orp'] - converted
+        n_phase['Lc'] = converted
 
         # 33 / Normative dicalcium silicate or wollastonite
         if self.verbose > 1: print("Step 33 - Normative dicalcium silicate or wollastonite")
 
-        for i in data_n.index:
-            if next_step[i] == '33':
-                if si_deff.loc[i, 'D4'] < 2 * n_phase.loc[i, 'Wop'] / 2:
-                    n_phase.loc[i, 'Wo'] = n_phase.loc[i, 'Wop'] - 2 * si_deff.loc[i, 'D4']
-                    n_phase.loc[i, 'Cs'] = si_deff.loc[i, 'D4']
-                    next_step[i] = '36e'  # Instead of 36f
-                else:
-                    n_phase.loc[i, 'Cs'] = n_phase.loc[i, 'Wop'] / 2
-                    n_phase.loc[i, 'Wo'] = 0.
-                    si_deff.loc[i, 'D5'] = si_deff.loc[i, 'D4'] - n_phase.loc[i, 'Wop'] / 2
-                    next_step[i] = '34'
+        converted, deficit = desilicate(deficit, n_phase['Wop'], 1 / 2)
+        n_phase['Wo'] = n_phase['Wop'] - converted
+        n_phase['Cs'] = converted / 2
 
         # 34 / Normative dicalcium silicate or olivine
         if self.verbose > 1: print("Step 34 - Normative diopside or olivine adjustment")
 
-        for i in data_n.index:
-            if next_step[i] == '34':
-                if si_deff.loc[i, 'D5'] < n_phase.loc[i, 'Dip']:
-                    n_phase.loc[i, 'Cs'] = n_phase.loc[i, 'Cs'] + si_deff.loc[i, 'D5'] / 2
-                    n_phase.loc[i, 'Ol'] = n_phase.loc[i, 'Ol'] + si_deff.loc[i, 'D5'] / 2
-                    n_phase.loc[i, 'Di'] = n_phase.loc[i, 'Dip'] - si_deff.loc[i, 'D5']
-                    next_step[i] = '36g'
-                else:
-                    n_phase.loc[i, 'Cs'] = n_phase.loc[i, 'Cs'] + n_phase.loc[i, 'Dip'] / 2
-                    n_phase.loc[i, 'Ol'] = n_phase.loc[i, 'Ol'] + n_phase.loc[i, 'Dip'] / 2
-                    n_phase.loc[i, 'Di'] = n_phase.loc[i, 'Di-fe'] = n_phase.loc[i, 'Di-mg'] = 0.
-                    si_deff.loc[i, 'D6'] = si_deff.loc[i, 'D5'] - n_phase.loc[i, 'Dip']
-                    next_step[i] = '35'
-            else:
-                n_phase['Di'] = n_phase['Dip']
+        converted, deficit = desilicate(deficit, n_phase['Dip'], 1)
+        n_phase['Di'] = n_phase['Dip'] - converted
+        n_phase['Cs'] = n_phase['Cs'] + converted / 2
+        n_phase['Ol'] = n_phase['Ol'] + converted / 2
 
         # 35 / Normative kaliophilite or leucite
         if self.verbose > 1: print("Step 35 - Normative kaliophilite or leucite")
 
-        for i in data_n.index:
-            if next_step[i] == '35':
-                if n_phase.loc[i, 'Lcp'] >= si_deff.loc[i, 'D6'] / 2:
-                    n_phase.loc[i, 'Kp'] = si_deff.loc[i, 'D6'] / 2
-                    n_phase.loc[i, 'Lc'] = n_phase.loc[i, 'Lcp'] - si_deff.loc[i, 'D6'] / 2
-                    next_step[i] = '36g'
-                else:
-                    n_phase.loc[i, 'Kp'] = n_phase.loc[i, 'Lcp']
-                    n_phase.loc[i, 'Lc'] = 0.
-                    suppl.loc[i, 'defSiO2'] = (si_deff.loc[i, 'D6'] - 2 * n_phase.loc[i, 'Kp']) * corr_mol_w['SiO2']
-                    next_step[i] = '36g'
-
-        # 36 / Definite mineral proportions
-
-        for i in data_n.index:
-            if self.verbose > 1: print("Step 36 - Solution", i)
-
-            if next_step[i] == '36b':
-                if self.verbose > 1: print("     36b")
-                n_phase.loc[i, 'Tn'] = n_phase.loc[i, 'Tnp']
-                next_step[i] = '36c'
-
-            if next_step[i] == '36c':
-                if self.verbose > 1: print("     36c")
-                n_phase.loc[i, 'Ab'] = n_phase.loc[i, 'Abp']
-                next_step[i] = '36d'
-
-            if next_step[i] == '36d':
-                if self.verbose > 1: print("     36d")
-                n_phase.loc[i, 'Or'] = n_phase.loc[i, 'Orp']
-                n_phase.loc[i, 'Lc'] = n_phase.loc[i, 'Lcp']
-                next_step[i] = '36e'
-
-            if next_step[i] == '36e':
-                if self.verbose > 1: print("     36e")
-                if 'Wop' in n_phase.keys():
-                    n_phase.loc[i, 'Wo'] = n_phase.loc[i, 'Wop']
+        converted, deficit = desilicate(deficit, n_phase['Lc'], 2)
+        n_phase['Lc'] = n_phase['Lc'] - converted
+        n_phase['Kp'] = converted
+        if (deficit > 0).any():
+            suppl['defSiO2'] = deficit * corr_mol_w['SiO2']
 
         # Steps of 36a and 36f, obligatory for this algorithm
         if self.verbose > 1: print("Obligatory 36a, 36f and Fe-Mg distribution in olivine")
-        n_phase['Hy-fe'] = n_phase['Hy'] * prop['xFe']
-        n_phase['Hy-mg'] = n_phase['Hy'] * prop['xMg']
-        n_phase['Di-fe'] = n_phase['Di'] * prop['xFe']
-        n_phase['Di-mg'] = n_phase['Di'] * prop['xMg']
-        n_phase['Ol-fe'] = n_phase['Ol'] * prop['xFe']
-        n_phase['Ol-mg'] = n_phase['Ol'] * prop['xMg']
+        for mineral in ['Hy', 'Di', 'Ol']:
+            n_phase[mineral + '-fe'] = n_phase[mineral] * prop['FeO']
+            n_phase[mineral + '-mg'] = n_phase[mineral] * prop['MgO']
 
         # 37 / Conversion of normative minerals in %, normative sum
         if self.verbose > 1: print("Step 37 - Conversion of normative minerals in %, normative sum")
@@ -738,55 +450,42 @@ class CIPWNorm(BaseOptimizer):
                 suppl['Ap-F'] = n_phase['Ap-F'] * mol_w_min['Ap-F']
                 suppl['Ap-O'] = n_phase['Ap-O'] * mol_w_min['Ap-O']
                 partitions['Ap'] = suppl['Ap-F'] + suppl['Ap-O']
-            elif mineral == 'Ol':
-                suppl['Ol-mg'] = n_phase['Ol-mg'] * mol_w_min['Ol-mg']
-                suppl['Ol-fe'] = n_phase['Ol-fe'] * mol_w_min['Ol-fe']
-                partitions['Ol'] = suppl['Ol-mg'] + suppl['Ol-fe']
-            elif mineral == 'Hy':
-                suppl['Hy-mg'] = n_phase['Hy-mg'] * mol_w_min['Hy-mg']
-                suppl['Hy-fe'] = n_phase['Hy-fe'] * mol_w_min['Hy-fe']
-                partitions['Hy'] = suppl['Hy-mg'] + suppl['Hy-fe']
-            elif mineral == 'Di':
-                suppl['Di-mg'] = n_phase['Di-mg'] * mol_w_min['Di-mg']
-                suppl['Di-fe'] = n_phase['Di-fe'] * mol_w_min['Di-fe']
-                partitions['Di'] = suppl['Di-mg'] + suppl['Di-fe']
+            elif mineral in ['Ol', 'Hy', 'Di']:
+                suppl[mineral + '-mg'] = n_phase[mineral + '-mg'] * mol_w_min[mineral + '-mg']
+                suppl[mineral + '-fe'] = n_phase[mineral + '-fe'] * mol_w_min[mineral + '-fe']
+                partitions[mineral] = suppl[mineral + '-mg'] + suppl[mineral + '-fe']
             else:
                 ignored_phases.append(mineral)
 
-        if self.verbose > 1: print("Temporary phases ignored in final composition :", *ignored_phases[skip_cols:])
+        if self.verbose > 1: print("Temporary phases ignored in final composition :", *ignored_phases)
+
+        for oxel, values in free_n.items():
+            free[oxel] = values
 
         # Add free CO2
-        free = free.fillna(0)
-        free_phases = free.keys()
-        if 'CO2' in free_phases:
+        if 'CO2' in free_n:
             partitions['CO2'] = free['CO2'] * corr_mol_w['CO2']
 
         # Add free O
         if minor_included:
-            # Free O
-            free['O_wt%'] = 0.
-            if 'O_12b' in free_phases:
-                free['O_wt%'] = free['O_wt%'] + (1 + (0.1 * (mol_w_min['Ap-F'] / 328.8691887) - 1)) * \
-                                corr_mol_w['O'] * free['O_12b']
-            if 'O_12c' in free_phases:
-                free['O_wt%'] = free['O_wt%'] + (
-                        1 + 0.1 * (n_phase['Ap-F'] / n_phase['Ap']) * (mol_w_min['Ap-F'] / 328.8691887) - 1) * \
-                                corr_mol_w['O'] * free['O_12c']
-            if 'O_13' in free_phases:
-                free['O_wt%'] = free['O_wt%'] + (1 + (corr_mol_w['CaO'] / 56.0774 - 1)) * corr_mol_w['O'] * free['O_13']
-            if 'O_14' in free_phases:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                x_ap_f = np.where(n_phase['Ap'] > 0, n_phase['Ap-F'] / n_phase['Ap'], 0.)
+            free['O_wt%'] = (1 + (0.1 * (mol_w_min['Ap-F'] / 328.8691887) - 1)) * corr_mol_w['O'] * free['O_12b']
+            free['O_wt%'] = free['O_wt%'] + (1 + 0.1 * x_ap_f * (mol_w_min['Ap-F'] / 328.8691887) - 1) * \
+                            corr_mol_w['O'] * free['O_12c']
+            free['O_wt%'] = free['O_wt%'] + (1 + (corr_mol_w['CaO'] / 56.0774 - 1)) * corr_mol_w['O'] * free['O_13']
+            if 'O_14' in free_n:
                 free['O_wt%'] = free['O_wt%'] + (1 + 0.5 * (corr_mol_w['Na2O'] / 61.97894 - 1)) * corr_mol_w['O'] * \
                                 free['O_14']
-            if 'O_16' in free_phases:
+            if 'O_16' in free_n:
                 free['O_wt%'] = free['O_wt%'] + (1 + (corr_mol_w['FeO'] / 71.8444 - 1)) * corr_mol_w['O'] * free['O_16']
             partitions['O'] = free['O_wt%']
 
         # Add free oxides
-        partitions['free_Ox'] = 0.
-        free_keys = free.keys()
+        partitions['free_oxides'] = 0.
         for oxel in ['P2O5', 'F', 'Cl', 'SO3', 'Cr2O3']:
-            if oxel in free_keys:
-                partitions['free_oxides'] = partitions['free_Ox'] + free[oxel] * _mol_w[oxel]
+            if oxel in free_n:
+                partitions['free_oxides'] = partitions['free_oxides'] + free[oxel] * _mol_w[oxel]
 
         # Totals
         partitions['Sum_norm'] = partitions.iloc[:, skip_cols:].sum(axis=1)
@@ -0,0 +1,335 @@
+import warnings
+import numpy as np
+from georunes.tools.chemistry import ratio_el_to_ox, molar_mass, el_molar_mass, number_cation_in_oxide
+from georunes.modmin.optim.base import BaseOptimizer
+from georunes.tools.warnings import DataIntegrityWarning
+
+list_major_ox = ['SiO2', 'Na2O', 'K2O', 'CaO', 'MnO', 'FeO', 'Fe2O3', 'MgO', 'TiO2', 'Al2O3', 'P2O5']
+list_minor_el = ['F', 'Cl', 'S', 'Ni', 'Co', 'Ba', 'Sr', 'Rb', 'Cs', 'Li', 'Zr', 'Cr', 'V']
+list_ox_from_minor_el = ['SO3', 'NiO', 'CoO', 'BaO', 'SrO', 'Rb2O', 'Cs2O', 'Li2O', 'ZrO2', 'Cr2O3', 'V2O3']
+
+oxide_corresp = {
+    'Ni': 'NiO',
+    'Co': 'CoO',
+    'Ba': 'BaO',
+    'Sr': 'SrO',
+    'Rb': 'Rb2O',
+    'Cs': 'Cs2O',
+    'Li': 'Li2O',
+    'Zr': 'ZrO2',
+    'Cr': 'Cr2O3',
+    'V': 'V2O3'
+}
+
+# Minor oxides added to the major oxide that they substitute
+minor_oxides_folding = {
+    'FeO': ['MnO', 'NiO', 'CoO'],
+    'CaO': ['BaO', 'SrO'],
+    'K2O': ['Rb2O', 'Cs2O'],
+    'Na2O': ['Li2O'],
+    'Cr2O3': ['V2O3'],
+}
+
+
+def minor_elements_to_oxides(data):
+    """
+    Convert the minor elements (ppm) into oxides (wt%), and F, Cl and S into wt%. The missing minor oxides and F are
+    added with zero values.
+    :param data: the concentrations (DataFrame)
+    :return: the converted concentrations (DataFrame)
+    """
+    data = data.copy()
+    for oxel in data.keys():
+        if oxel in list_minor_el and oxel not in ['F', 'Cl', 'S']:
+            oxide = oxide_corresp[oxel]
+            data[oxide] = data[oxel] / (ratio_el_to_ox[oxide] * 10000)
+            data = data.drop(columns=oxel)
+        elif oxel in ['F', 'Cl', 'S']:
+            data[oxel] = data[oxel] / 10000
+
+    data_keys = data.keys()
+    for ox in list_ox_from_minor_el:
+        if ox not in data_keys:
+            data[ox] = 0.
+    if 'F' not in data_keys:
+        data['F'] = 0.
+    return data
+
+
+def molar_weight(oxel):
+    if oxel in molar_mass:
+        return molar_mass[oxel]
+    return el_molar_mass[oxel]
+
+
+def molar_proportions(data, components):
+    """
+    Convert weight concentrations into molar proportions, for all the samples at once
+    :param data: the concentrations (DataFrame)
+    :param components: the oxides/elements to convert, with the component receiving them and the number of moles of
+    component per mole of oxide/element (dict of tuples). Defaults to one mole of the oxide/element itself.
+    :return: the molar proportions by component (dict of arrays). The oxides/elements missing in data are null.
+    """
+    nb_samples = len(data.index)
+    moles = dict()
+    for oxel, (component, factor) in components.items():
+        if oxel in data.keys():
+            values = np.nan_to_num(data[oxel].to_numpy(dtype=float)) / molar_weight(oxel)
+            if factor != 1:
+                values = values * factor
+        else:
+            values = np.zeros(nb_samples)
+        moles[component] = moles[component] + values if component in moles else values
+    return moles
+
+
+def fold_minor_components(moles, folding, molar_weights=None):
+    """
+    Add the minor components to the major component that they substitute (e.g. MnO in FeO). The minor components are
+    set to zero.
+    :param moles: the molar proportions by component (dict of arrays), updated in place
+    :param folding: the minor components by major component (dict of lists)
+    :param molar_weights: the molar weights of the components (dict), to compute corrected molar weights
+    :return: the corrected molar weights of the major components (dict of arrays), if molar_weights is provided
+    """
+    corrected = dict()
+    for major, minors in folding.items():
+        minors = [comp for comp in minors if comp in moles]
+        total = moles[major]
+        for comp in minors:
+            total = total + moles[comp]
+        if molar_weights is not None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                weight = (moles[major] / total) * molar_weights[major]
+                for comp in minors:
+                    weight = weight + (moles[comp] / total) * molar_weights[comp]
+            corrected[major] = np.nan_to_num(weight)
+        moles[major] = total
+        for comp in minors:
+            moles[comp] = np.zeros_like(total)
+    return corrected
+
+
+def allocate(moles, reactants):
+    """
+    Allocate the largest possible amount of a phase from the available components, and remove the consumed
+    quantities. The limiting components are set to zero.
+    :param moles: the available molar proportions by component (dict of arrays), updated in place
+    :param reactants: the number of moles of each component per mole of phase (dict)
+    :return: the molar proportions of the phase (array)
+    """
+    ratios = [moles[comp] / coef for comp, coef in reactants.items()]
+    amount = ratios[0]
+    for ratio in ratios[1:]:
+        amount = np.minimum(amount, ratio)
+    for (comp, coef), ratio in zip(reactants.items(), ratios):
+        moles[comp] = np.where(ratio <= amount, 0., moles[comp] - coef * amount)
+    return amount
+
+
+def pool_components(moles, pool, components):
+    """
+    Merge several components (e.g. FeO and MgO) into one
+    :param moles: the molar proportions by component (dict of arrays), updated in place
+    :param pool: the name of the merged component
+    :param components: the components to merge (list)
+    :return: the molar fraction of each merged component (dict of arrays)
+    """
+    total = sum(moles[comp] for comp in components)
+    proportions = dict()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for comp in components:
+            proportions[comp] = moles[comp] / total
+            moles[comp] = np.zeros_like(total)
+    moles[pool] = total
+    return proportions
+
+
+def desilicate(deficit, source, silica):
+    """
+    Convert a phase into a silica-poorer phase to compensate a silica deficiency
+    :param deficit: the silica deficiency (array)
+    :param source: the molar proportions of the phase to convert (array)
+    :param silica: the moles of silica released per mole of converted phase
+    :return: the molar proportions of converted phase, and the remaining silica deficiency (arrays)
+    """
+    partial = deficit < source * silica
+    converted = np.where(partial, deficit / silica, source)
+    remaining = np.where(partial, 0., deficit - source * silica)
+    return converted, remaining
+
+
+class NormState:
+    """
+    Available components, allocated phases and silica balance of a norm computation
+    """
+
+    def __init__(self, moles, nb_samples):
+        self.moles = moles
+        self.phases = dict()
+        self.silica_needed = np.zeros(nb_samples)
+        self.deficit = np.zeros(nb_samples)
+        self.proportions = dict()
+
+    def add_phase(self, phase, amount):
+        self.phases[phase] = self.phases[phase] + amount if phase in self.phases else amount
+
+    def get_phase(self, phase):
+        return self.phases[phase] if phase in self.phases else np.zeros_like(self.silica_needed)
+
+
+class Allocation:
+    """
+    Allocate a phase from the available components. The silica of its formula is only accounted, and allocated
+    by a SilicaSaturation step.
+    """
+
+    def __init__(self, phase):
+        self.phase = phase
+
+    def apply(self, state, formulas):
+        reactants = {comp: coef for comp, coef in formulas[self.phase].items() if comp != 'Si'}
+        amount = allocate(state.moles, reactants)
+        state.add_phase(self.phase, amount)
+        state.silica_needed = state.silica_needed + formulas[self.phase].get('Si', 0) * amount
+
+
+class Pooling:
+    """
+    Merge several components (e.g. Fe2+ and Mg) into one, keeping their proportions
+    """
+
+    def __init__(self, pool, components):
+        self.pool = pool
+        self.components = components
+
+    def apply(self, state, formulas):
+        state.proportions.update(pool_components(state.moles, self.pool, self.components))
+
+
+class SilicaSaturation:
+    """
+    Allocate the silica required by the previous phases, the excess of silica as quartz
+    """
+
+    def __init__(self, phase='Q'):
+        self.phase = phase
+
+    def apply(self, state, formulas):
+        si = state.moles['Si']
+        state.add_phase(self.phase, np.where(si >= state.silica_needed, si - state.silica_needed, 0.))
+        state.deficit = np.where(si >= state.silica_needed, 0., state.silica_needed - si)
+        state.moles['Si'] = np.zeros_like(si)
+
+
+class Desilication:
+    """
+    Convert a phase into silica-poorer phases while a silica deficiency remains
+    :param source: the phase to convert
+    :param targets: the moles of each new phase per mole of converted phase (dict)
+    :param silica: the moles of silica released per mole of converted phase
+    """
+
+    def __init__(self, source, targets, silica):
+        self.source = source
+        self.targets = targets
+        self.silica = silica
+
+    def apply(self, state, formulas):
+        converted, state.deficit = desilicate(state.deficit, state.get_phase(self.source), self.silica)
+        state.phases[self.source] = state.get_phase(self.source) - converted
+        for target, coef in self.targets.items():
+            state.add_phase(target, coef * converted)
+
+
+class StepNorm(BaseOptimizer):
+    """
+    Norm computed on a cation basis, declared as a sequence of steps (Allocation, Pooling, SilicaSaturation,
+    Desilication) applied to all the compositions at once. Children classes define the oxides converted to cations
+    (components), the minor components folding, the phases formulas and the steps.
+    """
+    components = dict()
+    folding = dict()
+    formulas = dict()
+    steps = ()
+
+    def __init__(self, **kwargs):
+        BaseOptimizer.__init__(self, **kwargs)
+        self.notif = ">>>>>> Norm"
+
+    def compute(self, raw_data, skip_cols, minor_included=False, to_round=4):
+        if self.verbose:
+            print(self.notif)
+
+        data = raw_data.iloc[:, :skip_cols].copy()
+        supported = [*self.components.keys(), *(list_minor_el if minor_included else [])]
+        for oxel in raw_data.iloc[:, skip_cols:].keys():
+            if oxel in supported:
+                data[oxel] = raw_data[oxel]
+        if minor_included:
+            data = minor_elements_to_oxides(data)
+
+        moles = molar_proportions(data, self.components)
+        total_cations = sum(moles.values())
+        fold_minor_components(moles, self.folding)
+
+        state = NormState(moles, len(data.index))
+        for step in self.steps:
+            step.apply(state, self.formulas)
+
+        partitions = data.iloc[:, :skip_cols].copy()
+        free = data.iloc[:, :skip_cols].copy()
+        suppl = data.iloc[:, :skip_cols].copy()
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for phase, amount in state.phases.items():
+                partitions[phase] = 100 * amount * sum(self.formulas[phase].values()) / total_cations
+            for comp, amount in state.moles.items():
+                free[comp] = 100 * amount / total_cations
+            suppl['defSi'] = 100 * state.deficit / total_cations
+        for comp, proportion in state.proportions.items():
+            suppl['x' + comp] = proportion
+        suppl['total_cations'] = total_cations
+
+        partitions['Sum_norm'] = partitions.iloc[:, skip_cols:].sum(axis=1)
+        partitions = partitions.fillna(0).round(to_round)
+        partitions = partitions.loc[:, (partitions != 0).any(axis=0)]
+        free = free.fillna(0).round(to_round)
+        free = free.loc[:, (free != 0).any(axis=0)]
+        suppl = suppl.fillna(0).round(to_round)
+        # A remaining deficit means the cations of the phases exceed those of the rock, the norm is not computed
+        rejected = suppl['defSi'] > 0
+        if rejected.any():
+            partitions.loc[rejected, partitions.columns[skip_cols:]] = np.nan
+            warnings.warn("Silica deficiency remaining for some compositions, out of the scope of the norm "
+                          "(see defSi).", DataIntegrityWarning)
+
+        if self.verbose:
+            print(">>> Final compositions (cation %)")
+            print(partitions.to_string())
+            print(">>> Free components (cation %)")
+            print(free.to_string())
+            print(">>> Supplementary data")
+            print(suppl.to_string())
+
+        return partitions, (free, suppl)
+
+
+def cation_components(oxides, custom=None):
+    """
+    Get the cation component and the number of cations per oxide, for the conversion of oxides in cations
+    :param oxides: the oxides (list)
+    :param custom: the components names different from the cation (dict), e.g. {'FeO': 'Fe2'}
+    """
+    custom = custom if custom else dict()
+    components = dict()
+    for ox in oxides:
+        component = custom[ox] if ox in custom else _cation_name(ox)
+        components[ox] = (component, number_cation_in_oxide(ox))
+    return components
+
+
+def _cation_name(oxide):
+    for i in range(1, len(oxide)):
+        if not oxide[i].islower():
+            return oxide[:i]
+    return oxide
@@ -0,0 +1,116 @@
+import numpy as np
+from matplotlib.path import Path
+from georunes.tools.chemistry import molar_mass
+
+# Middlemost, E.A., 1989. Iron oxidation ratios, norms and the classification of volcanic rocks. Chemical Geology,
+# 77(1), pp.19-26.
+# Le Maitre, R.W., 1976. Some problems of the projection of chemical data into mineralogical classifications.
+# Contributions to Mineralogy and Petrology, 56(2), pp.181-189.
+
+fe_adjustment_methods = ("Middlemost", "LeMaitre")
+
+_feo_to_fe2o3 = molar_mass['Fe2O3'] / (2 * molar_mass['FeO'])  # Weight of Fe2O3 per weight of FeO
+
+# Fe2O3/FeO weight ratios of Middlemost (1989) for the TAS fields (Le Bas et al., 1986). Coordinates are
+# (SiO2, Na2O + K2O) on an anhydrous basis, with the field boundaries used in DiagramSiAlkali. Trachyte, trachydacite,
+# rhyolite and phonolite share the default ratio of 0.5.
+_middlemost_default_ratio = 0.5
+_middlemost_fields = (
+    (0.15, [(41, 0), (45, 0), (45, 3), (41, 3)]),  # Picrobasalt
+    (0.2, [(45, 0), (52, 0), (52, 5), (45, 5)]),  # Basalt
+    (0.3, [(52, 0), (57, 0), (57, 5.9), (52, 5)]),  # Basaltic andesite
+    (0.35, [(57, 0), (63, 0), (63, 7), (57, 5.9)]),  # Andesite
+    (0.4, [(63, 0), (74.71, 0), (74, 1), (69, 8), (63, 7)]),  # Dacite
+    (0.3, [(45, 5), (52, 5), (49.4, 7.3)]),  # Trachybasalt
+    (0.35, [(52, 5), (57, 5.9), (53, 9.3), (49.4, 7.3)]),  # Basaltic trachyandesite
+    (0.4, [(57, 5.9), (63, 7), (57.6, 11.7), (53, 9.3)]),  # Trachyandesite
+    (0.2, [(41, 3), (45, 3), (45, 5), (49.4, 7.3), (45, 9.4), (41, 7)]),  # Tephrite, basanite
+    (0.35, [(45, 9.4), (49.4, 7.3), (53, 9.3), (48.4, 11.5)]),  # Phonotephrite
+    (0.4, [(48.4, 11.5), (53, 9.3), (57.6, 11.7), (52.5, 14)]),  # Tephriphonolite
+    (0.2, [(30, 0), (41, 0), (41, 7), (45, 9.4), (48.4, 11.5), (52.5, 14), (50.28, 15), (30, 24.14)]),  # Foidite
+)
+_middlemost_paths = [(ratio, Path(vertices + [vertices[0]], closed=True)) for ratio, vertices in _middlemost_fields]
+
+
+def ratio_middlemost(sio2, alkali):
+    """
+    Get the Fe2O3/FeO weight ratios of Middlemost (1989) from the position of the samples in the TAS diagram
+    :param sio2: the SiO2 concentrations, on an anhydrous basis (array)
+    :param alkali: the Na2O + K2O concentrations, on an anhydrous basis (array)
+    :return: the Fe2O3/FeO weight ratios (array)
+    """
+    points = np.column_stack([np.asarray(sio2, dtype=float), np.asarray(alkali, dtype=float)])
+    ratio = np.full(len(points), _middlemost_default_ratio)
+    found = np.zeros(len(points), dtype=bool)
+    for field_ratio, path in _middlemost_paths:
+        inside = path.contains_points(points, radius=1e-9) & ~found
+        ratio[inside] = field_ratio
+        found |= inside
+    return ratio
+
+
+def ratio_le_maitre(sio2, alkali, rock_type="volcanic"):
+    """
+    Get the Fe2O3/FeO weight ratios from the FeO/(FeO + Fe2O3) equations of Le Maitre (1976)
+    :param sio2: the SiO2 concentrations, on an anhydrous basis (array)
+    :param alkali: the Na2O + K2O concentrations, on an anhydrous basis (array)
+    :param rock_type: 'volcanic' or 'plutonic'
+    :return: the Fe2O3/FeO weight ratios (array)
+    """
+    sio2 = np.asarray(sio2, dtype=float)
+    alkali = np.asarray(alkali, dtype=float)
+    if rock_type == "volcanic":
+        x_feo = 0.93 - 0.0042 * sio2 - 0.022 * alkali
+    elif rock_type == "plutonic":
+        x_feo = 0.88 - 0.0016 * sio2 - 0.027 * alkali
+    else:
+        raise ValueError("Parameter 'rock_type' must be 'volcanic' or 'plutonic'")
+    x_feo = np.clip(x_feo, 1e-6, 1)
+    return (1 - x_feo) / x_feo
+
+
+def fe_oxidation_ratio(sio2, alkali, method="Middlemost", rock_type="volcanic"):
+    """
+    Get the Fe2O3/FeO weight ratios to apply to a set of compositions
+    :param sio2: the SiO2 concentrations, on an anhydrous basis (array)
+    :param alkali: the Na2O + K2O concentrations, on an anhydrous basis (array)
+    :param method: 'Middlemost', 'LeMaitre', or a fixed Fe2O3/FeO weight ratio (float)
+    :param rock_type: 'volcanic' or 'plutonic', only used by the method of Le Maitre (1976)
+    :return: the Fe2O3/FeO weight ratios (array)
+    """
+    if isinstance(method, (int, float)) and not isinstance(method, bool):
+        if method < 0:
+            raise ValueError("The Fe2O3/FeO ratio must be positive.")
+        return np.full(len(np.atleast_1d(sio2)), float(method))
+    if method == "Middlemost":
+        return ratio_middlemost(sio2, alkali)
+    elif method == "LeMaitre":
+        return ratio_le_maitre(sio2, alkali, rock_type=rock_type)
+    raise ValueError("Parameter 'fe_adjustment' must be a ratio or one of " + str(fe_adjustment_methods))
+
+
+def split_total_iron(fe2o3t, ratio):
+    """
+    Split a total iron content, expressed as Fe2O3, according to Fe2O3/FeO weight ratios
+    :param fe2o3t: the total iron as Fe2O3 (array)
+    :param ratio: the Fe2O3/FeO weight ratios (array)
+    :return: the FeO and Fe2O3 concentrations (arrays)
+    """
+    fe2o3t = np.asarray(fe2o3t, dtype=float)
+    ratio = np.asarray(ratio, dtype=float)
+    feo = fe2o3t / (ratio + _feo_to_fe2o3)
+    return feo, ratio * feo
+
+
+def total_iron_as_fe2o3(feo=0., fe2o3=0., feot=None, fe2o3t=None):
+    """
+    Get the total iron as Fe2O3. Where provided (not null), the total contents FeOt or Fe2O3t prevail over FeO + Fe2O3.
+    """
+    total = np.nan_to_num(np.asarray(fe2o3, dtype=float)) + _feo_to_fe2o3 * np.nan_to_num(np.asarray(feo, dtype=float))
+    if feot is not None:
+        feot = np.asarray(feot, dtype=float)
+        total = np.where(np.isnan(feot), total, _feo_to_fe2o3 * feot)
+    if fe2o3t is not None:
+        fe2o3t = np.asarray(fe2o3t, dtype=float)
+        total = np.where(np.isnan(fe2o3t), total, fe2o3t)
+    return total
@@ -0,0 +1,62 @@
+from georunes.modmin.norm.catanorm import cation_norm_components, cation_norm_folding, catanorm_formulas
+from georunes.modmin.norm.engine import StepNorm, Allocation, Pooling, SilicaSaturation, Desilication
+
+# Barth, T.F.W., 1962. Theoretical petrology, 2nd edition. John Wiley & Sons, New York, 416 p.
+# Mielke, P. and Winkler, H.G.F., 1979. Eine bessere Berechnung der Mesonorm für granitische Gesteine. Neues Jahrbuch
+# für Mineralogie, Monatshefte, pp.471-480.
+
+# Cations per formula unit of the normative phases, with biotite and hornblende (actinolite) as hydrous femic phases
+mesonorm_formulas = {
+    **catanorm_formulas,
+    'Bt': {'K': 1, 'FeMg': 3, 'Al': 1, 'Si': 3},
+    'Hbl': {'Ca': 2, 'FeMg': 5, 'Si': 8},
+}
+
+# Simplified sequence for granitoids : the femic components go first to biotite, at the expense of orthoclase, then
+# to hornblende with the calcium left after anorthite. For the silica-poor compositions, the hornblende is broken down
+# into diopside and hypersthene, then the phases are desilicated as in the catanorm.
+mesonorm_steps = (
+    Allocation('Z'),
+    Allocation('Ap'),
+    Allocation('Cm'),
+    Allocation('Il'),
+    Allocation('Mt'),
+    Allocation('Hm'),
+    Pooling('FeMg', ['Fe2', 'Mg']),
+    Allocation('Bt'),
+    Allocation('Or'),
+    Allocation('Ks'),
+    Allocation('Ab'),
+    Allocation('Ac'),
+    Allocation('Ns'),
+    Allocation('An'),
+    Allocation('C'),
+    Allocation('Hbl'),
+    Allocation('Tn'),
+    Allocation('Ru'),
+    Allocation('Wo'),
+    Allocation('Hy'),
+    SilicaSaturation('Q'),
+    Desilication('Hbl', {'Di': 2, 'Hy': 3}, 1),
+    Desilication('Hy', {'Ol': 1 / 2}, 1 / 2),
+    Desilication('Tn', {'Pf': 1}, 1),
+    Desilication('Ab', {'Ne': 1}, 2),
+    Desilication('Or', {'Lc': 1}, 1),
+    Desilication('Wo', {'Cs': 1 / 2}, 1 / 2),
+    Desilication('Di', {'Cs': 1 / 2, 'Ol': 1 / 2}, 1),
+    Desilication('Lc', {'Kp': 1}, 1),
+)
+
+
+class GranitoidMesonorm(StepNorm):
+    """
+    Mesonorm for granitoids, in cation %
+    """
+    components = cation_norm_components
+    folding = cation_norm_folding
+    formulas = mesonorm_formulas
+    steps = mesonorm_steps
+
+    def __init__(self, **kwargs):
+        StepNorm.__init__(self, **kwargs)
+        self.notif = ">>>>>> Granitoid mesonorm"
@@ -1,7 +1,8 @@
+import numpy as np
 import pandas as pd
 
-from georunes.tools.chemistry import molar_mass, el_molar_mass, number_cations_per_oxygen, get_cation, \
-    number_oxygen_in_oxide
+from georunes.tools.chemistry import oxides
+from georunes.modmin.norm.fe_oxidation import total_iron_as_fe2o3, _feo_to_fe2o3
 from georunes.modmin.optim.base import BaseOptimizer
 
 supported_oxides = ['SiO2', 'TiO2', 'CO2', 'Al2O3', 'Cr2O3', 'Fe2O3', 'FeO', 'Mn2O3', 'MnO', 'MgO', 'NiO', 'CaO', 'BaO',
@@ -15,136 +16,230 @@ custom_cation = {
     "MnO": "Mn2+"
 }
 
+# Cations excluded from the sum of cations
+uncounted_cations = ('P', 'C', 'OH')
+
+
+def _oxel_properties(oxel):
+    oxide = oxides[oxel]
+    if oxide.charge < 0:
+        return oxide.molar_mass, 1, 1., oxel, -1.
+    cation = 'OH' if oxel == 'H2O' else custom_cation.get(oxel, oxide.cation)
+    return oxide.molar_mass, oxide.nb_oxygen, oxide.nb_cation / oxide.nb_oxygen, cation, oxide.charge
+
+
+# Properties of the supported oxides and anions : molar mass, oxygen per formula, cations per oxygen, cation label and
+# cation charge. Anions count as one oxygen, with one "cation" per oxygen.
+oxide_properties = pd.DataFrame([_oxel_properties(oxel) for oxel in [*supported_oxides, *supported_anions]],
+                                index=[*supported_oxides, *supported_anions],
+                                columns=['molar_mass', 'oxygen', 'cations_per_oxygen', 'cation', 'charge'])
+
+# Droop, G.T.R., 1987. A general equation for estimating Fe3+ concentrations in ferromagnesian silicates and oxides
+# from microprobe analyses, using stoichiometric criteria. Mineralogical Magazine, 51(361), pp.431-435.
+
+_iron_columns = ('Fe2O3', 'FeO', 'FeOt', 'Fe2O3t')
+
+
+def atoms_oxygen_basis(values, props, oxygen_number, oxygen_equiv=False):
+    """
+    Atoms normalized to a number of oxygen
+    :param values: the weight percents (array, samples x oxides)
+    :param props: the properties of the oxides (DataFrame, rows of oxide_properties)
+    :param oxygen_number: the number of oxygen per formula unit
+    :param oxygen_equiv: if True, 2 F or Cl count as one oxygen
+    :return: the atoms (array, samples x oxides) and the oxygen factors (array)
+    """
+    moles_oxygen = values / props['molar_mass'].to_numpy() * props['oxygen'].to_numpy()
+    sum_o = moles_oxygen.sum(axis=1)
+    is_anion = (props['charge'] < 0).to_numpy()
+    if oxygen_equiv and is_anion.any():
+        sum_o = sum_o - moles_oxygen[:, is_anion].sum(axis=1) / 2  # 2 F,Cl for one O
+    oxygen_factor = oxygen_number / sum_o
+    return moles_oxygen * oxygen_factor[:, np.newaxis] * props['cations_per_oxygen'].to_numpy(), oxygen_factor
+
+
+def fe3_ratio_charge_balance(fe_total, sum_cations, cation_number, oxygen_number):
+    """
+    Fe3+/Fe ratios estimated by charge balance (Droop, 1987), from atoms computed with all Fe as Fe2+
+    :param fe_total: the total Fe atoms, normalized to oxygen_number oxygen (array)
+    :param sum_cations: the sum of the cations, normalized to oxygen_number oxygen (array)
+    :param cation_number: the ideal number of cations per formula unit
+    :param oxygen_number: the number of oxygen per formula unit
+    :return: the Fe3+/Fe ratios, between 0 and 1 (array)
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fe3 = 2 * oxygen_number * (1 - cation_number / sum_cations)
+        fe_total = fe_total * cation_number / sum_cations
+        ratio = np.clip(fe3, 0, fe_total) / fe_total
+    return np.where(fe_total > 0, ratio, 0.)
+
+
+def _total_iron_as_feo(raw_data, skip_cols):
+    # Total iron set to FeO, with FeO and Fe2O3 columns placed at the first iron column
+    data = raw_data.copy()
+    feo = total_iron_as_fe2o3(feo=data.get('FeO', 0.), fe2o3=data.get('Fe2O3', 0.), feot=data.get('FeOt'),
+                              fe2o3t=data.get('Fe2O3t')) / _feo_to_fe2o3
+    keys = list(data.columns)
+    position = min([keys.index(col) for col in _iron_columns if col in keys], default=len(keys))
+    data = data.drop(columns=[col for col in _iron_columns if col in keys])
+    position = max(min(position, len(data.columns)), skip_cols)
+    data.insert(position, 'FeO', feo)
+    data.insert(position, 'Fe2O3', 0.)
+    return data
+
 
 class APFUCalc(BaseOptimizer):
     def __init__(self, **kwargs):
         BaseOptimizer.__init__(self, **kwargs)
         self.notif = ">>>>>> Atoms per formula unit (APFU) calculation"
 
-    def compute(self, raw_data, skip_cols, oxygen_number=12, oxygen_equiv=False, to_round=3,
-                ignored_columns=('LOI', 'H2O+', 'Total'), force_cation_number=None):
-        if ignored_columns is None:
-            ignored_columns = []
-
+    def _prepare(self, raw_data, skip_cols, ignored_columns):
         # 1 / Preparing data
         if self.verbose > 1: print("Step 1 - Prepare data")
 
-        data = raw_data.iloc[:, :skip_cols].copy()
+        if ignored_columns is None:
+            ignored_columns = []
         raw_data_keys = raw_data.iloc[:, skip_cols:].keys()
         supported_oxel = [*supported_oxides, *supported_anions]  # Limit the list of usable oxide
-        for key in raw_data_keys:
-            if key in supported_oxel and key not in ignored_columns:
-                data[key] = raw_data[key]
-        data = data.fillna(0)
-        data_keys = data.keys()
-        list_oxel = [ox for ox in data_keys if ox in supported_oxel]
-        list_ox = [ox for ox in list_oxel if ox in supported_oxides]
-
-        filtered_columns = [oxel for oxel in raw_data_keys if oxel not in data_keys]
-        if self.verbose: print('Ignored columns :', filtered_columns)
+        list_oxel = [key for key in raw_data_keys if key in supported_oxel and key not in ignored_columns]
 
-        moles_oxides = data.iloc[:, :skip_cols].copy()
-        moles_oxygen = data.iloc[:, :skip_cols].copy()
-        ox_normalized = data.iloc[:, :skip_cols].copy()
-        moles_cations = data.iloc[:, :skip_cols].copy()
-        suppl = data.iloc[:, :skip_cols].copy()
-        suppl["sum_cations"] = 0
-        suppl["sum_anions"] = 0
-
-        # 2 / Weight percent to moles number in oxides
-        if self.verbose > 1: print("Step 2 - Calculate number of moles from weight percent of each oxide")
-        for oxel in list_oxel:
-            if oxel in supported_anions:
-                moles_oxides[oxel] = data[oxel] / el_molar_mass[oxel]
-            else:
-                moles_oxides[oxel] = data[oxel] / molar_mass[oxel]
-
-        # 3 / Moles number to oxygen moles number in oxides
-        if self.verbose > 1: print("Step 3 - Calculate number of moles of oxygen in each oxide")
+        filtered_columns = [oxel for oxel in raw_data_keys if oxel not in list_oxel]
+        if self.verbose: print('Ignored columns :', filtered_columns)
 
-        for oxel in list_oxel:
-            if oxel == 'H2O':
-                moles_oxygen['H2O'] = moles_oxides['H2O']
-            elif oxel in list_ox:
-                moles_oxygen[oxel] = moles_oxides[oxel] * number_oxygen_in_oxide(oxel)
-            else:
-                moles_oxygen[oxel] = moles_oxides[oxel]
+        ids = raw_data.iloc[:, :skip_cols].fillna(0)
+        values = raw_data[list_oxel].fillna(0).to_numpy(dtype=float)  # Samples x oxides
+        return ids, list_oxel, values, oxide_properties.loc[list_oxel]
 
-        # 4 / Normalization to the number of oxygen per formula
-        if self.verbose > 1: print("Step 4 - Normalization to the number of oxygen per formula")
+    def _normalize(self, ids, props, atoms_unit, factor_unit, bases, oxygen_equiv, suppl, to_round):
+        # Atoms and supplementary data on all the bases at once (bases x samples x atoms), from the atoms normalized
+        # to one oxygen, stacked with the bases as the outer level of the index
+        cations = list(props['cation'])
+        is_anion = (props['charge'] < 0).to_numpy()
+        is_counted = ~props['cation'].isin(uncounted_cations).to_numpy() & ~is_anion
+        is_anion_sum = ~is_counted & ~np.isin(cations, ('P', 'C'))
 
         _o = 'O'
-        sum_o = moles_oxygen.iloc[:, skip_cols:].sum(axis=1)
-        if oxygen_equiv:
-            for element in supported_anions:
-                if element in list_oxel:
-                    sum_o = sum_o - moles_oxygen[element]/2  # 2 F,Cl for one O
-                    _o = _o+'+'+str(element)
-
-        oxygen_factor = oxygen_number / sum_o
-        suppl["O_factor"] = oxygen_factor
-        for oxel in list_oxel:
-            ox_normalized[oxel] = moles_oxygen[oxel] * oxygen_factor
-
-        # 5 / Normalized oxygen numbers to cations number
-        if self.verbose > 1: print("Step 5 - Calculation of each cation number according to the normalized oxygen")
-
-        for oxel in list_oxel:
-            if oxel == 'H2O':
-                moles_cations['OH'] = ox_normalized[oxel] * 2
-                suppl["sum_anions"] = suppl["sum_anions"] + moles_cations['OH']
-            elif oxel in supported_anions:
-                moles_cations[oxel] = ox_normalized[oxel]
-                suppl["sum_anions"] = suppl["sum_anions"] + moles_cations[oxel]
-            elif oxel in custom_cation.keys():
-                cat = custom_cation[oxel]
-                moles_cations[cat] = ox_normalized[oxel] * number_cations_per_oxygen(oxel)
-                suppl["sum_cations"] = suppl["sum_cations"] + moles_cations[cat]
-            else:
-                cat = get_cation(oxel)
-                moles_cations[cat] = ox_normalized[oxel] * number_cations_per_oxygen(oxel)
-                if cat not in ('P', 'C'):
-                    suppl["sum_cations"] = suppl["sum_cations"] + moles_cations[cat]
-        moles_cations[_o] = oxygen_number
+        if oxygen_equiv and is_anion.any():
+            _o = _o + ''.join('+' + element for element in supported_anions if element in props.index)
 
+        bases = list(dict.fromkeys(basis if isinstance(basis, tuple) else (basis, None) for basis in bases))
+        oxygen_numbers = np.array([oxygen_number for oxygen_number, _ in bases], dtype=float)
         # If the cations number is fixed
-        if isinstance(force_cation_number, int) and force_cation_number > 0:
-            if self.verbose > 1: print("Number of cations forced to " + str(force_cation_number))
-            moles_cations_cat_fixed = data.iloc[:, :skip_cols].copy()
-            sum_cat = pd.Series([0] * len(moles_cations_cat_fixed), dtype=float, )
-            list_atoms = moles_cations.iloc[:, skip_cols:].keys()
-            for cat in list_atoms:
-                if cat not in ('P', 'C', 'OH', 'O', 'O+F', 'O+Cl', 'O+F+Cl', 'O+Cl+F', *supported_anions):
-                    sum_cat = sum_cat + moles_cations[cat]
-            cations_factor = force_cation_number / sum_cat
-
-            for cat in list_atoms:
-                moles_cations_cat_fixed[cat] = moles_cations[cat] * cations_factor
-            suppl["sum_anions_CF"] = suppl["sum_anions"] * cations_factor
-            suppl["sum_cations_CF"] = suppl["sum_cations"] * cations_factor
-            suppl['cations_factor'] = cations_factor
-            moles_cations_cat_fixed = moles_cations_cat_fixed.round(to_round)
+        forced = np.array([isinstance(nb, int) and nb > 0 for _, nb in bases])
+        cation_numbers = np.array([nb if is_forced else np.nan for (_, nb), is_forced in zip(bases, forced)])
+
+        atoms = atoms_unit[np.newaxis] * oxygen_numbers[:, np.newaxis, np.newaxis]
+        sum_cations = atoms[:, :, is_counted].sum(axis=2)
+        sum_anions = atoms[:, :, is_anion_sum].sum(axis=2)
+        cations_factor = np.where(forced[:, np.newaxis], cation_numbers[:, np.newaxis] / sum_cations, 1.)
+        if forced.any() and self.verbose > 1:
+            print("Number of cations forced to " + ", ".join(str(nb) for nb in cation_numbers[forced]))
+        atoms = atoms * cations_factor[:, :, np.newaxis]
+        oxygen = oxygen_numbers[:, np.newaxis] * cations_factor
+
+        nb_bases, nb_samples = len(bases), len(ids.index)
+        rows = np.tile(np.arange(nb_samples), nb_bases)
+        labels = [basis if basis[1] is not None else basis[0] for basis in bases]
+        codes = [np.repeat(np.arange(nb_bases), nb_samples), rows]
+        if ids.index.is_unique:  # Built from the codes, without factorizing the stacked labels
+            index = pd.MultiIndex(levels=[pd.Index(labels, dtype=object, tupleize_cols=False), ids.index], codes=codes,
+                                  names=['basis', ids.index.name], verify_integrity=False)
+        else:
+            index = pd.MultiIndex.from_arrays([[labels[i] for i in codes[0]], ids.index[rows]],
+                                              names=['basis', ids.index.name])
+
+        moles_cations = ids.iloc[rows].set_axis(index)
+        moles_cations = pd.concat([moles_cations, pd.DataFrame(atoms.reshape(-1, len(cations)), columns=cations,
+                                                               index=index)], axis=1)
+        moles_cations[_o] = oxygen.ravel()
+
+        suppl = suppl.iloc[rows].set_axis(index)
+        suppl["sum_cations"] = sum_cations.ravel()
+        suppl["sum_anions"] = sum_anions.ravel()
+        suppl["O_factor"] = (oxygen_numbers[:, np.newaxis] * factor_unit).ravel()
+        if forced.any():
+            suppl["sum_anions_CF"] = (sum_anions * cations_factor).ravel()
+            suppl["sum_cations_CF"] = (sum_cations * cations_factor).ravel()
+            suppl['cations_factor'] = cations_factor.ravel()
 
         # End
         moles_cations = moles_cations.round(to_round)
 
         suppl = suppl.round(to_round)
         suppl = suppl.fillna(0)
+        if forced.any() and not forced.all():  # Not applicable to the bases without forced number of cations
+            suppl.loc[~np.repeat(forced, nb_samples), ["sum_anions_CF", "sum_cations_CF", "cations_factor"]] = np.nan
         if self.verbose:
-            print(">>> Atoms")
+            if forced.any():
+                print(">>> Atoms (with cations normalized to " + ", ".join(str(nb) for nb in cation_numbers[forced])
+                      + ")")
+            else:
+                print(">>> Atoms")
             print(moles_cations.to_string())
         if self.verbose > 1:
-            if isinstance(force_cation_number, int) and force_cation_number > 0:
-                print(">>> Atoms (with cations normalized to " + str(force_cation_number) + ")")
-                print(moles_cations_cat_fixed.to_string())
             print(">>> Supplementary data")
             print(suppl.to_string())
 
         return moles_cations, suppl
 
+    def compute(self, raw_data, skip_cols, oxygen_number=12, oxygen_equiv=False, to_round=3,
+                ignored_columns=('LOI', 'H2O+', 'Total'), force_cation_number=None, fe3_estimation=False):
+        if fe3_estimation:
+            raw_data = _total_iron_as_feo(raw_data, skip_cols)
+        ids, list_oxel, values, props = self._prepare(raw_data, skip_cols, ignored_columns)
+        suppl = ids.copy()
+
+        # Iron oxidation estimated by charge balance
+        if fe3_estimation:
+            if not (isinstance(force_cation_number, int) and force_cation_number > 0):
+                raise ValueError("The Fe3+ estimation requires a forced cation number.")
+            if self.verbose > 1: print("Step 1b - Estimate Fe3+ by charge balance (Droop, 1987)")
+            ife2, ife3 = list_oxel.index('FeO'), list_oxel.index('Fe2O3')
+            is_counted = ~props['cation'].isin(uncounted_cations).to_numpy() & (props['charge'] > 0).to_numpy()
+            atoms_fe2, _ = atoms_oxygen_basis(values, props, oxygen_number, oxygen_equiv)
+            fe3_ratio = fe3_ratio_charge_balance(atoms_fe2[:, ife2], atoms_fe2[:, is_counted].sum(axis=1),
+                                                 force_cation_number, oxygen_number)
+            feo_total = values[:, ife2].copy()
+            values[:, ife2] = feo_total * (1 - fe3_ratio)
+            values[:, ife3] = feo_total * fe3_ratio * _feo_to_fe2o3
+            suppl['Fe3/Fe'] = fe3_ratio
+            suppl['Fe2O3_calc'] = values[:, ife3]
+            suppl['FeO_calc'] = values[:, ife2]
+
+        # 2-5 / Weight percents to moles of oxides and of oxygen, normalized to the number of oxygen per formula, and
+        # converted to cations
+        if self.verbose > 1: print("Step 2, 3, 4, 5 - Cations normalized to the number of oxygen per formula")
+
+        atoms_unit, factor_unit = atoms_oxygen_basis(values, props, 1, oxygen_equiv)
+        basis = (oxygen_number, force_cation_number)
+        moles_cations, suppl = self._normalize(ids, props, atoms_unit, factor_unit, [basis], oxygen_equiv, suppl,
+                                               to_round)
+        return moles_cations.droplevel('basis'), suppl.droplevel('basis')
+
+    def compute_bases(self, raw_data, skip_cols, bases, oxygen_equiv=False, to_round=3,
+                      ignored_columns=('LOI', 'H2O+', 'Total')):
+        """
+        Atoms per formula unit on several bases, the molar quantities being computed once
+        :param bases: the bases, each one a number of oxygen or a tuple (number of oxygen, forced number of cations)
+        :return: the atoms and the supplementary data, stacked with the bases as the outer level of the index
+        (MultiIndex DataFrames)
+        """
+        ids, list_oxel, values, props = self._prepare(raw_data, skip_cols, ignored_columns)
+        # 2-5 / Moles of oxides and of oxygen, normalized to one oxygen, shared by all the bases
+        atoms_unit, factor_unit = atoms_oxygen_basis(values, props, 1, oxygen_equiv)
+        return self._normalize(ids, props, atoms_unit, factor_unit, bases, oxygen_equiv, ids.copy(), to_round)
+
     def compute_oxygen_basis(self, raw_data, skip_cols, oxygen_number, **kwargs):
         return self.compute(raw_data, skip_cols, oxygen_number=oxygen_number, **kwargs)
 
-    def compute_cation_basis(self, raw_data, skip_cols,  force_cation_number, oxygen_number=12, **kwargs):
+    def compute_cation_basis(self, raw_data, skip_cols,  force_cation_number, oxygen_number=12, fe3_estimation=False,
+                             **kwargs):
+        """
+        Atoms per formula unit normalized to a number of cations
+        :param force_cation_number: the number of cations per formula unit
+        :param oxygen_number: the number of oxygen per formula unit
+        :param fe3_estimation: if True, the total iron (FeO, Fe2O3, FeOt or Fe2O3t) is split into FeO and Fe2O3 by
+        charge balance (Droop, 1987), the Fe3+/Fe ratios and recalculated FeO and Fe2O3 being reported in suppl
+        """
         return self.compute(raw_data, skip_cols, force_cation_number=force_cation_number, oxygen_number=oxygen_number,
-                            **kwargs)
+                            fe3_estimation=fe3_estimation, **kwargs)
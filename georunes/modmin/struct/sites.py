@@ -0,0 +1,140 @@
+import numpy as np
+
+from georunes.modmin.optim.base import BaseOptimizer
+from georunes.modmin.struct.apfu import APFUCalc
+
+# Leake, B.E. et al., 1997. Nomenclature of amphiboles: report of the subcommittee on amphiboles of the International
+# Mineralogical Association, commission on new minerals and mineral names. The Canadian Mineralogist, 35(1),
+# pp.219-246.
+# Morimoto, N., 1988. Nomenclature of pyroxenes. Mineralogy and Petrology, 39(1), pp.55-76.
+# Rieder, M. et al., 1998. Nomenclature of the micas. The Canadian Mineralogist, 36(3), pp.905-912.
+
+# Site allocation rules of the mineral groups. Each site, with its capacity in atoms per formula unit for the given
+# number of oxygen (and of cations, if forced), is filled in order with the cations of its sequence, from what the
+# previous sites left. The end-members are the proportions of groups of cations, on a site or on all sites (None).
+mineral_groups = {
+    'feldspar': {
+        'oxygen_number': 8,
+        'sites': (
+            ('T', 4, ['Si', 'Al', 'Fe3+']),
+            ('A', 1, ['Na', 'Ca', 'K', 'Ba', 'Sr', 'Rb']),
+        ),
+        'end_members': {'Ab': ('A', ['Na']), 'An': ('A', ['Ca']), 'Or': ('A', ['K']), 'Cn': ('A', ['Ba'])},
+    },
+    'pyroxene': {
+        'oxygen_number': 6,
+        'cation_number': 4,
+        'sites': (
+            ('T', 2, ['Si', 'Al', 'Fe3+']),
+            ('M1', 1, ['Al', 'Fe3+', 'Ti', 'Cr', 'Mn3+', 'Mg', 'Fe2+', 'Mn2+']),
+            ('M2', 1, ['Mg', 'Fe2+', 'Mn2+', 'Li', 'Ca', 'Na']),
+        ),
+        'end_members': {'Wo': (None, ['Ca']), 'En': (None, ['Mg']), 'Fs': (None, ['Fe2+', 'Fe3+', 'Mn2+'])},
+    },
+    'amphibole': {
+        'oxygen_number': 23,
+        'sites': (
+            ('T', 8, ['Si', 'Al', 'Ti']),
+            ('C', 5, ['Al', 'Cr', 'Fe3+', 'Ti', 'Mn3+', 'Mg', 'Fe2+', 'Mn2+']),
+            ('B', 2, ['Mg', 'Fe2+', 'Mn2+', 'Li', 'Ca', 'Na']),
+            ('A', 1, ['Na', 'K']),
+        ),
+        'end_members': {'Tr': ('C', ['Mg']), 'Fact': ('C', ['Fe2+', 'Mn2+'])},
+    },
+    'mica': {
+        'oxygen_number': 11,
+        'sites': (
+            ('T', 4, ['Si', 'Al', 'Fe3+']),
+            ('M', 3, ['Al', 'Ti', 'Fe3+', 'Cr', 'Mn3+', 'Mg', 'Fe2+', 'Mn2+', 'Li']),
+            ('A', 1, ['K', 'Na', 'Ca', 'Ba', 'Rb']),
+        ),
+        'end_members': {'Phl': ('M', ['Mg']), 'Ann': ('M', ['Fe2+', 'Mn2+'])},
+    },
+}
+
+
+def fill_site(available, capacity):
+    """
+    Fill a site with cations in order, for all samples at once
+    :param available: the available atoms of the cations, in filling order (array, samples x cations)
+    :param capacity: the capacity of the site (float or array)
+    :return: the allocated atoms (array, samples x cations)
+    """
+    filled = np.minimum(np.cumsum(available, axis=1), np.reshape(capacity, (-1, 1)))
+    return np.diff(filled, axis=1, prepend=0.)
+
+
+class SiteAllocator(BaseOptimizer):
+    def __init__(self, group, **kwargs):
+        """
+        :param group: the mineral group, one of mineral_groups, or its allocation rules (dict)
+        """
+        BaseOptimizer.__init__(self, **kwargs)
+        if isinstance(group, str):
+            if group not in mineral_groups:
+                raise ValueError("Unknown mineral group '" + group + "', must be one of " + str(list(mineral_groups)))
+            group = mineral_groups[group]
+        self.group = group
+        self.notif = ">>>>>> Site allocation"
+
+    def compute(self, atoms, skip_cols, oxygen_number=None, to_round=3):
+        """
+        Allocate the cations to the sites
+        :param atoms: the atoms per formula unit, with cations labelled as in APFUCalc (DataFrame)
+        :param skip_cols: the number of identification columns
+        :param oxygen_number: the number of oxygen of the atoms, the capacities being scaled from the number of the
+        group (default : the same)
+        :return: the site occupancies and the end-member fractions (DataFrames)
+        """
+        ids = atoms.iloc[:, :skip_cols]
+        scale = 1. if oxygen_number is None else oxygen_number / self.group['oxygen_number']
+        cations = list(dict.fromkeys(el for _, _, sequence in self.group['sites'] for el in sequence))
+        remaining = atoms.reindex(columns=cations).fillna(0).to_numpy(dtype=float)
+        index = {el: i for i, el in enumerate(cations)}
+
+        occupancies = ids.copy()
+        allocated = dict()
+        for site, capacity, sequence in self.group['sites']:
+            if self.verbose > 1: print("Fill site " + site + " with " + ", ".join(sequence))
+            columns = [index[el] for el in sequence]
+            filling = fill_site(remaining[:, columns], capacity * scale)
+            remaining[:, columns] = np.maximum(remaining[:, columns] - filling, 0.)
+            allocated[site] = dict(zip(sequence, filling.T))
+            for el, amount in allocated[site].items():
+                occupancies[site + "_" + el] = amount
+            occupancies[site + "_sum"] = filling.sum(axis=1)
+            occupancies[site + "_vac"] = capacity * scale - filling.sum(axis=1)
+        occupancies["unallocated"] = remaining.sum(axis=1)
+
+        end_members = ids.copy()
+        amounts = dict()
+        for name, (site, group_cations) in self.group['end_members'].items():
+            sites = [site] if site else list(allocated)
+            amounts[name] = sum(allocated[s].get(el, 0.) for s in sites for el in group_cations)
+        total = sum(amounts.values())
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for name, amount in amounts.items():
+                end_members[name] = np.where(total > 0, amount / total, np.nan)
+
+        occupancies = occupancies.round(to_round)
+        end_members = end_members.round(to_round)
+        if self.verbose:
+            print(">>> Site occupancies")
+            print(occupancies.to_string())
+            print(">>> End-members")
+            print(end_members.to_string())
+        return occupancies, end_members
+
+    def compute_from_oxides(self, raw_data, skip_cols, **kwargs):
+        """
+        Compute the atoms per formula unit on the basis of the group, then allocate them to the sites
+        :param kwargs: the parameters of APFUCalc.compute
+        :return: the atoms, the site occupancies and the end-member fractions (DataFrames)
+        """
+        kwargs.setdefault('oxygen_number', self.group['oxygen_number'])
+        if 'cation_number' in self.group:
+            kwargs.setdefault('force_cation_number', self.group['cation_number'])
+        kwargs.setdefault('to_round', 6)
+        atoms, _ = APFUCalc(verbose=0).compute(raw_data, skip_cols, **kwargs)
+        occupancies, end_members = self.compute(atoms, skip_cols, oxygen_number=kwargs['oxygen_number'])
+        return atoms, occupancies, end_members
@@ -1,5 +1,9 @@
+import os
 import warnings
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 import pandas as pd
+from scipy.optimize import lsq_linear
 from georunes.modmin.optim.bvls import BVLS
 from georunes.modmin.optim.gd import GradientDescent
 from georunes.modmin.optim.nnls import NNLS
@@ -10,12 +14,51 @@ from georunes.tools.warnings import FunctionParameterWarning
 
 filemanager = FileManager.get_instance()
 
+golden_ratio = (np.sqrt(5) - 1) / 2
+
+
+def bounded_lsq(matrix, target, upper, start=None):
+    """
+    Solve min ||matrix x - target|| with 0 <= x <= upper, warm-started from a previous solution : its active set is
+    tried first, with a single least squares, and BVLS is used only if the optimality conditions are not met
+    :param matrix: the compositions, oxels x minerals (array)
+    :param target: the composition to fit (array)
+    :param upper: the upper bounds of the proportions, 0 to exclude a mineral (array)
+    :param start: a previous solution, e.g. for a neighbouring composition (array)
+    :return: the proportions (array)
+    """
+    usable = upper > 0
+    solution = np.zeros(len(upper))
+    if not usable.any():
+        return solution
+    matrix, upper = matrix[:, usable], upper[usable]
+    if start is not None:
+        start = start[usable]
+        free = (start > 0) & (start < upper)
+        x = np.where(start >= upper, upper, 0.)
+        fixed = ~free
+        x[free] = np.linalg.lstsq(matrix[:, free], target - matrix[:, fixed] @ x[fixed], rcond=None)[0]
+        gradient = matrix.T @ (matrix @ x - target)
+        tol = 1e-9 * max(1., np.abs(matrix.T @ target).max())
+        if np.all(x[free] >= 0) and np.all(x[free] <= upper[free]) and \
+                np.all(gradient[fixed & (x == 0)] >= -tol) and np.all(gradient[fixed & (x > 0)] <= tol):
+            solution[usable] = x
+            return solution
+    solution[usable] = lsq_linear(matrix, target, (0, upper), method='bvls').x
+    return solution
+
 
 def create_cumulate_finder_from_file(source, sheet_name, *args, **kwargs):
     raw_minerals_data = filemanager.read_file(source, sheet_name)
     return CumulateFinder(raw_minerals_data, *args, **kwargs)
 
 
+def _search_pair(finder, parent, child, kwargs):
+    partitions, supplements, _ = finder.find_cumulate_batch(parent, child, **kwargs)
+    best = supplements['deviation_euclidian'].idxmin()
+    return partitions.loc[best], supplements.loc[best]
+
+
 class CumulateFinder:
     def __init__(self, raw_minerals_data, ignore_oxels=None, optimizer='BVLS', norm='euclidian', nb_results=5, verbose=0):
         self.ignore_oxels = ignore_oxels
@@ -57,6 +100,7 @@ class CumulateFinder:
         self.oxel_list = raw_minerals_data.columns.tolist()
         raw_minerals_data = raw_minerals_data[[*list(self.oxel_list)]]  # Order oxides as in source
         self.minerals_data = raw_minerals_data.transpose()
+        self.minerals_matrix = self.minerals_data.to_numpy(dtype=float)  # Oxels x minerals
         self.list_minerals = self.minerals_data.keys().tolist()
         self.nb_minerals = len(self.list_minerals)
 
@@ -98,3 +142,151 @@ class CumulateFinder:
     def get_cumulate_comp(parent, child, beta):
         x_df = (parent - beta * child) / (1 - beta)
         return x_df
+
+    def upper_bounds(self, cumulate):
+        """
+        Get the maximum proportions of the minerals in cumulates : with BVLS, the lowest ratio of the cumulate to the
+        mineral over the oxels ; with NNLS, no limit, except for the minerals bearing an oxel absent from the cumulate
+        :param cumulate: the compositions of the cumulates (array, cumulates x oxels)
+        :return: the upper bounds (array, cumulates x minerals)
+        """
+        bearing = self.minerals_matrix > 0
+        if self.optimizer == 'BVLS':
+            with np.errstate(divide='ignore', invalid='ignore'):
+                ratios = cumulate[:, :, np.newaxis] / np.where(bearing, self.minerals_matrix, np.nan)
+            return np.nan_to_num(np.nanmin(np.where(bearing, ratios, np.inf), axis=1), posinf=0.)
+        elif self.optimizer == 'NNLS':
+            absent = (cumulate[:, :, np.newaxis] <= 0) & bearing
+            return np.where(absent.any(axis=1), 0., np.inf)
+        raise Exception("The batched search requires the BVLS or NNLS optimizer.")
+
+    def solve_cumulates(self, parent, child, betas):
+        """
+        Solve the cumulates of a series of beta values in one pass, each solution warm-starting the next one
+        :param parent: the parental composition, in the order of oxel_list (array)
+        :param child: the child composition, in the order of oxel_list (array)
+        :param betas: the fractions of child liquid (array, sorted)
+        :return: the mineral proportions (array, betas x minerals) and the deviations (array)
+        """
+        betas = np.asarray(betas, dtype=float)
+        cumulates = (parent - betas[:, np.newaxis] * child) / (1 - betas[:, np.newaxis])
+        upper = self.upper_bounds(cumulates)
+        proportions = np.zeros((len(betas), self.nb_minerals))
+        start = None
+        for i in range(len(betas)):
+            proportions[i] = start = bounded_lsq(self.minerals_matrix, cumulates[i], upper[i], start)
+        deviations = np.linalg.norm(proportions @ self.minerals_matrix.T - cumulates, axis=1)
+        return proportions, deviations
+
+    def find_cumulate_batch(self, parent_comp, child_comp, nb_betas=None, refine=True, tol=1e-4):
+        """
+        Search the cumulate to remove from a parental liquid to get a child liquid : all the beta values of a grid are
+        solved in one pass, then beta is refined by golden-section search around the lowest deviation
+        :param parent_comp: the parental composition (dict or Series)
+        :param child_comp: the child composition (dict or Series)
+        :param nb_betas: the number of beta values of the grid (default : nb_results)
+        :param refine: if True, the optimal beta is refined and inserted in the results
+        :param tol: the tolerance on the refined beta
+        :return: the proportions of the cumulates in %, the supplements (beta, alpha, deviation, refined), and the
+        beta values (DataFrames and list), by decreasing beta as find_cumulate_to_remove
+        """
+        parent = np.array([parent_comp[oxel] for oxel in self.oxel_list], dtype=float)
+        child = np.array([child_comp[oxel] for oxel in self.oxel_list], dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            max_beta = min(np.nanmin(np.where(child > 0, parent / child, np.inf)), 1 - tol)
+        nb_betas = nb_betas if nb_betas else self.nb_results
+        betas = np.array(linspace_to_end(round_floor_n_digits(max_beta, 3), nb_betas))
+        proportions, deviations = self.solve_cumulates(parent, child, betas)
+        refined = np.zeros(len(betas), dtype=bool)
+
+        if refine and len(betas) > 1:
+            best = int(np.argmin(deviations))
+            low, high = betas[max(best - 1, 0)], betas[min(best + 1, len(betas) - 1)]
+            start = proportions[best]
+
+            def deviation(beta):
+                cumulate = ((parent - beta * child) / (1 - beta))[np.newaxis]
+                props = bounded_lsq(self.minerals_matrix, cumulate[0], self.upper_bounds(cumulate)[0], start)
+                return props, np.linalg.norm(self.minerals_matrix @ props - cumulate[0])
+
+            # Golden-section search on the interval around the grid minimum
+            x1, x2 = high - golden_ratio * (high - low), low + golden_ratio * (high - low)
+            (p1, d1), (p2, d2) = deviation(x1), deviation(x2)
+            while high - low > tol:
+                if d1 < d2:
+                    high, x2, p2, d2 = x2, x1, p1, d1
+                    x1 = high - golden_ratio * (high - low)
+                    p1, d1 = deviation(x1)
+                else:
+                    low, x1, p1, d1 = x1, x2, p2, d2
+                    x2 = low + golden_ratio * (high - low)
+                    p2, d2 = deviation(x2)
+            beta, props, dev = (x1, p1, d1) if d1 < d2 else (x2, p2, d2)
+            if dev < deviations[best]:
+                position = np.searchsorted(betas, beta)
+                betas = np.insert(betas, position, beta)
+                proportions = np.insert(proportions, position, props, axis=0)
+                deviations = np.insert(deviations, position, dev)
+                refined = np.insert(refined, position, True)
+
+        order = np.argsort(-betas, kind='stable')
+        partitions = pd.DataFrame(100 * proportions[order], columns=self.list_minerals)
+        partitions['Total'] = partitions.sum(axis=1)
+        supplements = pd.DataFrame({'beta': betas[order], 'alpha': 1 - betas[order],
+                                    'deviation_euclidian': deviations[order], 'refined': refined[order]})
+        return partitions, supplements, betas[order].tolist()
+
+    def screen_pairs(self, values, min_beta=0.1, ordering=None):
+        """
+        Screen all the parent -> daughter pairs of a suite at once : the fraction of daughter liquid (beta) must be
+        allowed up to min_beta, and the oxels must evolve in the expected direction
+        :param values: the compositions, in the order of oxel_list (array, samples x oxels)
+        :param min_beta: the minimum upper limit of beta
+        :param ordering: the expected signs of the changes from parent to daughter, by oxel (dict, default : MgO
+        decreasing and SiO2 increasing)
+        :return: the plausible pairs (boolean array, parents x daughters)
+        """
+        ordering = ordering if ordering is not None else {'MgO': -1, 'SiO2': 1}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios = values[:, np.newaxis, :] / np.where(values > 0, values, np.nan)[np.newaxis, :, :]
+        max_beta = np.nanmin(np.where(np.isnan(ratios), np.inf, ratios), axis=2)
+        plausible = (max_beta >= min_beta) & ~np.eye(len(values), dtype=bool)
+        for oxel, sign in ordering.items():
+            if oxel in self.oxel_list:
+                column = values[:, self.oxel_list.index(oxel)]
+                plausible &= sign * (column[np.newaxis, :] - column[:, np.newaxis]) > 0
+        return plausible
+
+    def search_suite(self, data, skip_cols, min_beta=0.1, ordering=None, max_deviation=None, workers=None,
+                     **kwargs):
+        """
+        Search the cumulate removal relationships between all the pairs of samples of a suite
+        :param data: the compositions, with the identification columns first (DataFrame)
+        :param skip_cols: the number of identification columns, the first one labelling the samples
+        :param min_beta: the minimum upper limit of the fraction of daughter liquid, see screen_pairs
+        :param ordering: the expected signs of the changes from parent to daughter, see screen_pairs
+        :param max_deviation: the maximum deviation of the pairs kept
+        :param workers: the number of processes (default : the number of CPUs), 1 to search in the current process
+        :param kwargs: the parameters of find_cumulate_batch
+        :return: the pairs with their beta, deviation and cumulate proportions, by increasing deviation (DataFrame)
+        """
+        labels = data.iloc[:, 0].tolist() if skip_cols else data.index.tolist()
+        values = data.reindex(columns=self.oxel_list).fillna(0).to_numpy(dtype=float)
+        parents, daughters = np.nonzero(self.screen_pairs(values, min_beta, ordering))
+        tasks = [(self, pd.Series(values[i], index=self.oxel_list), pd.Series(values[j], index=self.oxel_list),
+                  kwargs) for i, j in zip(parents, daughters)]
+
+        workers = workers if workers else os.cpu_count()
+        if workers == 1 or len(tasks) < 2:
+            results = [_search_pair(*task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_search_pair, *zip(*tasks), chunksize=max(1, len(tasks) // (4 * workers))))
+
+        columns = ['parent', 'daughter', 'beta', 'alpha', 'deviation_euclidian', *self.list_minerals, 'Total']
+        pairs = pd.DataFrame([[labels[i], labels[j], suppl['beta'], suppl['alpha'], suppl['deviation_euclidian'],
+                               *partition.tolist()] for i, j, (partition, suppl) in zip(parents, daughters, results)],
+                             columns=columns)
+        if max_deviation is not None:
+            pairs = pairs[pairs['deviation_euclidian'] <= max_deviation]
+        return pairs.sort_values('deviation_euclidian', kind='stable').reset_index(drop=True)
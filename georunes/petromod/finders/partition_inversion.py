@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+from scipy.optimize import least_squares
+from georunes.petromod.modelers.batch import BatchModeler
+from georunes.petromod.modelers.partition import proportions_matrix
+from georunes.petromod.modelers.rayleigh import RayleighCrystallization, RayleighMelting
+
+
+# Logarithms of the ratios : liquid / initial concentration, with their derivatives with respect to F and D
+def batch_log_ratio(f, d):
+    denominator = d * (1 - f) + f
+    return -np.log(denominator), -(1 - d) / denominator, -(1 - f) / denominator
+
+
+def rayleigh_crystallization_log_ratio(f, d):
+    return (d - 1) * np.log(f), (d - 1) / f, np.log(f)
+
+
+def rayleigh_melting_log_ratio(f, d):
+    log_residue = np.log(1 - f)
+    return -np.log(d) + (1 / d - 1) * log_residue, -(1 / d - 1) / (1 - f), -1 / d - log_residue / d ** 2
+
+
+def rayleigh_melting_avg_log_ratio(f, d):
+    residue = (1 - f) ** (1 / d)
+    return (np.log(1 - residue) - np.log(f), residue / (d * (1 - f) * (1 - residue)) - 1 / f,
+            residue * np.log(1 - f) / (d ** 2 * (1 - residue)))
+
+
+log_ratio_kernels = (
+    (BatchModeler, 'LIQ', batch_log_ratio),
+    (RayleighCrystallization, 'LIQ', rayleigh_crystallization_log_ratio),
+    (RayleighMelting, 'LIQ_INST', rayleigh_melting_log_ratio),
+    (RayleighMelting, 'LIQ_TOT', rayleigh_melting_avg_log_ratio),
+)
+
+
+def get_log_ratio_kernel(model_class, phase):
+    for cls, kernel_phase, kernel in log_ratio_kernels:
+        if issubclass(model_class, cls) and phase == kernel_phase:
+            return kernel
+    raise Exception("No analytic kernel for the phase " + str(phase) + " of " + model_class.__name__)
+
+
+class PartitionInversion:
+    def __init__(self, model_class, part_coeffs, initial_c0, modal_proportions, phase='LIQ', fit_modes=False,
+                 fit_scale=False, modes_weight=10., liq_fract_bounds=(0.001, 0.999), scale_bounds=(0.01, 100.)):
+        """
+        Fit the liquid fraction, and optionally a scaling of the initial concentrations and the modal proportions
+        behind the bulk partition coefficients, to measured trace elements. The residuals are the differences of the
+        logarithms of the modelled and measured concentrations.
+        :param model_class: the modeler, BatchModeler, RayleighCrystallization or RayleighMelting (or subclasses)
+        :param part_coeffs: the partition coefficients, elements x minerals (DataFrame)
+        :param initial_c0: the initial concentrations (Series or dict)
+        :param modal_proportions: the modal proportions in %, fixed or initial guess if fit_modes (dict or Series)
+        :param phase: the modelled phase, as in the get_phase_concentration_func of the model
+        :param fit_modes: if True, the modal proportions are fitted, their sum being constrained to 100 %
+        :param fit_scale: if True, a factor applied to all the initial concentrations is fitted
+        :param modes_weight: the weight of the constraint on the sum of the modal proportions
+        """
+        self.model_class = model_class
+        self.phase = phase
+        self.kernel = get_log_ratio_kernel(model_class, phase)
+        self.part_coeffs = part_coeffs
+        self.initial_c0 = pd.Series(initial_c0, dtype=float)
+        self.list_minerals = part_coeffs.columns.tolist()
+        modes = proportions_matrix(modal_proportions, part_coeffs)[0]
+        self.modes = modes / modes.sum()
+        self.fit_modes = fit_modes
+        self.fit_scale = fit_scale
+        self.modes_weight = modes_weight
+        self.liq_fract_bounds = liq_fract_bounds
+        self.scale_bounds = scale_bounds
+
+    def _unpack(self, params):
+        f = params[0]
+        scale = params[1] if self.fit_scale else 1.
+        modes = params[1 + self.fit_scale:] if self.fit_modes else self.modes
+        return f, scale, modes
+
+    def _residuals_jacobian(self, params, log_c0, coeffs, log_obs):
+        f, scale, modes = self._unpack(params)
+        d = coeffs @ modes
+        log_ratio, d_f, d_d = self.kernel(f, d)
+        residuals = np.log(scale) + log_c0 + log_ratio - log_obs
+        columns = [d_f]
+        if self.fit_scale:
+            columns.append(np.full(len(d), 1 / scale))
+        jacobian = np.column_stack(columns)
+        if self.fit_modes:
+            jacobian = np.hstack([jacobian, d_d[:, np.newaxis] * coeffs])
+            # Constraint on the sum of the modal proportions, as an additional residual
+            residuals = np.append(residuals, self.modes_weight * (modes.sum() - 1))
+            constraint = np.zeros(jacobian.shape[1])
+            constraint[1 + self.fit_scale:] = self.modes_weight
+            jacobian = np.vstack([jacobian, constraint])
+        return residuals, jacobian
+
+    def fit(self, sample_conc, liq_fract=0.1):
+        """
+        Fit the parameters to the concentrations of a sample
+        :param sample_conc: the measured concentrations (Series or dict), the missing or non-positive values being
+        ignored
+        :param liq_fract: the initial guess of the liquid fraction
+        :return: the fitted parameters and the statistics of the fit (dict)
+        """
+        sample_conc = pd.Series(sample_conc, dtype=float)
+        elements = [el for el in self.part_coeffs.index if el in sample_conc.index and el in self.initial_c0.index]
+        obs = sample_conc[elements].to_numpy()
+        c0 = self.initial_c0[elements].to_numpy()
+        coeffs = self.part_coeffs.loc[elements].to_numpy(dtype=float)
+        used = (obs > 0) & (c0 > 0) & np.isfinite(coeffs).all(axis=1) if self.fit_modes \
+            else (obs > 0) & (c0 > 0) & np.isfinite(np.nan_to_num(coeffs) @ self.modes)
+        coeffs = np.nan_to_num(coeffs[used])
+        log_obs, log_c0 = np.log(obs[used]), np.log(c0[used])
+
+        start = [liq_fract]
+        lower, upper = [self.liq_fract_bounds[0]], [self.liq_fract_bounds[1]]
+        if self.fit_scale:
+            start.append(1.)
+            lower.append(self.scale_bounds[0])
+            upper.append(self.scale_bounds[1])
+        if self.fit_modes:
+            start.extend(self.modes)
+            lower.extend([0] * len(self.modes))
+            upper.extend([1] * len(self.modes))
+        start = np.clip(start, lower, upper)
+
+        cache = dict()
+
+        def evaluate(params):
+            key = params.tobytes()
+            if key not in cache:
+                cache.clear()
+                cache[key] = self._residuals_jacobian(params, log_c0, coeffs, log_obs)
+            return cache[key]
+
+        result = least_squares(lambda p: evaluate(p)[0], start, jac=lambda p: evaluate(p)[1], bounds=(lower, upper))
+        f, scale, modes = self._unpack(result.x)
+
+        # Standard errors from the Jacobian, the sum of the modes being a constraint
+        nb_elements = int(used.sum())
+        log_residuals = result.fun[:nb_elements]
+        dof = nb_elements - len(result.x) + self.fit_modes
+        errors = np.full(len(result.x), np.nan)
+        if dof > 0:
+            jacobian = result.jac
+            covariance = np.linalg.pinv(jacobian.T @ jacobian) * (log_residuals ** 2).sum() / dof
+            errors = np.sqrt(np.abs(np.diag(covariance)))
+
+        fitted = {'F': f, 'F_err': errors[0]}
+        if self.fit_scale:
+            fitted.update({'scale': scale, 'scale_err': errors[1]})
+        fitted.update({mineral: 100 * prop for mineral, prop in zip(self.list_minerals, modes)})
+        fitted.update({'nb_elements': nb_elements, 'rms_log': np.sqrt(np.mean(log_residuals ** 2)),
+                       'cost': result.cost, 'nfev': result.nfev, 'success': result.success})
+        return fitted
+
+    def predict(self, fitted, list_elements=None):
+        """
+        Calculate the concentrations of the modelled phase for fitted parameters
+        :param fitted: the fitted parameters, as returned by fit (dict or Series)
+        :return: the concentrations (Series)
+        """
+        modes = pd.Series({mineral: fitted[mineral] for mineral in self.list_minerals})
+        bulk_coeffs = pd.Series(np.nan_to_num(self.part_coeffs.to_numpy(dtype=float)) @ (modes.to_numpy() / 100),
+                                index=self.part_coeffs.index, name='D')
+        model = self.model_class(bulk_coeffs)
+        if list_elements is None:
+            list_elements = [el for el in bulk_coeffs.index if el in self.initial_c0.index]
+        initial_c0 = self.initial_c0 * fitted.get('scale', 1.)
+        return pd.Series(model.concentration_array(self.phase, fitted['F'], initial_c0, list_elements)[0],
+                         index=list_elements)
+
+    def fit_samples(self, data, skip_cols, liq_fract=0.1):
+        """
+        Fit the parameters to each sample of a table
+        :param data: the samples, with the identification columns first and the elements as columns (DataFrame)
+        :param skip_cols: the number of identification columns
+        :return: the fitted parameters and statistics, and the modelled concentrations (DataFrames)
+        """
+        ids = data.iloc[:, :skip_cols].reset_index(drop=True)
+        values = data.iloc[:, skip_cols:].reset_index(drop=True)
+        fits = pd.DataFrame([self.fit(values.iloc[i], liq_fract) for i in range(len(values))])
+        predicted = pd.DataFrame([self.predict(fits.iloc[i]) for i in range(len(fits))])
+        return pd.concat([ids, fits], axis=1), pd.concat([ids, predicted], axis=1)
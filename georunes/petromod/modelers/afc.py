@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from georunes.petromod.modelers.partition import PartitionModeler
+
+# DePaolo, D.J., 1981. Trace element and isotopic effects of combined wallrock assimilation and fractional
+# crystallization. Earth and Planetary Science Letters, 53(2), pp.189-202.
+
+
+class AFCModeler(PartitionModeler):
+    def __init__(self, bulk_dist_coeffs, assimilant_conc, r=0.3):
+        """
+        The liquid concentrations are C0.F^-z + r / (r - 1) . Ca / z . (1 - F^-z), with z = (r + D - 1) / (r - 1): the
+        ratios of the kernels only apply to the initial concentrations, the assimilated wallrock adding a term
+        independent of them
+        :param assimilant_conc: the concentrations of the assimilated wallrock (Series or dict)
+        :param r: the ratio of the assimilation rate to the crystallization rate (different from 1)
+        """
+        PartitionModeler.__init__(self, bulk_dist_coeffs)
+        self.assimilant_conc = pd.Series(assimilant_conc, dtype=float)
+        self._r = r
+        self.phases_labels = {"LIQ": "Contaminated liquid",
+                              "SOL": "Instantaneous cumulate", }
+        self.modeler_name = "Assimilation-fractional crystallization"
+        self.init_name = "Initial liquid composition (F=1)"
+        self.f_reverse = True
+
+    @property
+    def r(self):
+        return self._r
+
+    @r.setter
+    def r(self, r):
+        self._r = r
+        self.invalidate_ratios()
+
+    @property
+    def assimilant_conc(self):
+        return self._assimilant_conc
+
+    @assimilant_conc.setter
+    def assimilant_conc(self, assimilant_conc):
+        self._assimilant_conc = pd.Series(assimilant_conc, dtype=float)
+        self.invalidate_ratios()
+
+    def assimilant_array(self):
+        """
+        Get the concentrations of the assimilant, in the order of list_elements (NaN if missing)
+        """
+        return self.assimilant_conc.reindex(self.elements_index()).to_numpy(dtype=float)
+
+    @staticmethod
+    def _liq_fract(liq_fract):
+        f = PartitionModeler.liq_fract_array(liq_fract)
+        return np.where(f == 0, 0.01, f)
+
+    def _afc_terms(self, f, r):
+        d = self.dist_coeffs_array()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z = (r + d - 1) / (r - 1)
+            f_z = f ** -z
+            # (1 - F^-z) / z tends to ln(F) when z tends to 0 (r + D = 1)
+            assimilation = np.where(np.abs(z) < 1e-12, np.log(f), (1 - f_z) / np.where(z == 0, 1, z))
+            assimilation = r / (r - 1) * self.assimilant_array() * assimilation
+        return np.where(r == 1, np.nan, f_z), np.where(r == 1, np.nan, assimilation)
+
+    def ratio_liq_array(self, liq_fract):
+        """
+        Calculate the ratios applied to the initial concentrations in the liquid : F^-z, without the assimilant term
+        :return: the ratios (array, F x elements), NaN for r=1
+        """
+        return self._afc_terms(self._liq_fract(liq_fract), float(self.r))[0]
+
+    def assimilation_liq_array(self, liq_fract):
+        """
+        Calculate the concentrations brought to the liquid by the assimilant : r / (r - 1) . Ca / z . (1 - F^-z)
+        :return: the concentrations (array, F x elements), NaN for r=1
+        """
+        return self._afc_terms(self._liq_fract(liq_fract), float(self.r))[1]
+
+    def assimilation_sol_array(self, liq_fract):
+        """
+        Calculate the concentrations brought to the instantaneous cumulate by the assimilant
+        :return: the concentrations (array, F x elements)
+        """
+        return self.assimilation_liq_array(liq_fract) * self.dist_coeffs_array()
+
+    def get_phase_assimilation_func(self, phase):
+        if phase == 'LIQ':
+            return self.assimilation_liq_array
+        elif phase == 'SOL':
+            return self.assimilation_sol_array
+        return None
+
+    def concentration_liq_el(self, el, liq_fract, initial_c0):
+        return (PartitionModeler.concentration_liq_el(self, el, liq_fract, initial_c0)
+                + self.cached_ratios(self.assimilation_liq_array, liq_fract)[el])
+
+    def concentration_sol_el(self, el, liq_fract, initial_c0):
+        return (PartitionModeler.concentration_sol_el(self, el, liq_fract, initial_c0)
+                + self.cached_ratios(self.assimilation_sol_array, liq_fract)[el])
+
+    def concentration_array(self, phase, liq_fract, initial_c0, list_elements=None):
+        concentrations = PartitionModeler.concentration_array(self, phase, liq_fract, initial_c0, list_elements)
+        assimilation = self.get_phase_assimilation_func(phase)(liq_fract)
+        if list_elements is not None:
+            assimilation = assimilation[..., self.elements_index().get_indexer(list_elements)]
+        return concentrations + assimilation
+
+    def concentration_liq_grid(self, liq_fract, r, initial_c0):
+        """
+        Calculate the liquid concentrations for several liquid fractions and values of r
+        :param liq_fract: the liquid fractions (float or array)
+        :param r: the ratios of the assimilation rate to the crystallization rate (float or array)
+        :param initial_c0: the initial concentrations (Series or dict)
+        :return: the concentrations (array, r x F x elements), NaN for r=1
+        """
+        r = np.atleast_1d(np.asarray(r, dtype=float)).reshape(-1, 1, 1)
+        f_z, assimilation = self._afc_terms(self._liq_fract(liq_fract), r)
+        return f_z * np.array([initial_c0[el] for el in self.list_elements()], dtype=float) + assimilation
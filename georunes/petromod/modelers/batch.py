@@ -8,18 +8,12 @@ class BatchModeler(PartitionModeler):
                              "SOL": "Total solid"}
         self.modeler_name = "Batch modeler"
 
-    def ratio_liq(self, liq_fract):
+    def ratio_liq_array(self, liq_fract):
         """
-        Calculate the ratio : liquid / initial concentration
+        Calculate the ratios : liquid / initial concentration
         """
-        ratio_liq = 1 / (self.bulk_dist_coeffs * (1 - liq_fract) + liq_fract)
-        return ratio_liq
-
-    def ratio_sol(self, liq_fract):
-        """
-        Calculate the ratio : solid / initial concentration
-        """
-        return self.ratio_liq(liq_fract) * self.bulk_dist_coeffs
+        f = self.liq_fract_array(liq_fract)
+        return 1 / (self.dist_coeffs_array() * (1 - f) + f)
 
 
 class BatchMelting(BatchModeler):
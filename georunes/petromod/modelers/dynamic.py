@@ -0,0 +1,78 @@
+import numpy as np
+from georunes.petromod.modelers.partition import PartitionModeler
+
+# Shaw, D.M., 2000. Continuous (dynamic) melting theory revisited. The Canadian Mineralogist, 38(5), pp.1041-1063.
+# Zou, H., 1998. Trace element fractionation during modal and nonmodal dynamic melting and open-system melting: a
+# mathematical treatment. Geochimica et Cosmochimica Acta, 62(11), pp.1937-1945.
+
+
+class ContinuousMelting(PartitionModeler):
+    def __init__(self, bulk_dist_coeffs, porosity=0.01):
+        """
+        :param porosity: the critical mass porosity, i.e. the fraction of melt retained in the residue
+        """
+        PartitionModeler.__init__(self, bulk_dist_coeffs)
+        self._porosity = porosity
+        self.phases_labels = {"LIQ_INST": "Instantaneous liquid",
+                              "LIQ_TOT": "Accumulated liquid",
+                              "SOL": "Solid residue", }
+        self.modeler_name = "Continuous (dynamic) melting"
+        self.init_name = "Initial solid composition (F=0)"
+
+    @property
+    def porosity(self):
+        return self._porosity
+
+    @porosity.setter
+    def porosity(self, porosity):
+        self._porosity = porosity
+        self.invalidate_ratios()
+
+    def _melting_terms(self, liq_fract):
+        """
+        Calculate the fraction of extracted melt X = (F - porosity) / (1 - porosity), 0 until the critical porosity,
+        and the effective partition coefficients : porosity + (1 - porosity) D
+        """
+        f = self.liq_fract_array(liq_fract)
+        f = np.where(f == 1, 0.99, f)
+        extracted = np.maximum(f - self.porosity, 0) / (1 - self.porosity)
+        effective = self.porosity + (1 - self.porosity) * self.dist_coeffs_array()
+        return f, extracted, effective
+
+    def ratio_liq_array(self, liq_fract):
+        f, extracted, effective = self._melting_terms(liq_fract)
+        batch = 1 / (self.dist_coeffs_array() * (1 - f) + f)
+        dynamic = (1 / effective) * (1 - extracted) ** (1 / effective - 1)
+        # Until the critical porosity, the melt is retained in the residue, as in batch melting
+        return np.where(extracted > 0, dynamic, batch)
+
+    def ratio_liq_avg_array(self, liq_fract):
+        """
+        Calculate the ratios : accumulated liquid / initial concentration, for one or several liquid fractions
+        """
+        f, extracted, effective = self._melting_terms(liq_fract)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dynamic = (1 - (1 - extracted) ** (1 / effective)) / extracted
+        return np.where(extracted > 0, dynamic, self.ratio_liq_array(f))
+
+    def concentration_liq_avg_el(self, el, liq_fract, initial_conc):
+        c_liq_el = initial_conc[el] * self.cached_ratios(self.ratio_liq_avg_array, liq_fract)[el]
+        return c_liq_el
+
+    def get_phase_concentration_func(self, phase):
+        if phase == 'LIQ_INST':
+            return self.concentration_liq_el
+        elif phase == 'SOL':
+            return self.concentration_sol_el
+        elif phase == 'LIQ_TOT':
+            return self.concentration_liq_avg_el
+        raise Exception("Inapplicable phase : " + str(phase))
+
+    def get_phase_ratio_func(self, phase):
+        if phase == 'LIQ_INST':
+            return self.ratio_liq_array
+        elif phase == 'SOL':
+            return self.ratio_sol_array
+        elif phase == 'LIQ_TOT':
+            return self.ratio_liq_avg_array
+        raise Exception("Inapplicable phase : " + str(phase))
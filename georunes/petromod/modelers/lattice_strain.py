@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+
+# Blundy, J. and Wood, B., 1994. Prediction of crystal-melt partition coefficients from elastic moduli. Nature,
+# 372(6505), pp.452-454.
+# Shannon, R.D., 1976. Revised effective ionic radii and systematic studies of interatomic distances in halides and
+# chalcogenides. Acta Crystallographica Section A, 32(5), pp.751-767.
+
+avogadro = 6.02214076e23
+gas_constant = 8.314462618
+
+# Effective ionic radii (Angstrom) in eightfold coordination
+shannon_radii_viii = {
+    # Trivalent
+    'La': 1.160, 'Ce': 1.143, 'Pr': 1.126, 'Nd': 1.109, 'Sm': 1.079, 'Eu': 1.066, 'Gd': 1.053, 'Tb': 1.040,
+    'Dy': 1.027, 'Ho': 1.015, 'Er': 1.004, 'Tm': 0.994, 'Yb': 0.985, 'Lu': 0.977, 'Y': 1.019, 'Sc': 0.870,
+    # Divalent
+    'Ca': 1.12, 'Sr': 1.26, 'Ba': 1.42, 'Pb': 1.29, 'Eu2+': 1.25, 'Mg': 0.89, 'Fe2+': 0.92, 'Mn2+': 0.96,
+    # Monovalent
+    'Na': 1.18, 'K': 1.51, 'Rb': 1.61, 'Cs': 1.74,
+    # Tetravalent
+    'Th': 1.05, 'U': 1.00, 'Zr': 0.84, 'Hf': 0.83,
+}
+
+
+def lattice_strain(radii, d0, r0, young_modulus, temperature):
+    """
+    Calculate partition coefficients with the lattice strain model, all the parameters being broadcast together
+    :param radii: the ionic radii (Angstrom)
+    :param d0: the partition coefficients of the ideal cation, of radius r0
+    :param r0: the radii of the ideal cation (Angstrom)
+    :param young_modulus: the Young's moduli of the site (GPa)
+    :param temperature: the temperatures (K)
+    :return: the partition coefficients (array)
+    """
+    radii, r0 = np.asarray(radii, dtype=float) * 1e-10, np.asarray(r0, dtype=float) * 1e-10
+    strain = r0 / 2 * (radii - r0) ** 2 + (radii - r0) ** 3 / 3
+    return d0 * np.exp(-4 * np.pi * np.asarray(young_modulus) * 1e9 * avogadro * strain
+                       / (gas_constant * np.asarray(temperature, dtype=float)))
+
+
+class LatticeStrainSite:
+    def __init__(self, d0, r0, young_modulus, radii):
+        """
+        A crystallographic site, for cations of the same charge
+        :param d0: the partition coefficient of the ideal cation, constant or function of temperature (K) and
+        pressure (GPa) arrays
+        :param r0: the radius of the ideal cation (Angstrom), constant or function of temperature and pressure
+        :param young_modulus: the Young's modulus of the site (GPa), constant or function of temperature and pressure
+        :param radii: the radii of the elements (dict), or the elements, with radii from shannon_radii_viii (list)
+        """
+        self.d0 = d0
+        self.r0 = r0
+        self.young_modulus = young_modulus
+        if not isinstance(radii, dict):
+            radii = {el: shannon_radii_viii[el] for el in radii}
+        self.radii = radii
+
+    @staticmethod
+    def _evaluate(param, temperature, pressure):
+        value = param(temperature, pressure) if callable(param) else param
+        return np.broadcast_to(np.asarray(value, dtype=float), temperature.shape)
+
+    def cache_key(self):
+        """
+        Identify the current parameters of the site, the functions by identity
+        :return: the parameters (tuple, hashable)
+        """
+        params = tuple(param if callable(param) else np.asarray(param, dtype=float).tobytes()
+                       for param in (self.d0, self.r0, self.young_modulus))
+        return params + tuple(self.radii.items())
+
+    def coeffs_array(self, temperature, pressure):
+        """
+        Calculate the partition coefficients of the elements of the site
+        :param temperature: the temperatures (array, K)
+        :param pressure: the pressures (array, GPa)
+        :return: the partition coefficients (array, points x elements of the site)
+        """
+        params = [self._evaluate(param, temperature, pressure)[:, np.newaxis]
+                  for param in (self.d0, self.r0, self.young_modulus)]
+        return lattice_strain(list(self.radii.values()), *params, temperature[:, np.newaxis])
+
+
+class LatticeStrainModel:
+    cache_size = 256  # Maximum number of Kd arrays kept, the cache being emptied beyond
+
+    def __init__(self, minerals_sites):
+        """
+        :param minerals_sites: the sites of each mineral (dict, mineral -> list of LatticeStrainSite)
+        """
+        self.minerals_sites = minerals_sites
+        self.list_minerals = list(minerals_sites.keys())
+        self.list_elements = list(dict.fromkeys(el for sites in minerals_sites.values()
+                                                for site in sites for el in site.radii))
+        self._cache = dict()
+
+    def clear_cache(self):
+        self._cache = dict()
+
+    def coeffs_array(self, temperature, pressure=0.):
+        """
+        Calculate the partition coefficients of all the elements and minerals along a path of temperatures and
+        pressures. The elements without site in a mineral get NaN, counted as 0 in the bulk coefficients.
+        :param temperature: the temperatures (float or array, K)
+        :param pressure: the pressures (float or array, GPa)
+        :return: the partition coefficients (array, points x elements x minerals)
+        """
+        temperature, pressure = np.broadcast_arrays(np.atleast_1d(np.asarray(temperature, dtype=float)),
+                                                    np.atleast_1d(np.asarray(pressure, dtype=float)))
+        # The sites parameters are part of the key, so that changing them does not return outdated coefficients
+        sites_key = tuple(site.cache_key() for sites in self.minerals_sites.values() for site in sites)
+        key = (temperature.tobytes(), pressure.tobytes(), sites_key)
+        coeffs = self._cache.get(key)
+        if coeffs is None:
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+            index = {el: i for i, el in enumerate(self.list_elements)}
+            coeffs = np.full((len(temperature), len(self.list_elements), len(self.list_minerals)), np.nan)
+            for m, sites in enumerate(self.minerals_sites.values()):
+                for site in sites:
+                    coeffs[:, [index[el] for el in site.radii], m] = site.coeffs_array(temperature, pressure)
+            coeffs.flags.writeable = False
+            self._cache[key] = coeffs
+        return coeffs
+
+    def coeffs(self, temperature, pressure=0.):
+        """
+        Calculate the partition coefficients at a temperature and a pressure
+        :return: the partition coefficients, elements x minerals (DataFrame), as used by compute_bulk_coeffs
+        """
+        return pd.DataFrame(self.coeffs_array(temperature, pressure)[0], index=self.list_elements,
+                            columns=self.list_minerals)
+
+    def bulk_coeffs_array(self, modal_proportions, temperature, pressure=0.):
+        """
+        Calculate the bulk partition coefficients along a path of temperatures and pressures
+        :param modal_proportions: the modal proportions in % (dict), or along the path (DataFrame, points x minerals)
+        :return: the bulk partition coefficients (array, points x elements)
+        """
+        modes = pd.DataFrame([modal_proportions]) if isinstance(modal_proportions, dict) else modal_proportions
+        modes = modes.reindex(columns=self.list_minerals).fillna(0).to_numpy(dtype=float) / 100
+        return (np.nan_to_num(self.coeffs_array(temperature, pressure)) @ modes[:, :, np.newaxis])[..., 0]
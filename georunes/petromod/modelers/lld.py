@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+from georunes.petromod.modelers.mass_balance import MassBalanceModalModeler
+from georunes.petromod.modelers.partition import compute_bulk_coeffs
+from georunes.petromod.modelers.rayleigh import RayleighCrystallization
+
+
+class Stage:
+    def __init__(self, assemblage, mass_removed=None, liq_fract=None, part_coeffs=None, nb_steps=10, name=None):
+        """
+        A stage of crystallization of a constant assemblage
+        :param assemblage: the modal proportions of the cumulate in % (dict)
+        :param mass_removed: the fraction of the liquid at the start of the stage removed as cumulate
+        :param liq_fract: the fraction of the initial liquid of the sequence left at the end of the stage, if
+        mass_removed is not given
+        :param part_coeffs: the partition coefficients of the stage, elements x minerals (DataFrame, default : those
+        of the previous stage)
+        :param nb_steps: the number of points of the stage in the paths
+        """
+        if (mass_removed is None) == (liq_fract is None):
+            raise Exception("Either the mass removed or the final liquid fraction of the stage must be given.")
+        self.assemblage = assemblage
+        self.mass_removed = mass_removed
+        self.liq_fract = liq_fract
+        self.part_coeffs = part_coeffs
+        self.nb_steps = nb_steps
+        self.name = name
+
+    def local_fractions(self, liq_fract_start):
+        """
+        Get the fractions of the liquid at the start of the stage left at each step
+        :param liq_fract_start: the fraction of the initial liquid at the start of the stage
+        :return: the fractions (array)
+        """
+        end = 1 - self.mass_removed if self.mass_removed is not None else self.liq_fract / liq_fract_start
+        if not 0 < end <= 1:
+            raise Exception("Invalid extent of the stage " + str(self.name) + " : " + str(end) + " of the liquid left.")
+        return np.linspace(1, end, self.nb_steps + 1)[1:]
+
+
+class LLDSimulator:
+    def __init__(self, minerals_data, parent_majors, parent_traces, part_coeffs=None):
+        """
+        Simulate a liquid line of descent by stages, the major elements by mass balance with the cumulate and the trace
+        elements by Rayleigh fractionation
+        :param minerals_data: the compositions of the minerals, as for MassBalanceModalModeler (DataFrame)
+        :param parent_majors: the major element concentrations of the parental liquid (Series)
+        :param parent_traces: the trace element concentrations of the parental liquid (Series)
+        :param part_coeffs: the default partition coefficients, elements x minerals (DataFrame)
+        """
+        self.mass_balance = MassBalanceModalModeler(minerals_data)
+        self.oxel_list = self.mass_balance.oxel_list
+        self.parent_majors = self.mass_balance.oxels_vector(parent_majors)
+        self.list_elements = pd.Series(parent_traces).index.tolist()
+        self.parent_traces = pd.Series(parent_traces, dtype=float).to_numpy()
+        self.part_coeffs = part_coeffs
+        self.reset()
+
+    def reset(self):
+        """
+        Restart the sequence from the parental liquid
+        """
+        self.liq_fract = 1.
+        self.majors = self.parent_majors.copy()
+        self.traces = self.parent_traces.copy()
+        self.stages = []
+        self._paths = [("Parent", np.array([1.]), self.majors[np.newaxis], self.traces[np.newaxis])]
+
+    def add_stage(self, stage):
+        """
+        Compute a stage from the current state of the liquid, the previous stages being kept
+        :param stage: the stage (Stage)
+        """
+        part_coeffs = stage.part_coeffs if stage.part_coeffs is not None else self.part_coeffs
+        if part_coeffs is None:
+            raise Exception("No partition coefficients for the stage " + str(stage.name) + ".")
+        fractions = stage.local_fractions(self.liq_fract)
+
+        # Mass balance with a cumulate of constant composition, and Rayleigh fractionation
+        state = dict(zip(self.oxel_list, self.majors))
+        majors = self.mass_balance.get_residual_liq_concentrations(stage.assemblage, state, 1 - fractions)
+        bulk_coeffs = compute_bulk_coeffs(stage.assemblage, part_coeffs).reindex(self.list_elements)
+        traces = RayleighCrystallization(bulk_coeffs).ratio_liq_array(fractions) * self.traces
+
+        self.stages.append(stage)
+        name = stage.name if stage.name else "Stage " + str(len(self.stages))
+        self._paths.append((name, self.liq_fract * fractions, majors, traces))
+        self.liq_fract *= fractions[-1]
+        self.majors, self.traces = majors[-1], traces[-1]
+
+    def run(self, stages):
+        """
+        Compute a sequence of stages from the current state
+        :param stages: the stages (list of Stage)
+        :return: the major and trace element paths (DataFrames)
+        """
+        for stage in stages:
+            self.add_stage(stage)
+        return self.majors_path(), self.traces_path()
+
+    def _path(self, position, columns):
+        ids = pd.DataFrame({'Stage': np.concatenate([[name] * len(f) for name, f, _, _ in self._paths]),
+                            'F': np.concatenate([f for _, f, _, _ in self._paths])})
+        values = pd.DataFrame(np.vstack([path[position] for path in self._paths]), columns=columns)
+        return pd.concat([ids, values], axis=1)
+
+    def majors_path(self):
+        """
+        Get the major element concentrations of the liquid, from the parent through all the steps of the stages
+        :return: the paths, with the stage and the fraction of the initial liquid first (DataFrame)
+        """
+        return self._path(2, self.oxel_list)
+
+    def traces_path(self):
+        """
+        Get the trace element concentrations of the liquid, from the parent through all the steps of the stages
+        :return: the paths, with the stage and the fraction of the initial liquid first (DataFrame)
+        """
+        return self._path(3, self.list_elements)
@@ -1,3 +1,4 @@
+import numpy as np
 from georunes.tools.filemanager import FileManager
 
 filemanager = FileManager.get_instance()
@@ -40,20 +41,67 @@ class MassBalanceModalModeler:
         self.list_minerals = self.minerals_data.keys().tolist()
         self.nb_minerals = len(self.list_minerals)
 
+    @property
+    def minerals_data(self):
+        return self._minerals_data
+
+    @minerals_data.setter
+    def minerals_data(self, minerals_data):
+        # The compositions are cached as a minerals x oxels matrix, rebuilt for any new data
+        self._minerals_data = minerals_data
+        self.minerals_matrix = minerals_data.to_numpy(dtype=float).T
+        self._minerals_index = {mineral: i for i, mineral in enumerate(minerals_data.columns)}
+
     def get_elements_list(self):
         return self.minerals_data.index.tolist()
 
     def get_minerals_list(self):
         return self.minerals_data.columns
 
+    def modal_vector(self, modal_props):
+        """
+        Get modal proportions as a vector, in the order of the minerals
+        :param modal_props: the modal proportions in % (dict or Series)
+        :return: the proportions (array)
+        """
+        missing = [mineral for mineral in modal_props.keys() if mineral not in self._minerals_index]
+        if missing:
+            raise Exception("Minerals missing in the dataset: " + str(missing))
+        vector = np.zeros(len(self._minerals_index))
+        for mineral, fract in modal_props.items():
+            vector[self._minerals_index[mineral]] = fract
+        return vector
+
+    def oxels_vector(self, conc):
+        """
+        Get concentrations as a vector, in the order of the oxels
+        :param conc: the concentrations (dict or Series)
+        :return: the concentrations (array)
+        """
+        return np.array([conc[oxel] for oxel in self.oxel_list], dtype=float)
+
+    def cumulate_array(self, modal_props):
+        """
+        Calculate the concentrations of a cumulate, in the order of the oxels
+        :param modal_props: the modal mineral composition of the cumulate in % (dict)
+        :return: the concentrations (array)
+        """
+        return self.modal_vector(modal_props) @ self.minerals_matrix / 100
+
     def modal_props_to_concentration(self, modal_props):
-        conc = dict()
-        for oxel in self.oxel_list:
-            sum_oxel = 0
-            for mineral, fract in modal_props.items():
-                sum_oxel += self.minerals_data[mineral][oxel] * fract
-            conc[oxel] = sum_oxel / 100
-        return conc
+        return dict(zip(self.oxel_list, self.cumulate_array(modal_props).tolist()))
+
+    def get_residual_liq_concentrations(self, modal_cumulate, parent_conc, alpha_list):
+        """
+        Get the concentrations of all the oxels of the residual liquid for a list of alpha values (proportion of liquid)
+        :param modal_cumulate: the modal mineral composition of the cumulate (dict)
+        :param parent_conc: the concentrations of the parental melt (dict)
+        :param alpha_list: the liquid proportions (list or array)
+        :return: the concentrations (array, alpha x oxels, in the order of oxel_list)
+        """
+        alpha = np.asarray(alpha_list, dtype=float).reshape(-1, 1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (self.oxels_vector(parent_conc) - alpha * self.cumulate_array(modal_cumulate)) / (1 - alpha)
 
     def get_residual_liq_concentration(self, oxel, modal_cumulate, parent_conc, alpha_list):
         """
@@ -64,10 +112,34 @@ class MassBalanceModalModeler:
         :param alpha_list: the liquid proportions (list)
         :return: a list of the specified oxide/element concentration according to the liquid proportion
         """
+        res = self.get_residual_liq_concentrations(modal_cumulate, parent_conc, alpha_list)
+        return res[:, self.oxel_list.index(oxel)].tolist()
 
-        cumulate = self.modal_props_to_concentration(modal_cumulate)
-        res = [(parent_conc[oxel] - alpha * cumulate[oxel]) / (1 - alpha) for alpha in alpha_list]
-        return res
+    def mix_array(self, compositions, fractions):
+        """
+        Calculate the mixtures of several components, as magma mixing
+        :param compositions: the concentrations of the components (list of dict or Series)
+        :param fractions: the mass fractions of the components, normalized to 1 (array, mixtures x components)
+        :return: the concentrations of the mixtures (array, mixtures x oxels, in the order of oxel_list)
+        """
+        fractions = np.atleast_2d(np.asarray(fractions, dtype=float))
+        fractions = fractions / fractions.sum(axis=1, keepdims=True)
+        return fractions @ np.array([self.oxels_vector(comp) for comp in compositions])
+
+    def assimilate_array(self, parent, contents, intake_ratios):
+        """
+        Calculate the assimilation of one or several contents by a parental melt, for arrays of intake ratios
+        :param parent: the concentrations of the parental melt (dict)
+        :param contents: the concentrations of the assimilated component, or the list of the components (dict)
+        :param intake_ratios: the mass ratios of the assimilated contents to the parental melt (array, intakes, or
+        intakes x contents)
+        :return: the concentrations of the mixed products (array, intakes x oxels, in the order of oxel_list)
+        """
+        if not isinstance(contents, (list, tuple)):
+            contents = [contents]
+        intake_ratios = np.asarray(intake_ratios, dtype=float).reshape(-1, len(contents))
+        fractions = np.hstack([np.ones((len(intake_ratios), 1)), intake_ratios])
+        return self.mix_array([parent, *contents], fractions)
 
     def assimilate(self, parent, content, intake_ratio):
         """
@@ -77,6 +149,40 @@ class MassBalanceModalModeler:
         :param intake_ratio: the mass ratio of the assimilated content to the parental melt (float)
         :return: the concentrations of the mixed product (dict)
         """
+        return dict(zip(self.oxel_list, self.assimilate_array(parent, content, intake_ratio)[0].tolist()))
+
+    def mixing_grid(self, parent, contents, intake_ratios):
+        """
+        Calculate the assimilation of several contents for all the combinations of their intake ratios
+        :param contents: the concentrations of the assimilated components (list of dict)
+        :param intake_ratios: the intake ratios of each content (list of arrays)
+        :return: the concentrations of the mixed products (array, intakes of each content x oxels)
+        """
+        grids = np.meshgrid(*[np.asarray(ratios, dtype=float) for ratios in intake_ratios], indexing='ij')
+        mixed = self.assimilate_array(parent, contents, np.stack([grid.ravel() for grid in grids], axis=1))
+        return mixed.reshape(*grids[0].shape, len(self.oxel_list))
+
+    def fractionation_assimilation_paths(self, modal_cumulate, parent_conc, content, alpha_steps, intake_steps):
+        """
+        Calculate the paths of a liquid alternately removing a cumulate and assimilating a content, at each step :
+        C' = ((C - alpha * cumulate) / (1 - alpha) + intake * content) / (1 + intake)
+        :param modal_cumulate: the modal mineral composition of the cumulate (dict)
+        :param parent_conc: the concentrations of the parental melt (dict)
+        :param content: the concentrations of the assimilated component (dict)
+        :param alpha_steps: the fractions of the liquid removed as cumulate at each step (array, ... x steps)
+        :param intake_steps: the mass ratios of the content to the residual liquid at each step (array, ... x steps)
+        :return: the concentrations of the liquids, the parent first (array, ... x (steps + 1) x oxels)
+        """
+        alpha, intake = np.broadcast_arrays(np.asarray(alpha_steps, dtype=float), np.asarray(intake_steps, dtype=float))
+        alpha, intake = alpha[..., np.newaxis], intake[..., np.newaxis]
+        cumulate, assimilated = self.cumulate_array(modal_cumulate), self.oxels_vector(content)
+        # The steps are affine, C' = a * C + b, and resolved with cumulative products over the steps
+        factor = 1 / ((1 - alpha) * (1 + intake))
+        offset = (intake * assimilated - alpha * cumulate / (1 - alpha)) / (1 + intake)
+        products = np.cumprod(factor, axis=-2)
+        paths = products * (self.oxels_vector(parent_conc) + np.cumsum(offset / products, axis=-2))
+        parent = np.broadcast_to(self.oxels_vector(parent_conc), (*paths.shape[:-2], 1, paths.shape[-1]))
+        return np.concatenate([parent, paths], axis=-2)
 
     def set_minerals_data(self, minerals_data):
         self.minerals_data = minerals_data
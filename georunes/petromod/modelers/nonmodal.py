@@ -0,0 +1,117 @@
+import numpy as np
+import pandas as pd
+from georunes.petromod.modelers.partition import PartitionModeler
+
+# Shaw, D.M., 1970. Trace element fractionation during anatexis. Geochimica et Cosmochimica Acta, 34(2), pp.237-243.
+
+
+class NonModalMelting(PartitionModeler):
+    def __init__(self, bulk_dist_coeffs, melt_dist_coeffs):
+        """
+        :param bulk_dist_coeffs: the bulk partition coefficients of the initial solid (D0)
+        :param melt_dist_coeffs: the partition coefficients of the melting reaction (P), as computed by
+        get_non_modal_dist_coeffs
+        """
+        PartitionModeler.__init__(self, bulk_dist_coeffs)
+        self.melt_dist_coeffs = melt_dist_coeffs
+        self.init_name = "Initial solid composition (F=0)"
+
+    @property
+    def melt_dist_coeffs(self):
+        return self._melt_dist_coeffs
+
+    @melt_dist_coeffs.setter
+    def melt_dist_coeffs(self, melt_dist_coeffs):
+        self._melt_dist_coeffs = melt_dist_coeffs
+        self.invalidate_ratios()
+
+    def set_melt_dist_coeffs(self, melt_dist_coeffs):
+        self.melt_dist_coeffs = melt_dist_coeffs
+
+    def melt_coeffs_array(self):
+        """
+        Get the partition coefficients of the melting reaction as an array, in the order of list_elements
+        """
+        return pd.Series(self.melt_dist_coeffs, dtype=float).reindex(self.elements_index()).to_numpy()
+
+
+class NonModalBatchMelting(NonModalMelting):
+    def __init__(self, bulk_dist_coeffs, melt_dist_coeffs):
+        NonModalMelting.__init__(self, bulk_dist_coeffs, melt_dist_coeffs)
+        self.phases_labels = {"LIQ": "Instantaneous/accumulated melt",
+                              "SOL": "Solid residue"}
+        self.modeler_name = "Non-modal batch melting"
+
+    def ratio_liq_array(self, liq_fract):
+        f = self.liq_fract_array(liq_fract)
+        with np.errstate(divide='ignore'):
+            denominator = self.dist_coeffs_array() + f * (1 - self.melt_coeffs_array())
+            return np.where(denominator > 0, 1 / denominator, np.nan)
+
+    def ratio_sol_array(self, liq_fract):
+        f = self.liq_fract_array(liq_fract)
+        f = np.where(f == 1, 0.99, f)
+        residue = self.dist_coeffs_array() - self.melt_coeffs_array() * f
+        # Beyond the exhaustion of a mineral, the model is no longer valid
+        return np.where(residue >= 0, residue / (1 - f) * self.ratio_liq_array(f), np.nan)
+
+
+class NonModalFractionalMelting(NonModalMelting):
+    def __init__(self, bulk_dist_coeffs, melt_dist_coeffs):
+        NonModalMelting.__init__(self, bulk_dist_coeffs, melt_dist_coeffs)
+        self.phases_labels = {"LIQ_INST": "Instantaneous liquid",
+                              "LIQ_TOT": "Accumulated liquid",
+                              "SOL": "Solid residue", }
+        self.modeler_name = "Non-modal fractional melting"
+
+    def _residue_terms(self, f):
+        """
+        Calculate the terms 1 - PF/D0 and (1 - PF/D0)^(1/P), the latter tending to exp(-F/D0) when P tends to 0
+        """
+        d = self.dist_coeffs_array()
+        p = self.melt_coeffs_array()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            base = 1 - p * f / d
+            power = np.where(p == 0, np.exp(-f / d), np.maximum(base, 0) ** (1 / np.where(p == 0, 1, p)))
+        return base, np.where(base >= 0, power, np.nan)
+
+    def ratio_liq_array(self, liq_fract):
+        f = self.liq_fract_array(liq_fract)
+        base, power = self._residue_terms(f)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(base > 0, power / base / self.dist_coeffs_array(), np.nan)
+
+    def ratio_liq_avg_array(self, liq_fract):
+        """
+        Calculate the ratios : accumulated liquid / initial concentration, for one or several liquid fractions
+        """
+        f = self.liq_fract_array(liq_fract)
+        f = np.where(f == 0, 0.01, f)
+        return (1 - self._residue_terms(f)[1]) / f
+
+    def ratio_sol_array(self, liq_fract):
+        f = self.liq_fract_array(liq_fract)
+        f = np.where(f == 1, 0.99, f)
+        return self._residue_terms(f)[1] / (1 - f)
+
+    def concentration_liq_avg_el(self, el, liq_fract, initial_conc):
+        c_liq_el = initial_conc[el] * self.cached_ratios(self.ratio_liq_avg_array, liq_fract)[el]
+        return c_liq_el
+
+    def get_phase_concentration_func(self, phase):
+        if phase == 'LIQ_INST':
+            return self.concentration_liq_el
+        elif phase == 'SOL':
+            return self.concentration_sol_el
+        elif phase == 'LIQ_TOT':
+            return self.concentration_liq_avg_el
+        raise Exception("Inapplicable phase : " + str(phase))
+
+    def get_phase_ratio_func(self, phase):
+        if phase == 'LIQ_INST':
+            return self.ratio_liq_array
+        elif phase == 'SOL':
+            return self.ratio_sol_array
+        elif phase == 'LIQ_TOT':
+            return self.ratio_liq_avg_array
+        raise Exception("Inapplicable phase : " + str(phase))
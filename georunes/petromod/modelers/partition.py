@@ -1,4 +1,5 @@
 from abc import abstractmethod, ABC
+import numpy as np
 import pandas as pd
 
 
@@ -6,80 +7,194 @@ def initial_concentration_as_series(list_elements, list_concentrations):
     return pd.Series(list_concentrations, index=list_elements)
 
 
+def proportions_matrix(proportions, part_coeffs, minerals=None, ignore_missing=False):
+    """
+    Align mineral proportions on the minerals of the partition coefficients
+    :param proportions: the proportions, one row per assemblage (DataFrame, array, or dict/Series for one assemblage)
+    :param part_coeffs: the partition coefficients, elements x minerals (DataFrame)
+    :param minerals: the minerals of the columns, if proportions is an array
+    :param ignore_missing: if False, an exception is raised for the minerals with proportions but without coefficients
+    :return: the proportions (array, assemblages x minerals of part_coeffs)
+    """
+    if isinstance(proportions, (dict, pd.Series)):
+        proportions = pd.DataFrame([proportions])
+    if isinstance(proportions, pd.DataFrame):
+        minerals = proportions.columns
+        proportions = proportions.to_numpy(dtype=float)
+    elif minerals is None:
+        raise Exception("The minerals must be provided with an array of proportions.")
+    proportions = np.atleast_2d(np.asarray(proportions, dtype=float))
+    indexer = part_coeffs.columns.get_indexer(pd.Index(minerals))
+    missing = indexer < 0
+    if not ignore_missing:
+        missing_minerals = pd.Index(minerals)[missing & np.any(np.nan_to_num(proportions) != 0, axis=0)]
+        if len(missing_minerals):
+            notification = "Minerals missing in the dataset: " + str(missing_minerals.tolist())
+            raise Exception(notification)
+    matrix = np.zeros((len(proportions), len(part_coeffs.columns)))
+    matrix[:, indexer[~missing]] = proportions[:, ~missing]
+    return matrix
+
+
+def compute_bulk_coeffs_batch(modal_proportions, part_coeffs, minerals=None, ignore_missing=False):
+    """
+    Compute the bulk partition coefficients of many modal assemblages at once, the missing coefficients counting as 0
+    :param modal_proportions: the modal proportions in %, assemblages x minerals (DataFrame, or array with minerals)
+    :param part_coeffs: the partition coefficients, elements x minerals (DataFrame)
+    :return: the bulk partition coefficients (array, assemblages x elements)
+    """
+    matrix = proportions_matrix(modal_proportions, part_coeffs, minerals, ignore_missing=ignore_missing)
+    return matrix @ np.nan_to_num(part_coeffs.to_numpy(dtype=float)).T / 100
+
+
+def get_non_modal_dist_coeffs_batch(melt_proportions, part_coeffs, minerals=None):
+    """
+    Compute the partition coefficients of the melting reactions (P) of many assemblages at once
+    :param melt_proportions: the proportions of the minerals entering the melt, summing to 1, assemblages x minerals
+    (DataFrame, or array with minerals)
+    :param part_coeffs: the partition coefficients, elements x minerals (DataFrame)
+    :return: the coefficients (array, assemblages x elements)
+    """
+    matrix = proportions_matrix(melt_proportions, part_coeffs, minerals)
+    if not np.allclose(matrix.sum(axis=1), 1):
+        raise Exception("The sum of the melt proportions must be 1.")
+    coeffs = part_coeffs.to_numpy(dtype=float)
+    p = matrix @ np.nan_to_num(coeffs).T
+    # A missing coefficient is propagated only to the assemblages where the mineral melts
+    p[(matrix != 0).astype(float) @ np.isnan(coeffs).T > 0] = np.nan
+    return p
+
+
 def compute_bulk_coeffs(modal_mineralogy, part_coeffs):
-    bulk_dist_coeffs = pd.DataFrame(index=part_coeffs.index)
-    df_prop = pd.Series(modal_mineralogy)
-    for index, row in part_coeffs.iterrows():
-        res = row * df_prop
-        val = res.sum() / 100
-        bulk_dist_coeffs.at[index, 'D'] = val
-    return bulk_dist_coeffs['D']
+    bulk_coeffs = compute_bulk_coeffs_batch(modal_mineralogy, part_coeffs, ignore_missing=True)
+    return pd.Series(bulk_coeffs[0], index=part_coeffs.index, name='D')
 
 
 def get_non_modal_dist_coeffs(melt_proportions, part_coeffs):
     if sum(melt_proportions.values()) != 1:
         raise Exception("The sum of the melt proportions must be 1.")
-    part_coeffs_minerals = part_coeffs.keys()
-
-    # Verify the minerals provided with melt proportions
-    missing_minerals = []
-    for mineral in melt_proportions:
-        if mineral not in part_coeffs_minerals:
-            missing_minerals.append(mineral)
-    if missing_minerals:
-        notification = "Minerals missing in the dataset: " + str(missing_minerals)
-        raise Exception(notification)
-
-    p = pd.DataFrame(index=part_coeffs.index)
-    for element, row in part_coeffs.iterrows():
-        tot = 0
-        for mineral, prop in melt_proportions.items():
-            tot += row[mineral] * prop
-        p.at[element, 'P'] = tot
-
-    return p['P']
+    p = get_non_modal_dist_coeffs_batch(melt_proportions, part_coeffs)
+    return pd.Series(p[0], index=part_coeffs.index, name='P')
 
 
 class PartitionModeler(ABC):
+    ratio_cache_size = 1024  # Maximum number of ratio vectors kept, the cache being emptied beyond
+
     def __init__(self, bulk_dist_coeffs):
         self.phases_labels = None
+        self._bulk_version = 0
+        self._ratio_cache = dict()
         self.bulk_dist_coeffs = bulk_dist_coeffs
         self.modeler_name = "Default partition modeler"
         self.f_reverse = False
 
+    @property
+    def bulk_dist_coeffs(self):
+        return self._bulk_dist_coeffs
+
+    @bulk_dist_coeffs.setter
+    def bulk_dist_coeffs(self, bulk_dist_coeffs):
+        self._bulk_dist_coeffs = bulk_dist_coeffs
+        self.invalidate_ratios()
+
+    def invalidate_ratios(self):
+        """
+        Invalidate the cached ratios, when the coefficients or the parameters of the model change
+        """
+        self._bulk_version += 1
+        self._ratio_cache = dict()
+
     def set_bulk_dist_coeffs(self, bulk_dist_coeffs):
         self.bulk_dist_coeffs = bulk_dist_coeffs
 
+    def elements_index(self):
+        """
+        Get the elements, the bulk partition coefficients being a Series, or a DataFrame of several sets of
+        coefficients x elements (for the array kernels only)
+        """
+        if isinstance(self.bulk_dist_coeffs, pd.DataFrame):
+            return self.bulk_dist_coeffs.columns
+        return self.bulk_dist_coeffs.index
+
     def list_elements(self):
-        keys = self.bulk_dist_coeffs.index.tolist()
+        keys = self.elements_index().tolist()
         return keys
 
+    def dist_coeffs_array(self):
+        """
+        Get the bulk partition coefficients as an array, in the order of list_elements. Several sets of coefficients
+        are returned as sets x 1 x elements, so that the kernels broadcast to sets x F x elements.
+        """
+        coeffs = np.asarray(self.bulk_dist_coeffs, dtype=float)
+        return coeffs[:, np.newaxis, :] if coeffs.ndim == 2 else coeffs
+
+    @staticmethod
+    def liq_fract_array(liq_fract):
+        """
+        Get one or several liquid fractions as a column (F x 1), for broadcasting against the elements
+        """
+        return np.atleast_1d(np.asarray(liq_fract, dtype=float)).reshape(-1, 1)
+
+    def _as_series(self, ratios):
+        return pd.Series(ratios, index=self.elements_index(), name=self.bulk_dist_coeffs.name)
+
     @abstractmethod
+    def ratio_liq_array(self, liq_fract):
+        """
+        Calculate the ratios : liquid / initial concentration, for one or several liquid fractions
+        :param liq_fract: the liquid fractions (float or array)
+        :return: the ratios (array, F x elements)
+        """
+        pass
+
+    def ratio_sol_array(self, liq_fract):
+        """
+        Calculate the ratios : solid / initial concentration, for one or several liquid fractions
+        :return: the ratios (array, F x elements)
+        """
+        return self.ratio_liq_array(liq_fract) * self.dist_coeffs_array()
+
     def ratio_liq(self, liq_fract):
         """
         Calculate the ratio : liquid / initial concentration
         """
-        pass
+        return self._as_series(self.ratio_liq_array(liq_fract)[0])
 
-    @abstractmethod
     def ratio_sol(self, liq_fract):
         """
         Calculate the ratio : solid / initial concentration
         """
-        return self.ratio_liq(liq_fract) * self.bulk_dist_coeffs
+        return self._as_series(self.ratio_sol_array(liq_fract)[0])
+
+    def cached_ratios(self, ratio_func, liq_fract):
+        """
+        Get the ratios of all the elements for a liquid fraction, computed once per kernel, liquid fraction and
+        version of the bulk partition coefficients
+        :param ratio_func: the kernel, as ratio_liq_array
+        :param liq_fract: the liquid fraction (float)
+        :return: the ratios by element (dict)
+        """
+        key = (ratio_func.__name__, float(liq_fract), self._bulk_version)
+        ratios = self._ratio_cache.get(key)
+        if ratios is None:
+            if len(self._ratio_cache) >= self.ratio_cache_size:
+                self._ratio_cache.clear()
+            ratios = dict(zip(self.elements_index(), ratio_func(liq_fract)[0]))
+            self._ratio_cache[key] = ratios
+        return ratios
 
     def concentration_liq_el(self, el, liq_fract, initial_c0):
         """
         Calculate the ratio for an element : liquid / initial concentration
         """
-        c_liq_el = initial_c0[el] * self.ratio_liq(liq_fract)[el]
+        c_liq_el = initial_c0[el] * self.cached_ratios(self.ratio_liq_array, liq_fract)[el]
         return c_liq_el
 
     def concentration_sol_el(self, el, liq_fract, initial_c0):
         """
         Calculate the ratio for an element: solid / initial concentration
         """
-        c_sol_el = initial_c0[el] * self.ratio_sol(liq_fract)[el]
+        c_sol_el = initial_c0[el] * self.cached_ratios(self.ratio_sol_array, liq_fract)[el]
         return c_sol_el
 
     def concentration_liq_els(self, list_elements, liq_fract, initial_c0):
@@ -101,5 +216,31 @@ class PartitionModeler(ABC):
             return self.concentration_sol_el
         return None
 
+    def get_phase_ratio_func(self, phase):
+        if phase == 'LIQ':
+            return self.ratio_liq_array
+        elif phase == 'SOL':
+            return self.ratio_sol_array
+        return None
+
+    def concentration_array(self, phase, liq_fract, initial_c0, list_elements=None):
+        """
+        Calculate the concentrations of a phase for several liquid fractions and elements in one call
+        :param phase: the phase, as in get_phase_concentration_func
+        :param liq_fract: the liquid fractions (float or array)
+        :param initial_c0: the initial concentrations (Series or dict)
+        :param list_elements: the elements (default : all the elements of the partition coefficients)
+        :return: the concentrations (array, F x elements)
+        """
+        ratio_func = self.get_phase_ratio_func(phase)
+        if ratio_func is None:
+            raise Exception("Inapplicable phase : " + str(phase))
+        ratios = ratio_func(liq_fract)
+        if list_elements is None:
+            list_elements = self.list_elements()
+        else:
+            ratios = ratios[..., self.elements_index().get_indexer(list_elements)]
+        return ratios * np.array([initial_c0[el] for el in list_elements], dtype=float)
+
     def get_phases_labels(self):
         return self.phases_labels
@@ -1,3 +1,4 @@
+import numpy as np
 from georunes.petromod.modelers.partition import PartitionModeler
 
 
@@ -10,39 +11,30 @@ class RayleighCrystallization(PartitionModeler):
         self.modeler_name = "Fractionated crystallization"
         self.init_name = "Initial liquid composition (F=1)"
 
-    def ratio_liq(self, liq_fract):
-        if liq_fract == 0:
-            liq_fract = 0.01
-        ratio_liq = self.bulk_dist_coeffs.copy()
-        for index, row in ratio_liq.items():
-            ratio_liq[index] = liq_fract ** (self.bulk_dist_coeffs[index] - 1)
-        ratio_liq = ratio_liq.drop(columns=['D', ])
+    def ratio_liq_array(self, liq_fract):
+        f = self.liq_fract_array(liq_fract)
+        f = np.where(f == 0, 0.01, f)
+        return f ** (self.dist_coeffs_array() - 1)
 
-        return ratio_liq
-
-    def ratio_sol(self, liq_fract):
+    def ratio_sol_avg_array(self, liq_fract):
         """
-        Calculate the ratio : instantaneous cumulate / initial concentration
+        Calculate the ratios : total cumulate / initial concentration, for one or several liquid fractions
         """
-        return self.ratio_liq(liq_fract) * self.bulk_dist_coeffs
+        f = self.liq_fract_array(liq_fract)
+        f = np.where(f == 1, 0.99, f)
+        return (1 - f ** self.dist_coeffs_array()) / (1 - f)
 
     def ratio_sol_avg(self, liq_fract):
         """
         Calculate the ratio : total cumulate / initial concentration
         """
-        if liq_fract == 1:
-            liq_fract = 0.99
-        ratio_sol = self.bulk_dist_coeffs.copy()
-        for index, row in ratio_sol.items():
-            num = 1 - liq_fract ** (self.bulk_dist_coeffs[index])
-            ratio_sol[index] = num / (1 - liq_fract)
-        return ratio_sol
+        return self._as_series(self.ratio_sol_avg_array(liq_fract)[0])
 
     def concentration_sol_avg_el(self, el, liq_fract, initial_c0):
         """
         Calculate the ratio for element : instantaneous cumulate / initial concentration
         """
-        c_sol_el = initial_c0[el] * self.ratio_sol_avg(liq_fract)[el]
+        c_sol_el = initial_c0[el] * self.cached_ratios(self.ratio_sol_avg_array, liq_fract)[el]
         return c_sol_el
 
     def get_phase_concentration_func(self, phase):
@@ -54,6 +46,15 @@ class RayleighCrystallization(PartitionModeler):
             return self.concentration_sol_avg_el
         raise Exception("Inapplicable phase : " + str(phase))
 
+    def get_phase_ratio_func(self, phase):
+        if phase == 'LIQ':
+            return self.ratio_liq_array
+        elif phase == 'SOL_INST':
+            return self.ratio_sol_array
+        elif phase == 'SOL_TOT':
+            return self.ratio_sol_avg_array
+        raise Exception("Inapplicable phase : " + str(phase))
+
     @staticmethod
     def get_phases_labels():
         return {"LIQ": "Liquid", "SOL_INST": "Instantaneous solid", "SOL_TOT": "Accumulated solid"}
@@ -68,29 +69,25 @@ class RayleighMelting(PartitionModeler):
         self.modeler_name = "Rayleigh melting"
         self.init_name = "Initial solid composition (F=0)"
 
-    def ratio_liq(self, liq_fract):
-        if liq_fract == 1:
-            liq_fract = 0.99
-        ratio_liq = self.bulk_dist_coeffs.copy()
-        for index, row in ratio_liq.items():
-            ratio_liq[index] = (1 / self.bulk_dist_coeffs[index]) * (1 - liq_fract) ** (
-                        1 / self.bulk_dist_coeffs[index] - 1)
-        return ratio_liq
+    def ratio_liq_array(self, liq_fract):
+        f = self.liq_fract_array(liq_fract)
+        f = np.where(f == 1, 0.99, f)
+        d = self.dist_coeffs_array()
+        return (1 / d) * (1 - f) ** (1 / d - 1)
 
-    def ratio_sol(self, liq_fract):
-        return self.ratio_liq(liq_fract) * self.bulk_dist_coeffs
+    def ratio_liq_avg_array(self, liq_fract):
+        """
+        Calculate the ratios : accumulated liquid / initial concentration, for one or several liquid fractions
+        """
+        f = self.liq_fract_array(liq_fract)
+        f = np.where(f == 0, 0.01, f)
+        return (1 - (1 - f) ** (1 / self.dist_coeffs_array())) / f
 
     def ratio_liq_avg(self, liq_fract):
-        if liq_fract == 0:
-            liq_fract = 0.01
-        ratio_liq_avg = self.bulk_dist_coeffs.copy()
-        for index, row in ratio_liq_avg.items():
-            num = 1 - (1 - liq_fract) ** (1 / self.bulk_dist_coeffs[index])
-            ratio_liq_avg[index] = num / liq_fract
-        return ratio_liq_avg
+        return self._as_series(self.ratio_liq_avg_array(liq_fract)[0])
 
     def concentration_liq_avg_el(self, el, liq_fract, initial_conc):
-        c_liq_el = initial_conc[el] * self.ratio_liq_avg(liq_fract)[el]
+        c_liq_el = initial_conc[el] * self.cached_ratios(self.ratio_liq_avg_array, liq_fract)[el]
         return c_liq_el
 
     def get_phase_concentration_func(self, phase):
@@ -101,3 +98,12 @@ class RayleighMelting(PartitionModeler):
         elif phase == 'LIQ_TOT':
             return self.concentration_liq_avg_el
         raise Exception("Inapplicable phase : " + str(phase))
+
+    def get_phase_ratio_func(self, phase):
+        if phase == 'LIQ_INST':
+            return self.ratio_liq_array
+        elif phase == 'SOL':
+            return self.ratio_sol_array
+        elif phase == 'LIQ_TOT':
+            return self.ratio_liq_avg_array
+        raise Exception("Inapplicable phase : " + str(phase))
@@ -0,0 +1,265 @@
+import os
+from abc import abstractmethod, ABC
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+
+
+class Distribution(ABC):
+    def __init__(self, template):
+        """
+        :param template: the labelled values giving the shape of the realisations (Series, or DataFrame for the
+        partition coefficients)
+        """
+        self.template = _as_labelled(template)
+
+    @abstractmethod
+    def sample(self, rng, size):
+        """
+        Draw realisations of the parameter
+        :param rng: the random generator
+        :param size: the number of realisations
+        :return: the realisations (array, size x shape of the template)
+        """
+        pass
+
+
+class Normal(Distribution):
+    def __init__(self, mean, sd):
+        """
+        Normal distribution, truncated at 0
+        :param sd: the standard deviations (float, or labelled as the mean)
+        """
+        Distribution.__init__(self, mean)
+        self.sd = np.asarray(sd, dtype=float)
+
+    def sample(self, rng, size):
+        mean = self.template.to_numpy(dtype=float)
+        return np.maximum(rng.normal(mean, self.sd, (size, *mean.shape)), 0)
+
+
+class LogNormal(Distribution):
+    def __init__(self, median, sigma):
+        """
+        Log-normal distribution, as usual for the partition coefficients
+        :param sigma: the standard deviations of the natural logarithms (float, or labelled as the median)
+        """
+        Distribution.__init__(self, median)
+        self.sigma = np.asarray(sigma, dtype=float)
+
+    def sample(self, rng, size):
+        median = self.template.to_numpy(dtype=float)
+        return median * np.exp(rng.normal(0, 1, (size, *median.shape)) * self.sigma)
+
+
+class Uniform(Distribution):
+    def __init__(self, low, high):
+        Distribution.__init__(self, low)
+        self.high = _as_labelled(high).reindex_like(self.template).to_numpy(dtype=float)
+
+    def sample(self, rng, size):
+        low = self.template.to_numpy(dtype=float)
+        return rng.uniform(low, self.high, (size, *low.shape))
+
+
+class Dirichlet(Distribution):
+    def __init__(self, proportions, concentration=100):
+        """
+        Dirichlet distribution of proportions, as usual for the modal proportions
+        :param proportions: the mean proportions (Series or dict)
+        :param concentration: the sum of the parameters, the higher the narrower the distribution
+        """
+        Distribution.__init__(self, proportions)
+        self.concentration = concentration
+
+    def sample(self, rng, size):
+        proportions = self.template.to_numpy(dtype=float)
+        alpha = np.maximum(proportions / proportions.sum() * self.concentration, 1e-9)
+        return rng.dirichlet(alpha, size) * proportions.sum()
+
+
+class Grid:
+    def __init__(self, values):
+        """
+        Alternative values of a parameter, all evaluated : the grids of the parameters are crossed
+        :param values: the values (list of Series, dicts or DataFrames)
+        """
+        self.values = [_as_labelled(value) for value in values]
+
+
+def _as_labelled(value):
+    if isinstance(value, (pd.Series, pd.DataFrame)):
+        return value
+    return pd.Series(value, dtype=float)
+
+
+def _align(values, template, labels, fill):
+    """
+    Align realisations (size x shape of the template) on the labels of each axis, filling the missing ones
+    """
+    axes = [template.index] if template.ndim == 1 else [template.index, template.columns]
+    for axis, (own, target) in enumerate(zip(axes, labels), start=1):
+        indexer = own.get_indexer(target)
+        values = np.take(values, np.maximum(indexer, 0), axis=axis)
+        shape = [1] * values.ndim
+        shape[axis] = len(indexer)
+        values = np.where(np.reshape(indexer < 0, shape), fill, values)
+    return values
+
+
+def _evaluate_block(sweep, start, stop, seed, output=None):
+    values = sweep.evaluate_block(start, stop, np.random.default_rng(seed))
+    if output is None:
+        return start, values
+    # Written in place, rather than sent back to the main process
+    realisations = np.load(output, mmap_mode='r+')
+    realisations[start:stop] = values
+    realisations.flush()
+    return start, None
+
+
+class MonteCarloSweep:
+    quantiles = (0.025, 0.16, 0.5, 0.84, 0.975)
+
+    def __init__(self, model_class, part_coeffs, modal_proportions, initial_c0, liq_fract, phase='LIQ',
+                 nb_realisations=1000, model_kwargs=None, block_size=1000, workers=None, seed=None):
+        """
+        Evaluate a partition model for realisations of its parameters, by vectorized blocks over a process pool
+        :param model_class: the modeler, a PartitionModeler subclass, e.g. BatchMelting
+        :param part_coeffs: the partition coefficients, elements x minerals (DataFrame, Distribution or Grid)
+        :param modal_proportions: the modal proportions in %, normalized to 100 (Series or dict, Distribution or Grid)
+        :param initial_c0: the initial concentrations (Series or dict, Distribution or Grid)
+        :param liq_fract: the liquid fractions, all evaluated for each realisation (array)
+        :param phase: the phase, as in the get_phase_concentration_func of the model
+        :param nb_realisations: the number of random draws per node of the grids
+        :param model_kwargs: the other parameters of the model (dict)
+        :param block_size: the number of realisations per vectorized block
+        :param workers: the number of processes (default : the number of CPUs), 1 to evaluate in the current process
+        :param seed: the seed of the random generator, the realisations not depending on the number of processes
+        """
+        self.model_class = model_class
+        self.model_kwargs = model_kwargs if model_kwargs else dict()
+        self.phase = phase
+        self.liq_fract = np.atleast_1d(np.asarray(liq_fract, dtype=float))
+        self.block_size = block_size
+        self.workers = workers
+        self.seed = seed
+        self.params = {'part_coeffs': part_coeffs, 'modal_proportions': modal_proportions, 'initial_c0': initial_c0}
+
+        coeffs_template = self._template(part_coeffs)
+        self.elements = coeffs_template.index
+        self.minerals = coeffs_template.columns
+        self.labels = {'part_coeffs': [self.elements, self.minerals], 'modal_proportions': [self.minerals],
+                       'initial_c0': [self.elements]}
+        self.fills = {'part_coeffs': 0., 'modal_proportions': 0., 'initial_c0': np.nan}
+        # The grids are aligned once, then indexed by the nodes of the realisations
+        self.grids = {name: np.stack([self._aligned(name, value.to_numpy(dtype=float)[np.newaxis], value)[0]
+                                      for value in param.values])
+                      for name, param in self.params.items() if isinstance(param, Grid)}
+        self.grid_shape = tuple(len(grid) for grid in self.grids.values())
+        self.nb_draws = nb_realisations if self._has_distributions() else 1
+        self.size = int(np.prod(self.grid_shape, dtype=int)) * self.nb_draws
+        self.realisations = None
+
+    def __getstate__(self):
+        # The realisations are not sent to the processes evaluating the blocks
+        state = self.__dict__.copy()
+        state['realisations'] = None
+        return state
+
+    @staticmethod
+    def _template(param):
+        if isinstance(param, Distribution):
+            return param.template
+        elif isinstance(param, Grid):
+            return param.values[0]
+        return _as_labelled(param)
+
+    def _has_distributions(self):
+        return any(isinstance(param, Distribution) for param in self.params.values())
+
+    def _aligned(self, name, values, template):
+        return _align(values, template, self.labels[name], self.fills[name])
+
+    def draw(self, name, rng, nodes):
+        """
+        Draw the realisations of a parameter
+        :param nodes: the nodes of the grids of the realisations (array, realisations x grids)
+        :return: the realisations, aligned on the elements and minerals (array)
+        """
+        param = self.params[name]
+        if isinstance(param, Grid):
+            return self.grids[name][nodes[:, list(self.grids).index(name)]]
+        if isinstance(param, Distribution):
+            values = param.sample(rng, len(nodes))
+        else:
+            param = _as_labelled(param)
+            values = np.broadcast_to(param.to_numpy(dtype=float), (len(nodes), *param.shape))
+        return self._aligned(name, values, self._template(param))
+
+    def evaluate_block(self, start, stop, rng):
+        """
+        Evaluate the realisations of a block
+        :return: the concentrations (array, realisations x F x elements)
+        """
+        indices = np.arange(start, stop) // self.nb_draws
+        nodes = np.array(np.unravel_index(indices, self.grid_shape)).T if self.grids else indices[:, np.newaxis] * 0
+        coeffs = self.draw('part_coeffs', rng, nodes)
+        modes = self.draw('modal_proportions', rng, nodes)
+        initial_c0 = self.draw('initial_c0', rng, nodes)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            modes = modes / modes.sum(axis=1, keepdims=True)
+        bulk_coeffs = np.einsum('nem,nm->ne', np.nan_to_num(coeffs), modes)
+        model = self.model_class(pd.DataFrame(bulk_coeffs, columns=self.elements), **self.model_kwargs)
+        ratio_func = model.get_phase_ratio_func(self.phase)
+        if ratio_func is None:
+            raise Exception("Inapplicable phase : " + str(self.phase))
+        values = ratio_func(self.liq_fract) * initial_c0[:, np.newaxis, :]
+        if hasattr(model, 'get_phase_assimilation_func'):  # Terms independent of the initial concentrations (AFC)
+            values = values + model.get_phase_assimilation_func(self.phase)(self.liq_fract)
+        return values
+
+    def run(self, output=None, quantiles=None):
+        """
+        Evaluate all the realisations
+        :param output: the path of a .npy file where the realisations are streamed (realisations x F x elements),
+        kept in memory if None
+        :param quantiles: the quantiles of the envelopes (default : the median, and the 1 and 2 sigma intervals)
+        :return: the envelopes, indexed by quantile and liquid fraction, with the elements as columns (DataFrame)
+        """
+        shape = (self.size, len(self.liq_fract), len(self.elements))
+        if output:
+            self.realisations = np.lib.format.open_memmap(output, mode='w+', shape=shape)
+        else:
+            self.realisations = np.empty(shape)
+
+        starts = range(0, self.size, self.block_size)
+        seeds = np.random.SeedSequence(self.seed).spawn(len(starts))
+        tasks = [(start, min(start + self.block_size, self.size), seed) for start, seed in zip(starts, seeds)]
+        workers = self.workers if self.workers else os.cpu_count()
+        if workers == 1 or len(tasks) == 1:
+            for task in tasks:
+                start, values = _evaluate_block(self, *task)
+                self.realisations[start:start + len(values)] = values
+        else:
+            if output:
+                self.realisations.flush()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(_evaluate_block, self, *task, output) for task in tasks]
+                for future in futures:
+                    start, values = future.result()
+                    if values is not None:
+                        self.realisations[start:start + len(values)] = values
+        if output:
+            self.realisations.flush()
+        return self.envelopes(quantiles)
+
+    def envelopes(self, quantiles=None):
+        """
+        Compute the quantile envelopes of the realisations, per element and liquid fraction
+        :return: the envelopes, indexed by quantile and liquid fraction, with the elements as columns (DataFrame)
+        """
+        quantiles = list(quantiles if quantiles else self.quantiles)
+        values = np.nanquantile(self.realisations, quantiles, axis=0)
+        index = pd.MultiIndex.from_product([quantiles, self.liq_fract], names=['quantile', 'F'])
+        return pd.DataFrame(values.reshape(-1, len(self.elements)), index=index, columns=self.elements)
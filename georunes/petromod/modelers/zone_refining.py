@@ -0,0 +1,30 @@
+import numpy as np
+from georunes.petromod.modelers.partition import PartitionModeler
+
+# Harris, P.G., 1957. Zone refining and the origin of potassic basalts. Geochimica et Cosmochimica Acta, 12(3),
+# pp.195-208.
+
+
+class ZoneRefining(PartitionModeler):
+    def __init__(self, bulk_dist_coeffs):
+        PartitionModeler.__init__(self, bulk_dist_coeffs)
+        self.phases_labels = {"LIQ": "Melt zone",
+                              "SOL": "Crystallized solid", }
+        self.modeler_name = "Zone refining"
+        self.init_name = "Initial liquid composition (F=1)"
+        self.f_reverse = True
+
+    @staticmethod
+    def zone_lengths(liq_fract):
+        """
+        Get the number of zone lengths passed through by the melt, n = (1 - F) / F, F being the mass of the melt zone
+        over the total mass of melt and processed rock
+        """
+        f = PartitionModeler.liq_fract_array(liq_fract)
+        f = np.where(f == 0, 0.01, f)
+        return (1 - f) / f
+
+    def ratio_liq_array(self, liq_fract):
+        n = self.zone_lengths(liq_fract)
+        d = self.dist_coeffs_array()
+        return 1 / d - (1 / d - 1) * np.exp(-n * d)
@@ -149,14 +149,13 @@ class FractViewerTk(BaseViewerTk):
 
     def draw(self, element=None):
         list_elements = self.model.list_elements()
-        concentration_func = self.model.get_phase_concentration_func(self.selected_phase)
         self.ax.set_yscale('log')
         liq_vals = self.liq_fract_values
         liq_vals.sort()
 
-        for element in list_elements:
-            values = [concentration_func(element, f, self.initial_conc) for f in liq_vals]
-            self.ax.plot(liq_vals, values, label=element, linestyle='-')
+        values = self.model.concentration_array(self.selected_phase, liq_vals, self.initial_conc, list_elements)
+        for element, column in zip(list_elements, values.T):
+            self.ax.plot(liq_vals, column, label=element, linestyle='-')
         self.ax.set_xlim((0, 1))
         self.ax.set_xlabel('Liquid fraction (F)')
         self.ax.set_ylabel('Concentration')
@@ -281,22 +281,17 @@ class MassBalanceViewerTk(BaseViewerTk):
         max_extraction = self.model.compute_alpha_limit_removal(self.parent, Series(self.cumulate_conc))
         fracts = np.arange(0, min(max_extraction, 1.01), self.alpha_step)
         fracts = np.append(fracts, min(max_extraction, 1.01))
-        valx = self.model.get_residual_liq_concentration(self.oxelx, self.cumulate_modal, self.parent, fracts)
-        valy = self.model.get_residual_liq_concentration(self.oxely, self.cumulate_modal, self.parent, fracts)
+        idx, idy = self.model.oxel_list.index(self.oxelx), self.model.oxel_list.index(self.oxely)
+        residual = self.model.get_residual_liq_concentrations(self.cumulate_modal, self.parent, fracts)
+        valx, valy = residual[:, idx], residual[:, idy]
 
         if self.show_infos:
             for i in range(1, len(fracts)):
                 self.ax.annotate(str(round(fracts[i], 2)), (valx[i], valy[i]))
 
-        if max_extraction < 1 - self.alpha_step:
-            s_fracts = np.arange(fracts[-2] + self.alpha_step, 1.0, self.alpha_step)
-            s_valx = self.model.get_residual_liq_concentration(self.oxelx, self.cumulate_modal, self.parent, s_fracts)
-            s_valy = self.model.get_residual_liq_concentration(self.oxely, self.cumulate_modal, self.parent, s_fracts)
-
-        else:
-            s_fracts = np.arange(fracts[-2] + self.alpha_step, 1.0, self.alpha_step)
-            s_valx = self.model.get_residual_liq_concentration(self.oxelx, self.cumulate_modal, self.parent, s_fracts)
-            s_valy = self.model.get_residual_liq_concentration(self.oxely, self.cumulate_modal, self.parent, s_fracts)
+        s_fracts = np.arange(fracts[-2] + self.alpha_step, 1.0, self.alpha_step)
+        s_residual = self.model.get_residual_liq_concentrations(self.cumulate_modal, self.parent, s_fracts)
+        s_valx, s_valy = s_residual[:, idx], s_residual[:, idy]
 
         all_fracts = [*fracts, *s_fracts]
         all_valx = [*valx, *s_valx]
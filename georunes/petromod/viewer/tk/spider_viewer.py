@@ -2,7 +2,7 @@ import matplotlib.pyplot as plt
 from matplotlib.cm import ScalarMappable
 from matplotlib.colors import Normalize
 from georunes.petromod.viewer.tk.fract_viewer import FractViewerTk
-from georunes.tools.reservoirs import get_reservoir_norm
+from georunes.tools.reservoirs import NormalizationCache, get_reservoir_norm
 
 
 class SpiderViewerTk(FractViewerTk):
@@ -19,10 +19,11 @@ class SpiderViewerTk(FractViewerTk):
 
     def draw(self, element=None):
         list_elements = [el for el in self.model.list_elements() if el in self.initial_conc_elts]
-        concentration_func = self.model.get_phase_concentration_func(self.selected_phase)
-        for f in self.liq_fract_values:
-            values = [concentration_func(el, f, self.initial_conc) / self.norm[el] for el in list_elements]
-            self.ax.semilogy(list_elements, values, label='F={}'.format(f), color=self.cmap(f))
+        norm = NormalizationCache.get_instance().norm_vector(self.norm, list_elements)
+        values = self.model.concentration_array(self.selected_phase, self.liq_fract_values, self.initial_conc,
+                                                list_elements) / norm
+        for f, row in zip(self.liq_fract_values, values):
+            self.ax.semilogy(list_elements, row, label='F={}'.format(f), color=self.cmap(f))
         self.ax.set_ylabel('Normalized concentrations')
         self.ax.grid(axis='y', which='both', linestyle='-', color='#e8e8e8')
         if self.show_legend:
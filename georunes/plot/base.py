@@ -29,6 +29,7 @@ class DiagramBase:
 
         filemanager = FileManager.get_instance()
         self.data = filemanager.read_file(datasource, sheet_name=sheet)
+        self.source_data = self.data  # As loaded and shared with the other diagrams, before the exclusions
         self.check_parameters()  # Verify if some required data are present in file. Can be implemented in child classes
         self.title = title
         self.h_ratio = h_ratio
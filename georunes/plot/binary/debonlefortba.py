@@ -4,6 +4,7 @@ from matplotlib.colors import to_rgba
 from georunes.plot.base import DiagramBase
 from georunes.plot.helpers import LegendDrawer, ArrowDrawer
 from georunes.tools.chemistry import val_ox_to_mc
+from georunes.tools.classification import FieldClassifier, rectangle
 from georunes.tools.language import get_translator
 from georunes.tools.plotting import get_spline
 
@@ -11,7 +12,84 @@ from georunes.tools.plotting import get_spline
 # Debon, F. and Le Fort, P., 1983. A chemical–mineralogical classification of common plutonic rocks and associations.
 # Earth and Environmental Science Transactions of the Royal Society of Edinburgh, 73(3), pp.135-149.
 
+# Villaseca, C., Barbero, L. and Herreros, V., 1998. A re-examination of the typology of peraluminous granite types in
+# intracontinental orogenic belts. Earth and Environmental Science Transactions of the Royal Society of Edinburgh,
+# 89(2), pp.113-119.
+
+# Boundaries of the fields, as (x, y) lines
+debon_lines = [([0, 420], [0, -885]), ([0, 470], [0, -225]), ([0, 1500], [0, 0]), ([0, 600], [0, 250]),
+               ([0, 435], [0, 500])]
+
+# Points inside the fields, with their names, for the classification
+debon_fields = [(100, 150, "I"), (175, 150, "II"), (180, 25, "III"), (180, -25, "IV"), (75, -65, "V"),
+                (20, -75, "VI")]
+
+# The sectors are open, the frame of the classification being wider than the diagram
+debon_frame = (0, 2000, -2000, 2000)
+
+# Control points of the boundaries, drawn as splines
+villaseca_lines = [([0, 13, 29, 37, 36, 32, 30], [100, 102, 98, 87, 54, 25, 0]),
+                   ([29, 45, 57, 78], [98, 148, 176, 200]),
+                   ([36, 92, 145, 167, 200], [54, 44, 39, 42, 53]),
+                   ([32, 57, 82, 105, 130], [25, 21, 14, 8, 0])]
+
+villaseca_fields = [(75, 110, "hP"), (55, 40, "mP"), (50, 10, "lP"), (18, 60, "felsic")]
+
+villaseca_frame = (0, 200, 0, 200)
+
+
+def villaseca_splines():
+    """
+    Get the boundaries of the fields of Villaseca et al. (1998)
+    :return: the splines (list of (x, y) arrays)
+    """
+    return [get_spline(np.array(lx, dtype=float), np.array(ly, dtype=float)) for lx, ly in villaseca_lines]
+
+
+def ba_coordinates(data):
+    """
+    Get the multicationic parameters of samples
+    :return: B and A (Series)
+    """
+    al_mc = val_ox_to_mc(data["Al2O3"])
+    na_mc = val_ox_to_mc(data["Na2O"])
+    k_mc = val_ox_to_mc(data["K2O"])
+    ca_mc = val_ox_to_mc(data["CaO"])
+    fe_mc = val_ox_to_mc(data["Fe2O3"])
+    mg_mc = val_ox_to_mc(data["MgO"])
+    ti_mc = val_ox_to_mc(data["TiO2"])
+    return fe_mc + mg_mc + ti_mc, al_mc - na_mc - k_mc - 2 * ca_mc
+
+
 class DiagramBA(DiagramBase, ArrowDrawer, LegendDrawer):
+    _classifiers = dict()
+
+    @staticmethod
+    def classifier(decor_set="Debon"):
+        """
+        Get the classifier of the fields of a set of decorations, built once, the open boundaries being extended
+        :return: the classifier (FieldClassifier)
+        """
+        if decor_set not in DiagramBA._classifiers:
+            if decor_set == "Debon":
+                lines, fields, frame = debon_lines, debon_fields, debon_frame
+            elif decor_set == "Villaseca":
+                lines, fields, frame = villaseca_splines(), villaseca_fields, villaseca_frame
+            else:
+                raise ValueError("Parameter 'decor_set' must be 'Debon' or 'Villaseca'")
+            DiagramBA._classifiers[decor_set] = FieldClassifier(lines, fields, rectangle(*frame), extend=True)
+        return DiagramBA._classifiers[decor_set]
+
+    @staticmethod
+    def classify(data, decor_set="Debon"):
+        """
+        Classify samples in the fields of the diagram, without plotting
+        :param data: the samples (DataFrame)
+        :return: the names of the fields, NaN outside (Series)
+        """
+        return DiagramBA.classifier(decor_set).classify_series(*ba_coordinates(data), index=data.index,
+                                                               name=decor_set)
+
     def __init__(self, datasource, title="B-A multicationic classification (Debon and Le Fort 1983)",
                  annotation=None, decor_set="Debon",
                  legend_loc="upper right",
@@ -44,27 +122,8 @@ class DiagramBA(DiagramBase, ArrowDrawer, LegendDrawer):
 
         if self.decor_set is "Villaseca":
 
-            lx1 = np.array([0, 13, 29, 37, 36, 32, 30])
-            ly1 = np.array([100, 102, 98, 87, 54, 25, 0])
-
-            lx2 = np.array([29, 45, 57, 78])
-            ly2 = np.array([98, 148, 176, 200])
-
-            lx3 = np.array([36, 92, 145, 167, 200])
-            ly3 = np.array([54, 44, 39, 42, 53])
-
-            lx4 = np.array([32, 57, 82, 105, 130])
-            ly4 = np.array([25, 21, 14, 8, 0])
-
-            x1, y1 = get_spline(lx1, ly1)
-            x2, y2 = get_spline(lx2, ly2)
-            x3, y3 = get_spline(lx3, ly3)
-            x4, y4 = get_spline(lx4, ly4)
-
-            self.ax.plot(x1, y1, color=self.decor_line_col, linewidth=0.6)
-            self.ax.plot(x2, y2, color=self.decor_line_col, linewidth=0.6)
-            self.ax.plot(x3, y3, color=self.decor_line_col, linewidth=0.6)
-            self.ax.plot(x4, y4, color=self.decor_line_col, linewidth=0.6)
+            for lx, ly in villaseca_splines():
+                self.ax.plot(lx, ly, color=self.decor_line_col, linewidth=0.6)
 
             self.ax.text(75, 110, "hP", size='x-small')
             self.ax.text(55, 40, "mP", size='x-small')
@@ -73,26 +132,8 @@ class DiagramBA(DiagramBase, ArrowDrawer, LegendDrawer):
 
         else:  # Default decor_set is from Debon and Le Fort 1983
 
-            lx1 = np.array([0, 420])
-            ly1 = np.array([0, -885])
-
-            lx2 = np.array([0, 470])
-            ly2 = np.array([0, -225])
-
-            lx3 = np.array([0, 1500])
-            ly3 = np.array([0, 0])
-
-            lx4 = np.array([0, 600])
-            ly4 = np.array([0, 250])
-
-            lx5 = np.array([0, 435])
-            ly5 = np.array([0, 500])
-
-            self.ax.plot(lx1, ly1, color=self.decor_line_col, linewidth=0.6)
-            self.ax.plot(lx2, ly2, color=self.decor_line_col, linewidth=0.6)
-            self.ax.plot(lx3, ly3, color=self.decor_line_col, linewidth=0.6)
-            self.ax.plot(lx4, ly4, color=self.decor_line_col, linewidth=0.6)
-            self.ax.plot(lx5, ly5, color=self.decor_line_col, linewidth=0.6)
+            for lx, ly in debon_lines:
+                self.ax.plot(lx, ly, color=self.decor_line_col, linewidth=0.6)
 
             self.ax.text(100, 150, "I", size='x-small')
             self.ax.text(175, 150, "II", size='x-small')
@@ -110,16 +151,7 @@ class DiagramBA(DiagramBase, ArrowDrawer, LegendDrawer):
         for name, group in groups:
             if self.is_group_allowed(name):
 
-                al_mc = val_ox_to_mc(group["Al2O3"])
-                na_mc = val_ox_to_mc(group["Na2O"])
-                k_mc = val_ox_to_mc(group["K2O"])
-                ca_mc = val_ox_to_mc(group["CaO"])
-                fe_mc = val_ox_to_mc(group["Fe2O3"])
-                mg_mc = val_ox_to_mc(group["MgO"])
-                ti_mc = val_ox_to_mc(group["TiO2"])
-
-                param_A = al_mc - na_mc - k_mc - 2 * ca_mc
-                param_B = fe_mc + mg_mc + ti_mc
+                param_B, param_A = ba_coordinates(group)
 
                 label = list(group[self.label_column])[0] if self.label_defined else name
                 zorder = 4
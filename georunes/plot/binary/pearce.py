@@ -1,15 +1,53 @@
-import numpy as np
+from abc import abstractmethod, ABC
 from matplotlib.colors import to_rgba
 
 from georunes.plot.base import DiagramBase
 from georunes.plot.helpers import LegendDrawer, ArrowDrawer
+from georunes.tools.classification import FieldClassifier, rectangle
 from georunes.tools.language import get_translator
 
 
 # Pearce, J.A., Harris, N.B.W. and Tindle, A.G., 1984. Trace Element Discrimination Diagrams for the Tectonic
 # Interpretation of Granitic Rocks. Journal of Petrology, 25(4), pp.956-983.
 
-class PearceBase(DiagramBase, ArrowDrawer, LegendDrawer):
+class PearceBase(DiagramBase, ArrowDrawer, LegendDrawer, ABC):
+    # Boundaries of the fields as (x, y) lines, points inside the fields with their names, and the frame of the
+    # classification, defined by each diagram
+    field_lines = []
+    field_seeds = []
+    field_frame = None
+    _classifiers = dict()
+
+    @staticmethod
+    @abstractmethod
+    def coordinates(data):
+        """
+        Get the coordinates of samples in the diagram
+        :return: the abscissas and ordinates (Series)
+        """
+        pass
+
+    @classmethod
+    def classifier(cls):
+        """
+        Get the classifier of the fields of the diagram, built once, the boundaries being straight on the log axes
+        :return: the classifier (FieldClassifier)
+        """
+        if cls.__name__ not in PearceBase._classifiers:
+            PearceBase._classifiers[cls.__name__] = FieldClassifier(cls.field_lines, cls.field_seeds,
+                                                                    rectangle(*cls.field_frame), log=(True, True),
+                                                                    extend=True)
+        return PearceBase._classifiers[cls.__name__]
+
+    @classmethod
+    def classify(cls, data):
+        """
+        Classify samples in the fields of the diagram, without plotting
+        :param data: the samples (DataFrame)
+        :return: the names of the fields, NaN outside (Series)
+        """
+        return cls.classifier().classify_series(*cls.coordinates(data), index=data.index, name=cls.__name__)
+
     def __init__(self, datasource,
                  x_formatter=None, y_formatter=None,
                  alpha_color=0.4, alpha_edge_color=0.8,
@@ -47,6 +85,18 @@ class PearceBase(DiagramBase, ArrowDrawer, LegendDrawer):
 
 
 class DiagramPearceRYN(PearceBase, ArrowDrawer, LegendDrawer):
+    field_lines = [([2, 55], [80, 300]), ([55, 400], [300, 2000]), ([55, 51.5], [300, 8]), ([51.5, 50], [8, 1]),
+                   ([51.5, 2000], [8, 400])]
+    field_seeds = [(6.3, 756, "Syn-COLG"), (210, 260, "WPG"), (4.36, 2.6, "VAG"), (277, 5, "ORG")]
+    field_frame = (2, 2000, 1, 2000)
+
+    @staticmethod
+    def coordinates(data):
+        """
+        :return: Y + Nb and Rb (Series)
+        """
+        return data["Nb"] + data["Y"], data["Rb"]
+
     def __init__(self, datasource, title="Pearce : Rb vs Y + Nb",
                  xlim=(2, 2000), ylim=(1, 2000),
                  **kwargs
@@ -61,26 +111,8 @@ class DiagramPearceRYN(PearceBase, ArrowDrawer, LegendDrawer):
         PearceBase.set_decorations(self)
         _ = get_translator(self.lang_cfg)
 
-        lx1 = np.array([2, 55])
-        ly1 = np.array([80, 300])
-
-        lx2 = np.array([55, 400])
-        ly2 = np.array([300, 2000])
-
-        lx3 = np.array([55, 51.5])
-        ly3 = np.array([300, 8])
-
-        lx4 = np.array([51.5, 50])
-        ly4 = np.array([8, 1])
-
-        lx5 = np.array([51.5, 2000])
-        ly5 = np.array([8, 400])
-
-        self.ax.plot(lx1, ly1, self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx2, ly2, self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx3, ly3, self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx4, ly4, self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx5, ly5, self.decor_line_col, linewidth=0.6)
+        for lx, ly in self.field_lines:
+            self.ax.plot(lx, ly, color=self.decor_line_col, linewidth=0.6)
 
         self.ax.text(6.3, 756, _("Syn-COLG"), color=self.decor_text_col)
         self.ax.text(210, 260, _("WPG"), color=self.decor_text_col)
@@ -97,8 +129,7 @@ class DiagramPearceRYN(PearceBase, ArrowDrawer, LegendDrawer):
 
             if self.exclude_groups and name not in self.exclude_groups:
 
-                vx = group["Nb"] + group["Y"]
-                vy = group["Rb"]
+                vx, vy = self.coordinates(group)
 
                 label = list(group[self.label_column])[0] if self.label_defined else name
                 zorder = 4
@@ -118,6 +149,18 @@ class DiagramPearceRYN(PearceBase, ArrowDrawer, LegendDrawer):
 
 
 class DiagramPearceRYT(PearceBase, ArrowDrawer, LegendDrawer):
+    field_lines = [([6, 50], [200, 2000]), ([6, 6], [200, 8]), ([6, 6], [8, 1]), ([6, 200], [8, 400]),
+                   ([0.5, 6], [140, 200])]
+    field_seeds = [(5.5, 1210, "Syn-COLG"), (54, 479, "WPG"), (2, 1.4, "VAG"), (24, 1.4, "ORG")]
+    field_frame = (0.5, 200, 1, 2000)
+
+    @staticmethod
+    def coordinates(data):
+        """
+        :return: Yb + Ta and Rb (Series)
+        """
+        return data["Ta"] + data["Yb"], data["Rb"]
+
     def __init__(self, datasource, title="Pearce : Rb vs Yb + Ta",
                  xlim=(0.5, 200), ylim=(1, 2000),
                  **kwargs
@@ -132,26 +175,8 @@ class DiagramPearceRYT(PearceBase, ArrowDrawer, LegendDrawer):
         PearceBase.set_decorations(self)
         _ = get_translator(self.lang_cfg)
 
-        lx1 = np.array([6, 50])
-        ly1 = np.array([200, 2000])
-
-        lx2 = np.array([6, 6])
-        ly2 = np.array([200, 8])
-
-        lx3 = np.array([6, 6])
-        ly3 = np.array([8, 1])
-
-        lx4 = np.array([6, 200])
-        ly4 = np.array([8, 400])
-
-        lx5 = np.array([0.5, 6])
-        ly5 = np.array([140, 200])
-
-        self.ax.plot(lx1, ly1, self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx2, ly2, self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx3, ly3, self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx4, ly4, self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx5, ly5, self.decor_line_col, linewidth=0.6)
+        for lx, ly in self.field_lines:
+            self.ax.plot(lx, ly, color=self.decor_line_col, linewidth=0.6)
 
         self.ax.text(5.5, 1210, _("Syn-COLG"), color=self.decor_text_col)
         self.ax.text(54, 479, _("WPG"), color=self.decor_text_col)
@@ -168,8 +193,7 @@ class DiagramPearceRYT(PearceBase, ArrowDrawer, LegendDrawer):
 
             if self.exclude_groups and name not in self.exclude_groups:
 
-                vx = group["Ta"] + group["Yb"]
-                vy = group["Rb"]
+                vx, vy = self.coordinates(group)
 
                 label = list(group[self.label_column])[0] if self.label_defined else name
                 zorder = 4
@@ -188,6 +212,17 @@ class DiagramPearceRYT(PearceBase, ArrowDrawer, LegendDrawer):
 
 
 class DiagramPearceNY(PearceBase, ArrowDrawer, LegendDrawer):
+    field_lines = [([40, 50], [1, 10]), ([50, 1000], [10, 100]), ([1, 50], [2000, 10])]
+    field_seeds = [(2.3, 16.9, "Syn-COLG + VAG"), (57, 301, "WPG"), (277, 5, "ORG")]
+    field_frame = (1, 2000, 1, 2000)
+
+    @staticmethod
+    def coordinates(data):
+        """
+        :return: Y and Nb (Series)
+        """
+        return data["Y"], data["Nb"]
+
     def __init__(self, datasource, title="Pearce : Nb vs Y",
                  xlim=(1, 2000), ylim=(1, 2000),
                  **kwargs
@@ -202,22 +237,9 @@ class DiagramPearceNY(PearceBase, ArrowDrawer, LegendDrawer):
         PearceBase.set_decorations(self)
         _ = get_translator(self.lang_cfg)
 
-        lx1 = np.array([40, 50])
-        ly1 = np.array([1, 10])
-
-        lx2 = np.array([50, 1000])
-        ly2 = np.array([10, 100])
-
-        lx3 = np.array([1, 50])
-        ly3 = np.array([2000, 10])
-
-        lx4 = np.array([25, 1000])
-        ly4 = np.array([25, 400])
-
-        self.ax.plot(lx1, ly1, self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx2, ly2, self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx3, ly3, self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx4, ly4, color=self.decor_line_col, linewidth=0.6, linestyle='--')
+        for lx, ly in self.field_lines:
+            self.ax.plot(lx, ly, color=self.decor_line_col, linewidth=0.6)
+        self.ax.plot([25, 1000], [25, 400], color=self.decor_line_col, linewidth=0.6, linestyle='--')
 
         self.ax.text(2.3, 16.9, _("Syn-COLG") + " +\n" + _("VAG"), color=self.decor_text_col)
         self.ax.text(57, 301, _("WPG"), color=self.decor_text_col)
@@ -233,8 +255,7 @@ class DiagramPearceNY(PearceBase, ArrowDrawer, LegendDrawer):
 
             if self.exclude_groups and name not in self.exclude_groups:
 
-                vx = group["Y"]
-                vy = group["Nb"]
+                vx, vy = self.coordinates(group)
 
                 label = list(group[self.label_column])[0] if self.label_defined else name
                 zorder = 4
@@ -252,6 +273,18 @@ class DiagramPearceNY(PearceBase, ArrowDrawer, LegendDrawer):
 
 
 class DiagramPearceTY(PearceBase, ArrowDrawer, LegendDrawer):
+    field_lines = [([0.55, 3], [20, 2]), ([0.1, 3], [0.35, 2]), ([3, 5], [2, 1]), ([5, 5], [0.05, 1]),
+                   ([5, 100], [1, 7])]
+    field_seeds = [(0.16, 2.97, "Syn-COLG"), (4.8, 11.3, "WPG"), (1.03, 0.08, "VAG"), (16.2, 0.19, "ORG")]
+    field_frame = (0.1, 100, 0.05, 50)
+
+    @staticmethod
+    def coordinates(data):
+        """
+        :return: Yb and Ta (Series)
+        """
+        return data["Yb"], data["Ta"]
+
     def __init__(self, datasource, title="Pearce : Ta vs Yb",
                  xlim=(0.1, 100), ylim=(0.05, 50),
                  **kwargs
@@ -266,30 +299,9 @@ class DiagramPearceTY(PearceBase, ArrowDrawer, LegendDrawer):
         PearceBase.set_decorations(self)
         _ = get_translator(self.lang_cfg)
 
-        lx1 = np.array([0.55, 3])
-        ly1 = np.array([20, 2])
-
-        lx2 = np.array([0.1, 3])
-        ly2 = np.array([0.35, 2])
-
-        lx3 = np.array([3, 5])
-        ly3 = np.array([2, 1])
-
-        lx4 = np.array([5, 5])
-        ly4 = np.array([0.05, 1])
-
-        lx5 = np.array([5, 100])
-        ly5 = np.array([1, 7])
-
-        lx6 = np.array([3, 100])
-        ly6 = np.array([2, 20])
-
-        self.ax.plot(lx1, ly1, color=self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx2, ly2, color=self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx3, ly3, color=self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx5, ly5, color=self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx4, ly4, color=self.decor_line_col, linewidth=0.6)
-        self.ax.plot(lx6, ly6, color=self.decor_line_col, linewidth=0.6, linestyle='--')
+        for lx, ly in self.field_lines:
+            self.ax.plot(lx, ly, color=self.decor_line_col, linewidth=0.6)
+        self.ax.plot([3, 100], [2, 20], color=self.decor_line_col, linewidth=0.6, linestyle='--')
 
         self.ax.text(0.16, 2.97, _("Syn-COLG"))
         self.ax.text(4.8, 11.3, _("WPG"), )
@@ -306,8 +318,7 @@ class DiagramPearceTY(PearceBase, ArrowDrawer, LegendDrawer):
 
             if self.exclude_groups and name not in self.exclude_groups:
 
-                vx = group["Yb"]
-                vy = group["Ta"]
+                vx, vy = self.coordinates(group)
 
                 label = list(group[self.label_column])[0] if self.label_defined else name
                 zorder = 4
@@ -1,4 +1,3 @@
-from itertools import chain
 from math import sqrt
 import numpy as np
 from georunes.tools.chemistry import el_molar_mass as _mm
@@ -19,6 +18,13 @@ ratio_meq = {
 }
 
 
+# Conversion of (Ca, Mg, Na, K, HCO3, CO3, SO4, Cl) in mg/l to (Ca, Mg, Na + K, HCO3 + CO3, SO4, Cl) in meq/l
+piper_ions = ("Ca", "Mg", "Na", "K", "HCO3", "CO3", "SO4", "Cl")
+meq_matrix = np.zeros((8, 6))
+for _row, (_col, _ion) in enumerate(zip((0, 1, 2, 2, 3, 3, 4, 5), ratio_meq.keys())):
+    meq_matrix[_row, _col] = ratio_meq[_ion]
+
+
 def ions_mgl_to_meq(p):
     _ca, _mg, _na, _k, _hco, _co, _so, _cl = p
     ca = cations_mgl_to_meq((_ca, _mg, _na, _k))
@@ -73,41 +79,54 @@ def unzip(list_tuples):
 
 def project_sequence(seq, delta):
     """
-    Projects a point or sequence of points using `project_point`.
+    Projects a point or sequence of points using `project_array_piper`.
     Returns the points in coordinates as two lists xs and ys
     """
-    # Projection -> [ [[x1_cation, y1_cation], [x1_anion, y1_anion], [x1_diamond, y1_diamond]],
-    #                 [[x2_cation, y2_cation], [x2_anion, y2_anion], [x2_diamond, y2_diamond]], ... ]
-    projected = [project_points_piper(p, delta) for p in seq]
-
-    # Group by coordinates
-    #           -> [ [(x1_cation, x1_anion, x1_diamond), (y1_cation, y1_anion, y1_diamond)],
-    #                [(x2_cation, x2_anion, x2_diamond), (y2_cation, y2_anion, y2_diamond)], ... ]
-    list_tripoints = [unzip(pts) for pts in projected]
-
-    # Merge in unique list for each coordinate
-    #            -> [[x1_cation, x1_anion, x1_diamond, x2_cation, x2_anion, x2_diamond, ...],
-    #                [y1_cation, y1_anion, y1_diamond, y2_cation, , y2_anion, y2_diamond, ...]]
-    merged = [list(chain(*items)) for items in zip(*list_tripoints)]
-    return merged
+    # Projection -> [x1_cation, x1_anion, x1_diamond, x2_cation, x2_anion, x2_diamond, ...],
+    #               [y1_cation, y1_anion, y1_diamond, y2_cation, y2_anion, y2_diamond, ...]
+    xs, ys = project_array_piper(seq, delta).reshape(-1, 2).T
+    return [xs.tolist(), ys.tolist()]
 
 
 def project_points_piper(p, delta):
     """ Maps p = (ca, mg, na, k, hco3, co3, so, cl) coordinates to planar simplex. """
-    width = (1 - delta) / 2
-    ca, mg, nak, hco, so, cl = ions_mgl_to_meq(p)
+    return project_array_piper([p], delta)[0].tolist()
+
 
-    val_left = nak / (mg + ca + nak)
-    val_right = (so + cl) / (so + hco + cl)
+def ions_mgl_to_meq_array(values):
+    """
+    Converts arrays of (Ca, Mg, Na, K, HCO3, CO3, SO4, Cl) in mg/l to (Ca, Mg, Na + K, HCO3 + CO3, SO4, Cl) in meq/l
+    with one matrix product, values being a (n x 8) array
+    """
+    return np.asarray(values, dtype=float) @ meq_matrix
 
-    tx = diamond_ox(delta) + val_left * width * COS60 + val_right * width * COS60
-    ty = diamond_oy(delta) + width * val_left * (-1) * SIN60 + width * val_right * SIN60
-    lx = width * (COS60 * (2 * nak + mg) / (mg + ca + nak))
-    ly = width * SIN60 * mg / (mg + ca + nak)
-    rx = width + delta + width * (COS60 * (2 * cl + so) / (so + hco + cl))
-    ry = width * SIN60 * so / (so + hco + cl)
 
-    return [[lx, ly], [rx, ry], [tx, ty]]
+def piper_projection(delta):
+    """
+    Get the linear map of the proportions (Ca, Mg, Na + K, HCO3 + CO3, SO4, Cl) of the cations and anions to the
+    coordinates (x_cation, y_cation, x_anion, y_anion, x_diamond, y_diamond), and its offset
+    """
+    width = (1 - delta) / 2
+    matrix = np.zeros((6, 6))
+    matrix[1] = [width * COS60, width * SIN60, 0, 0, 0, 0]  # Mg, top of the cations triangle
+    matrix[2] = [width, 0, 0, 0, width * COS60, -width * SIN60]  # Na + K, right of the cations triangle
+    matrix[4] = [0, 0, width * COS60, width * SIN60, width * COS60, width * SIN60]  # SO4, top of the anions triangle
+    matrix[5] = [0, 0, width, 0, width * COS60, width * SIN60]  # Cl, right of the anions triangle
+    offset = np.array([0, 0, width + delta, 0, diamond_ox(delta), diamond_oy(delta)])
+    return matrix, offset
+
+
+def project_array_piper(values, delta):
+    """
+    Maps arrays of (ca, mg, na, k, hco3, co3, so, cl) in mg/l, values being a (n x 8) array, to the cations triangle,
+    the anions triangle and the diamond.
+    Returns the coordinates as a (n x 3 x 2) array, NaN if the ions are missing.
+    """
+    meq = ions_mgl_to_meq_array(values).reshape(-1, 2, 3)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        proportions = (meq / meq.sum(axis=2, keepdims=True)).reshape(-1, 6)
+    matrix, offset = piper_projection(delta)
+    return (proportions @ matrix + offset).reshape(-1, 3, 2)
 
 
 def project_ions_diamond(p, delta, drift=None):
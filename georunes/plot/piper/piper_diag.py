@@ -1,9 +1,11 @@
 import math
 import matplotlib.pyplot as plt
-from matplotlib.colors import to_rgba
+import pandas as pd
+from matplotlib.colors import to_rgba_array
 
 from georunes.plot.base import DiagramBase
 from georunes.plot.helpers import LegendDrawer
+from georunes.plot.piper.helpers import piper_ions
 from georunes.plot.piper.piper_axe_subplot import PiperAxesSubplot
 from georunes.tools.plotting import normalize_marker_size
 
@@ -102,15 +104,14 @@ class DiagramPiper(DiagramBase, LegendDrawer):
                 if self.zorder_column:
                     zorder = list(group[self.zorder_column])[0]
 
-                # Convert points to tuples
-                points = [(group["Ca"].get(i), group["Mg"].get(i), group["Na"].get(i), group["K"].get(i),
-                           group["HCO3"].get(i), group["CO3"].get(i), group["SO4"].get(i), group["Cl"].get(i))
-                          for i, sample in group["Ca"].items()]
+                # Compositions as a (n x 8) array, projected at once
+                values = group[list(piper_ions)].to_numpy(dtype=float)
 
-                sample_color = to_rgba(list(group[self.color_column])[0], alpha=self.alpha_color)
-                edge_color = to_rgba(list(group[self.color_column])[0], alpha=self.alpha_edge_color)
-                self.pax.scatter(points, edgecolors=edge_color,
-                                 marker=marker, label=label, facecolors=sample_color, s=size,
+                codes, colors = pd.factorize(group[self.color_column])
+                sample_colors = to_rgba_array(list(colors), alpha=self.alpha_color)[codes]
+                edge_colors = to_rgba_array(list(colors), alpha=self.alpha_edge_color)[codes]
+                self.pax.scatter(values, edgecolors=edge_colors,
+                                 marker=marker, label=label, facecolors=sample_colors, s=size,
                                  zorder=zorder)
 
         self.plot_legend()
@@ -1,7 +1,14 @@
+import numpy as np
 from matplotlib import pyplot
+from matplotlib.colors import to_rgba_array
 from georunes.plot.piper import helpers as pip
-from georunes.plot.piper.helpers import split_by_field
-from georunes.tools.data import repeat_list
+
+
+def _repeat_by_field(values, nb_points):
+    """ Repeat per-point values for the three fields of each point, the other values being kept """
+    if values is not None and np.ndim(values) > 0 and len(values) == nb_points:
+        return np.repeat(np.asarray(values), 3, axis=0)
+    return values
 
 
 def scatter(points, delta, ax=None, edgecolors=None, facecolors=None, **kwargs):
@@ -10,14 +17,14 @@ def scatter(points, delta, ax=None, edgecolors=None, facecolors=None, **kwargs):
 
     Parameters
     ----------
-    points: List of 3-tuples
-        The list of tuples to be scatter-plotted.
+    points: List of 8-tuples, or array (n x 8)
+        The compositions (Ca, Mg, Na, K, HCO3, CO3, SO4, Cl) in mg/l to be scatter-plotted.
     ax: PiperAxesSubplot, None
         The subplot to draw on.
     edgecolors :
-        Colors of the marker's edges
+        Colors of the marker's edges, single or per point
     facecolors :
-        Colors for filling the markers
+        Colors for filling the markers, single or per point
     delta:
         The space separating the triangles (considering that the width of the diagram is scaled to 1).
     kwargs:
@@ -25,8 +32,15 @@ def scatter(points, delta, ax=None, edgecolors=None, facecolors=None, **kwargs):
     """
     if not ax:
         fig, ax = pyplot.subplots()
-    xs, ys = pip.project_sequence(points, delta=delta)
-    ax.scatter(xs, ys, edgecolors=repeat_list(edgecolors, len(xs)), facecolors=repeat_list(facecolors,  len(xs)),  **kwargs)
+    coords = pip.project_array_piper(points, delta=delta)
+    nb_points = len(coords)
+    if edgecolors is not None:
+        edgecolors = _repeat_by_field(to_rgba_array(edgecolors), nb_points)
+    if facecolors is not None:
+        facecolors = _repeat_by_field(to_rgba_array(facecolors), nb_points)
+    if 's' in kwargs:
+        kwargs['s'] = _repeat_by_field(kwargs['s'], nb_points)
+    ax.scatter(coords[..., 0].ravel(), coords[..., 1].ravel(), edgecolors=edgecolors, facecolors=facecolors, **kwargs)
     return ax
 
 
@@ -36,8 +50,9 @@ def plot(points, delta, ax=None, **kwargs):
 
     Parameters
     ----------
-    points: List of 3-tuples
-        The list of tuples to be plotted as a connected curve.
+    points: List of 8-tuples, or array (n x 8)
+        The compositions (Ca, Mg, Na, K, HCO3, CO3, SO4, Cl) in mg/l to be plotted as a connected curve in each
+        field.
     delta:
     ax: PiperAxesSubplot, None
         The subplot to draw on.
@@ -46,8 +61,7 @@ def plot(points, delta, ax=None, **kwargs):
     """
     if not ax:
         fig, ax = pyplot.subplots()
-    xs, ys = pip.project_sequence(points, delta)
-    splitted = split_by_field(xs, ys)
-    for xsp, ysp in splitted:
-        ax.plot(xsp, ysp, **kwargs)
+    coords = pip.project_array_piper(points, delta)
+    for field in range(3):  # Cations triangle, anions triangle and diamond
+        ax.plot(coords[:, field, 0], coords[:, field, 1], **kwargs)
     return ax
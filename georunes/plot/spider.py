@@ -1,11 +1,13 @@
 import warnings
+import numpy as np
+import pandas as pd
 import matplotlib.patches as patches
 import matplotlib.pyplot as plt
 from matplotlib import lines
+from matplotlib.collections import LineCollection
+from matplotlib.colors import to_rgba_array
 from georunes.plot.base import DiagramBase
-from georunes.tools.chemistry import val_ox_to_el_ppm, name_el_to_def_ox
-from georunes.tools.data import row_min, row_max
-from georunes.tools.reservoirs import Reservoirs, get_reservoir_norm
+from georunes.tools.reservoirs import Reservoirs, NormalizationCache, get_reservoir_norm
 
 listing_ree = ["La", "Ce", "Pr", "Nd", "Sm", "Eu", "Gd", "Tb", "Dy", "Ho", "Er", "Tm", "Yb", "Lu"]
 
@@ -91,100 +93,81 @@ class DiagramSpider(DiagramBase):
             return True
         return False
 
+    def normalized_values(self):
+        """
+        Get the concentrations of the samples normalized to the reservoir, from the normalization cache shared with
+        the other diagrams of the same data
+        :return: the normalized concentrations (array, samples x elements of the listing)
+        """
+        cache = NormalizationCache.get_instance()
+        if self.source_data is not self.data and self.source_data.index.is_unique:
+            rows = self.source_data.index.get_indexer(self.data.index)
+            if (rows >= 0).all():
+                return cache.normalized(self.source_data, self.listing, self.norm)[rows]
+        return cache.normalized(self.data, self.listing, self.norm)
+
     def plot(self):
         DiagramBase.plot_config(self)
         self.set_decoration()
 
-        d_min = dict()
-        d_max = dict()
+        # Categories of the x axis, as positions for the collections
+        positions = np.arange(len(self.listing))
+        values = self.normalized_values()
 
         # Draw spectras
         groups = self.data.groupby(self.group_name)
         legend_cfg = []
         legend_cfg_labels = []
         legend_list = []
+        lw = 0.3  # Linewidth
 
-        for name, group in groups:
+        for name, rows in groups.indices.items():
             if self.is_group_allowed(name):
                 if self.is_group_enclosed(name):
                     custom_fillmode = 'enclosed'
                 else:
                     custom_fillmode = self.fillmode
 
-                last = None
-                label = list(group[self.label_column])[0] if self.label_defined else name
-                min_vals = [None] * len(self.listing)  # Trick to deal with missing value
-                max_vals = [None] * len(self.listing)
-                lw = 0.3  # Linewidth
-
-                for index, row in group.iterrows():
-                    vals, calc_val = [], []
-                    drow = row.to_dict()
-                    for elt in self.listing:
-                        if elt in drow.keys():
-                            calc_val = drow[elt] / self.norm[elt]
-                        elif elt in name_el_to_def_ox.keys():
-                            ox = name_el_to_def_ox[elt]
-                            calc_val = val_ox_to_el_ppm(drow[ox], ox) / self.norm[elt]
-
-                        vals.append(calc_val)
-                        if calc_val:
-                            if elt in d_min.keys():
-                                d_min[elt] = min(d_min[elt], calc_val)
-                            else:
-                                d_min[elt] = calc_val
-
-                            if elt in d_max.keys():
-                                d_max[elt] = max(d_max[elt], calc_val)
-                            else:
-                                d_max[elt] = calc_val
-
-                    zorder = None
-                    if self.zorder_column:
-                        zorder = list(group[self.zorder_column])[0]
-                    if custom_fillmode in ("enclosed-lines", "mixed", "enclosed"):
-                        min_vals = row_min(min_vals, vals)
-                        max_vals = row_max(max_vals, vals)
-                    mark = list(group[self.marker_column])[0]
-                    marker_edge_w = None
-                    if mark in ("+", "x"):
-                        marker_edge_w = 3
-
-                    if custom_fillmode in ("enclosed-lines", "lines"):
-                        last, = self.ax.semilogy(self.listing, vals, markersize=0,
-                                                 c=drow[self.color_column],
-                                                 mec=drow[self.color_column],
-                                                 linewidth=lw,
-                                                 alpha=0.8,
-                                                 label=label, zorder=zorder
-                                                 )
-
-                    elif custom_fillmode in ('marked-lines', 'mixed'):
-                        last, = self.ax.semilogy(self.listing,
-                                                 vals,
-                                                 c=drow[self.color_column],
-                                                 mec=drow[self.color_column],
-                                                 marker=mark,
-                                                 linewidth=lw,
-                                                 markeredgewidth=marker_edge_w,
-                                                 alpha=0.8,
-                                                 label=label,
-                                                 markersize=self.markersize,
-                                                 zorder=zorder)
-
-                    elif custom_fillmode == "enclosed":  # Fake draw to deal with figure canvas
-                        last, = self.ax.semilogy(self.listing, vals,
-                                                 linewidth=0, zorder=zorder
-                                                 )
+                group = self.data.iloc[rows]
+                group_vals = values[rows]
+                label = group[self.label_column].iloc[0] if self.label_defined else name
+                color = group[self.color_column].iloc[0]
+                codes, uniques = pd.factorize(group[self.color_column])
+                colors = to_rgba_array(list(uniques))[codes]  # Each colour converted once
+                mark = group[self.marker_column].iloc[0]
+                marker_edge_w = None
+                if mark in ("+", "x"):
+                    marker_edge_w = 3
+
+                zorder = None
+                if self.zorder_column:
+                    zorder = group[self.zorder_column].iloc[0]
+
+                if custom_fillmode != "enclosed":
+                    segments = np.stack(np.broadcast_arrays(positions, group_vals), axis=-1)
+                    self.ax.add_collection(LineCollection(segments, colors=colors, linewidths=lw, alpha=0.8,
+                                                          label=label, zorder=zorder))
+
+                if custom_fillmode in ('marked-lines', 'mixed'):
+                    self.ax.scatter(np.tile(positions, len(rows)), group_vals.ravel(),
+                                    c=np.repeat(colors, len(positions), axis=0), marker=mark, s=self.markersize ** 2,
+                                    linewidths=marker_edge_w if marker_edge_w else plt.rcParams['lines.markeredgewidth'],
+                                    alpha=0.8, zorder=zorder)
+                    last = lines.Line2D((0, 0), (0, 0), c=color, mec=color, marker=mark, linewidth=lw,
+                                        markeredgewidth=marker_edge_w, alpha=0.8, markersize=self.markersize)
+                else:
+                    last = lines.Line2D((0, 0), (0, 0), c=color, linewidth=lw, alpha=0.8)
 
                 if custom_fillmode in ("enclosed", "enclosed-lines", "mixed"):
-                    self.ax.fill_between(self.listing, min_vals, max_vals, facecolor=list(group[self.color_column])[0],
-                                         zorder=zorder,
-                                         alpha=0.25)
+                    with warnings.catch_warnings():  # Elements missing in the whole group
+                        warnings.simplefilter("ignore", RuntimeWarning)
+                        min_vals = np.nanmin(group_vals, axis=0)
+                        max_vals = np.nanmax(group_vals, axis=0)
+                    self.ax.fill_between(positions, min_vals, max_vals, facecolor=color, zorder=zorder, alpha=0.25)
 
                     # For legend
-                    pseudo_square = patches.Rectangle((0, 0), 0, 0, facecolor=list(group[self.color_column])[0], alpha=0.25)
-                    pseudo_line = lines.Line2D((0, 0), (0, 0), linewidth=lw * 1.8, c=drow[self.color_column], )
+                    pseudo_square = patches.Rectangle((0, 0), 0, 0, facecolor=color, alpha=0.25)
+                    pseudo_line = lines.Line2D((0, 0), (0, 0), linewidth=lw * 1.8, c=color, )
 
                 if name not in legend_list:
                     legend_cfg_labels.append(label)
@@ -201,6 +184,9 @@ class DiagramSpider(DiagramBase):
                     legend_list.append(name)
 
         self.plot_reservoirs(legend_cfg, legend_list, legend_cfg_labels)
+        self.ax.set_yscale('log')
+        self.ax.set_xticks(positions, self.listing)
+        self.ax.autoscale_view()
         self.plot_legend(legend_cfg, legend_cfg_labels)
 
     def plot_reservoirs(self, legend_cfg, legend_list, legend_cfg_labels):
@@ -215,11 +201,9 @@ class DiagramSpider(DiagramBase):
                 else :
                     label = res.get_label(model)
 
-                vals = []
-                for val in self.listing:
-                    vals.append(compo[val] / self.norm[val])
+                vals = NormalizationCache.get_instance().normalized(compo, self.listing, self.norm)[0]
 
-                last, = self.ax.semilogy(self.listing, vals,
+                last, = self.ax.semilogy(np.arange(len(self.listing)), vals,
                                          c=res.get_color(model), marker="o", markersize=2,
                                          linewidth=1.5, alpha=0.8,
                                          label=label)
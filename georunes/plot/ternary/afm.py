@@ -1,9 +1,6 @@
-from matplotlib.colors import to_rgba
-
 from georunes.plot.helpers import ArrowDrawerTernary
 from georunes.plot.ternary.ternbase import DiagramTernaryBase
 from georunes.tools.language import get_translator
-from georunes.tools.plotting import normalize_marker_size
 
 
 # Irvine, T.N. and Baragar, W.R.A., 1971. A Guide to the Chemical Classification of the Common Volcanic Rocks.
@@ -47,42 +44,6 @@ class DiagramAFM(DiagramTernaryBase, ArrowDrawerTernary):
                 left_var = group['Na2O'] + group['K2O']
                 right_var = group['MgO']
 
-                var_sum = top_var + left_var + right_var
-                norm_z = 100 * left_var / var_sum
-                norm_x = 100 * right_var / var_sum
-                norm_y = 100 * top_var / var_sum
-
-                if self.marker != '':
-                    marker = self.marker
-                else:
-                    marker = list(group[self.marker_column])[0]
-
-                if self.marker_size_scaled():
-                    size = normalize_marker_size(group[self.markersize['var_scale']], self.markersize['val_max'],
-                                                 self.markersize['val_min'], self.markersize['size_max'],
-                                                 self.markersize['size_min'])
-                else:
-                    size = self.markersize
-
-                points = []
-                for i, sample in top_var.items():
-                    pos = (norm_x.get(i), norm_y.get(i), norm_z.get(i))
-                    points.append(pos)
-
-                label = list(group[self.label_column])[0] if self.label_defined else name
-                zorder = 4
-                if self.zorder_column:
-                    zorder = list(group[self.zorder_column])[0]
-
-                sample_color = to_rgba(list(group[self.color_column])[0], alpha=self.alpha_color)
-                edge_color = to_rgba(list(group[self.color_column])[0], alpha=self.alpha_edge_color)
-                self.tax.scatter(points, edgecolors=edge_color,
-                                 marker=marker, label=label, facecolors=sample_color, s=size,
-                                 zorder=zorder)
-
-                if self.annotation:
-                    for i, sample in top_var.items():
-                        self.tax.annotate(group[self.annotation].get(i), (norm_x.get(i), norm_y.get(i)),
-                                          fontsize='xx-small')
+                self.scatter_group(group, name, top_var, left_var, right_var, zorder=4)
 
         self.plot_legend()
@@ -1,13 +1,11 @@
 import math
 import numpy as np
-from matplotlib.colors import to_rgba
 
 from georunes.plot.helpers import ArrowDrawerTernary
 from georunes.plot.ternary.ternbase import DiagramTernaryBase
 from georunes.tools.chemistry import molar_ratio, molar_ratio_specified
 from georunes.tools.language import format_chemical_formula as _fml
 from georunes.tools.language import get_translator
-from georunes.tools.plotting import normalize_marker_size
 
 sin60 = math.sqrt(3) / 2
 tan30 = 1 / math.sqrt(3)
@@ -104,41 +102,7 @@ class DiagramNesbittYoung(DiagramTernaryBase, ArrowDrawerTernary):
 
                 right_var = molar_ratio(group['K2O'])
 
-                var_sum = top_var + left_var + right_var
-                norm_z = 100 * left_var / var_sum
-                norm_x = 100 * right_var / var_sum
-                norm_y = 100 * top_var / var_sum
-
-                if self.marker != '':
-                    marker = self.marker
-                else:
-                    marker = list(group[self.marker_column])[0]
-
-                if self.marker_size_scaled():
-                    size = normalize_marker_size(group[self.markersize['var_scale']], self.markersize['val_max'],
-                                                 self.markersize['val_min'], self.markersize['size_max'],
-                                                 self.markersize['size_min'])
-                else:
-                    size = self.markersize
-
-                # Convert points to tuples
-                points = [(norm_x.get(i), norm_y.get(i), norm_z.get(i)) for i, sample in top_var.items()]
-
-                label = list(group[self.label_column])[0] if self.label_defined else name
-                zorder = 4
-                if self.zorder_column:
-                    zorder = list(group[self.zorder_column])[0]
-
-                sample_color = to_rgba(list(group[self.color_column])[0], alpha=self.alpha_color)
-                edge_color = to_rgba(list(group[self.color_column])[0], alpha=self.alpha_edge_color)
-                self.tax.scatter(points, edgecolors=edge_color,
-                                 marker=marker, label=label, facecolors=sample_color, s=size,
-                                 zorder=zorder)
-
-                if self.annotation:
-                    for i, sample in group[self.top_var].items():
-                        self.tax.annotate(group[self.annotation].get(i), (norm_x.get(i), norm_y.get(i)),
-                                          fontsize='xx-small')
+                self.scatter_group(group, name, top_var, left_var, right_var, zorder=4)
 
         self.plot_arrows()
         self.fig.subplots_adjust(right=0.92)
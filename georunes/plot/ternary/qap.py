@@ -1,9 +1,10 @@
-from matplotlib.colors import to_rgba
+import numpy as np
 
 from georunes.plot.helpers import ArrowDrawerTernary
 from georunes.plot.ternary.ternbase import DiagramTernaryBase
+from georunes.tools.classification import FieldClassifier
 from georunes.tools.language import get_translator
-from georunes.tools.plotting import normalize_marker_size
+from georunes.tools.plotting import tern_array_to_bin_coords, sin60
 
 
 # Streckeisen, A., 1974. Classification and nomenclature of plutonic rocks recommendations of the IUGS subcommission
@@ -12,7 +13,118 @@ from georunes.tools.plotting import normalize_marker_size
 # Volcanic Rocks, Lamprophyres, Carbonatites and Melilite Rocks. Recommendations and Suggestions. Neues Jahrbuch fur
 # Mineralogie. Stuttgart. Abhandlungen, 143, pp.1-14.
 
+def qap_lines(decor_set="Plut"):
+    """
+    Get the boundaries of the fields, the points being given as right, top and left variables
+    :param decor_set: the set of decorations, 'Plut' or 'Volc'
+    :return: the start and end points of the lines, with whether they are dashed (list of tuples)
+    """
+    p01 = (80, 20, 0)
+    p02 = (0, 20, 80)
+
+    p21 = (40, 60, 0)
+    p22 = (0, 60, 40)
+
+    p31 = (10, 90, 0)
+    p32 = (0, 90, 10)
+
+    p41 = (40 * 0.1, 60, 40 * 0.9)
+    p42 = (10, 0, 90)
+
+    p51 = (80 * 0.35, 20, 80 * 0.65)
+    p52 = (35, 00, 65)
+
+    p61 = (40 * 0.65, 60, 40 * 0.35)
+    p62 = (65, 00, 35)
+
+    p621 = (40 * 0.65, 60, 40 * 0.35)
+    p622 = (80 * 0.65, 20, 80 * 0.35)
+
+    if decor_set == "Plut":
+        p11 = (95, 5, 0)
+        p12 = (0, 5, 95)
+
+        q51 = (60 * 0.35, 40, 60 * 0.65)
+        q52 = (80 * 0.35, 20, 80 * 0.65)
+
+        p71 = (40 * 0.9, 60, 40 * 0.1)
+        p72 = (90, 00, 10)
+
+    elif decor_set == "Volc":
+        p11 = (0, 5, 95)
+        p12 = (65 * 0.95, 5, 35 * 0.95)
+
+        q51 = (40 * 0.35, 60, 40 * 0.65)
+        q52 = (80 * 0.35, 20, 80 * 0.65)
+
+        p71 = (80 * 0.9, 20, 80 * 0.1)
+        p72 = (40 * 0.9, 60, 40 * 0.1)
+
+    else:
+        raise ValueError("Parameter 'decor_set' must be 'Plut' or 'Volc'")
+
+    lines = [(p01, p02, False), (p11, p12, False), (p21, p22, False), (p31, p32, False), (p41, p42, False),
+             (p51, p52, False), (q51, q52, True), (p61, p62, False)]
+    dashed = decor_set == "Volc"
+    return lines + [(p621, p622, dashed), (p71, p72, dashed)]
+
+
+# Points inside the fields, as right, top and left variables, with their names, for the classification. The fields
+# split by dashed lines only are classified as a whole.
+qap_fields = {
+    "Plut": [
+        (2, 95, 3, "quartzolite"), (15, 75, 10, "quartz-rich granitoid"), (2, 40, 58, "alkali feldspar granite"),
+        (25, 40, 35, "granite"), (48, 40, 12, "granodiorite"), (58, 40, 2, "tonalite"),
+        (2, 12, 86, "quartz alkali feldspar syenite"), (21, 10, 69, "quartz syenite"), (45, 10, 45, "quartz monzonite"),
+        (69, 10, 21, "quartz monzodiorite/monzogabbro"), (87, 12, 1, "quartz diorite/gabbro"),
+        (2, 2, 96, "alkali feldspar syenite"), (20, 2, 78, "syenite"), (49, 2, 49, "monzonite"),
+        (75, 2, 23, "monzodiorite/monzogabbro"), (97, 2, 1, "diorite/gabbro"),
+    ],
+    "Volc": [
+        (2, 40, 58, "alkali feldspar rhyolite"), (25, 40, 35, "rhyolite"), (52, 40, 8, "dacite"),
+        (2, 12, 86, "quartz alkali feldspar trachyte"), (21, 10, 69, "quartz trachyte"), (42, 10, 48, "quartz latite"),
+        (75, 8, 17, "basalt/andesite"), (2, 2, 96, "alkali feldspar trachyte"), (20, 2, 78, "trachyte"),
+        (43, 2, 55, "latite"),
+    ],
+}
+
+
+def qap_coordinates(data):
+    """
+    Get the coordinates of samples on the plane of the diagram
+    :return: the abscissas and ordinates (arrays)
+    """
+    coords = tern_array_to_bin_coords(data[['Pnorm', 'Qnorm', 'Anorm']].to_numpy(dtype=float))
+    return coords[:, 0], coords[:, 1]
+
+
 class DiagramQAP(DiagramTernaryBase, ArrowDrawerTernary):
+    _classifiers = dict()
+
+    @staticmethod
+    def classifier(decor_set="Plut"):
+        """
+        Get the classifier of the fields of a set of decorations, built once on the plane of the diagram
+        :return: the classifier (FieldClassifier)
+        """
+        if decor_set not in DiagramQAP._classifiers:
+            lines = [tern_array_to_bin_coords([start, end]).T for start, end, dashed in qap_lines(decor_set)
+                     if not dashed]
+            seeds = [(*tern_array_to_bin_coords([point[:3]])[0], point[3]) for point in qap_fields[decor_set]]
+            frame = np.array([[0, 0], [100, 0], [50, 100 * sin60], [0, 0]])
+            DiagramQAP._classifiers[decor_set] = FieldClassifier(lines, seeds, frame)
+        return DiagramQAP._classifiers[decor_set]
+
+    @staticmethod
+    def classify(data, decor_set="Plut"):
+        """
+        Classify samples in the fields of the diagram, without plotting
+        :param data: the samples, with the columns Qnorm, Anorm and Pnorm (DataFrame)
+        :return: the names of the fields, NaN outside (Series)
+        """
+        return DiagramQAP.classifier(decor_set).classify_series(*qap_coordinates(data), index=data.index,
+                                                                name=decor_set)
+
     def __init__(self, datasource, title="QAP ternary diagram", decor_set="Plut", decor_text_col="#777777", **kwargs):
         if decor_set not in ("Plut", "Volc"):
             raise ValueError("Parameter 'decor_set' must be 'Plut' or 'Volc'")
@@ -41,61 +153,10 @@ class DiagramQAP(DiagramTernaryBase, ArrowDrawerTernary):
 
     def set_decoration(self, ):
         _ = get_translator(self.lang_cfg)
-        # Order for points : right var, top var, left var
-        p01 = (80, 20, 0)
-        p02 = (0, 20, 80)
-
-        p21 = (40, 60, 0)
-        p22 = (0, 60, 40)
-
-        p31 = (10, 90, 0)
-        p32 = (0, 90, 10)
-
-        p41 = (40 * 0.1, 60, 40 * 0.9)
-        p42 = (10, 0, 90)
-
-        p51 = (80 * 0.35, 20, 80 * 0.65)
-        p52 = (35, 00, 65)
-
-        p61 = (40 * 0.65, 60, 40 * 0.35)
-        p62 = (65, 00, 35)
-
-        p621 = (40 * 0.65, 60, 40 * 0.35)
-        p622 = (80 * 0.65, 20, 80 * 0.35)
+        for start, end, dashed in qap_lines(self.decor_set):
+            self.tax.line(start, end, linewidth=1, linestyle="--" if dashed else "-", color=self.decor_line_col)
 
         if self.decor_set == "Plut":
-            p11 = (95, 5, 0)
-            p12 = (0, 5, 95)
-
-            q51 = (60 * 0.35, 40, 60 * 0.65)
-            q52 = (80 * 0.35, 20, 80 * 0.65)
-
-            p71 = (40 * 0.9, 60, 40 * 0.1)
-            p72 = (90, 00, 10)
-
-        elif self.decor_set == "Volc":
-            p11 = (0, 5, 95)
-            p12 = (65 * 0.95, 5, 35 * 0.95)
-
-            q51 = (40 * 0.35, 60, 40 * 0.65)
-            q52 = (80 * 0.35, 20, 80 * 0.65)
-
-            p71 = (80 * 0.9, 20, 80 * 0.1)
-            p72 = (40 * 0.9, 60, 40 * 0.1)
-
-        self.tax.line(p01, p02, linewidth=1, color=self.decor_line_col)
-        self.tax.line(p11, p12, linewidth=1, color=self.decor_line_col)
-        self.tax.line(p21, p22, linewidth=1, color=self.decor_line_col)
-        self.tax.line(p31, p32, linewidth=1, color=self.decor_line_col)
-        self.tax.line(p41, p42, linewidth=1, color=self.decor_line_col)
-        self.tax.line(p51, p52, linewidth=1, color=self.decor_line_col)
-        self.tax.line(q51, q52, linewidth=1, linestyle="--", color=self.decor_line_col)
-        self.tax.line(p61, p62, linewidth=1, color=self.decor_line_col)
-
-        if self.decor_set == "Plut":
-            self.tax.line(p621, p622, linewidth=1, color=self.decor_line_col)
-            self.tax.line(p71, p72, linewidth=1, color=self.decor_line_col)
-
             # right, top
             self.tax.annotate(_("granite"), (12, 50), fontsize="small", color=self.decor_text_col)
             self.tax.annotate(_("syeno-\ngranite"), (12, 25), fontsize="small", color=self.decor_text_col)
@@ -113,8 +174,6 @@ class DiagramQAP(DiagramTernaryBase, ArrowDrawerTernary):
                               color=self.decor_text_col)
 
         if self.decor_set == "Volc":
-            self.tax.line(p621, p622, linewidth=1, linestyle="--", color=self.decor_line_col)
-            self.tax.line(p71, p72, linewidth=1, linestyle="--", color=self.decor_line_col)
             # right, top
             self.tax.annotate(_("rhyolite"), (14, 42), fontsize="small", color=self.decor_text_col)
             self.tax.annotate(_("quartz-\ntrachyte"), (23, 10), fontsize="small", ha='center',
@@ -136,41 +195,7 @@ class DiagramQAP(DiagramTernaryBase, ArrowDrawerTernary):
         for name, group in groups:
 
             if self.is_group_allowed(name):
-                var_sum = group[self.top_var] + group[self.left_var] + group[self.right_var]
-                norm_z = 100 * group[self.left_var] / var_sum
-                norm_x = 100 * group[self.right_var] / var_sum
-                norm_y = 100 * group[self.top_var] / var_sum
-
-                if self.marker != '':
-                    marker = self.marker
-                else:
-                    marker = list(group[self.marker_column])[0]
-
-                if self.marker_size_scaled():
-                    size = normalize_marker_size(group[self.markersize['var_scale']], self.markersize['val_max'],
-                                                 self.markersize['val_min'], self.markersize['size_max'],
-                                                 self.markersize['size_min'])
-                else:
-                    size = self.markersize
-
-                # Convert points to tuples
-                points = [(norm_x.get(i), norm_y.get(i), norm_z.get(i)) for i, sample in
-                          group[self.top_var].items()]
-
-                label = list(group[self.label_column])[0] if self.label_defined else name
-                zorder = 4
-                if self.zorder_column:
-                    zorder = list(group[self.zorder_column])[0]
-
-                sample_color = to_rgba(list(group[self.color_column])[0], alpha=self.alpha_color)
-                edge_color = to_rgba(list(group[self.color_column])[0], alpha=self.alpha_edge_color)
-                self.tax.scatter(points, edgecolors=edge_color,
-                                 marker=marker, label=label, facecolors=sample_color, s=size,
-                                 zorder=zorder)
-
-                if self.annotation:
-                    for i, sample in group[self.top_var].items():
-                        self.tax.annotate(group[self.annotation].get(i), (norm_x.get(i), norm_y.get(i)),
-                                          fontsize='xx-small')
+                self.scatter_group(group, name, group[self.top_var], group[self.left_var], group[self.right_var],
+                                   zorder=4)
 
         self.plot_legend()
@@ -1,12 +1,14 @@
 import math
 
 import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
 import ternary
-from matplotlib.colors import to_rgba
+from matplotlib.colors import to_rgba_array
 
 from georunes.plot.base import DiagramBase
 from georunes.plot.helpers import LegendDrawer
-from georunes.tools.plotting import normalize_marker_size
+from georunes.tools.plotting import normalize_marker_size, tern_array_to_bin_coords
 
 
 class DiagramTernaryBase(DiagramBase, LegendDrawer):
@@ -88,6 +90,45 @@ class DiagramTernaryBase(DiagramBase, LegendDrawer):
         else:
             self.tax.get_axes().axis('off')
 
+    def scatter_group(self, group, name, top_var, left_var, right_var, zorder=None, alpha=None):
+        """
+        Project the samples of a group on the diagram and draw them in a single scatter call
+        :param group: the samples of the group (DataFrame)
+        :param name: the name of the group
+        :param top_var: the values of the top variable (Series or array), and likewise for the left and right ones,
+        normalized together
+        :param zorder: the default zorder, if not given by the zorder column
+        """
+        coords = tern_array_to_bin_coords(np.column_stack([right_var, top_var, left_var]), self.scale)
+
+        if self.marker != '':
+            marker = self.marker
+        else:
+            marker = group[self.marker_column].iloc[0]
+
+        if self.marker_size_scaled():
+            size = normalize_marker_size(group[self.markersize['var_scale']], self.markersize['val_max'],
+                                         self.markersize['val_min'], self.markersize['size_max'],
+                                         self.markersize['size_min'])
+        else:
+            size = self.markersize
+
+        label = group[self.label_column].iloc[0] if self.label_defined else name
+        if self.zorder_column:
+            zorder = group[self.zorder_column].iloc[0]
+
+        # Colours of the samples, each converted once
+        codes, colors = pd.factorize(group[self.color_column])
+        sample_colors = to_rgba_array(list(colors), alpha=self.alpha_color)[codes]
+        edge_colors = to_rgba_array(list(colors), alpha=self.alpha_edge_color)[codes]
+        self.ax.scatter(coords[:, 0], coords[:, 1], edgecolors=edge_colors,
+                        marker=marker, label=label, facecolors=sample_colors, s=size,
+                        alpha=alpha, zorder=zorder)
+
+        if self.annotation:
+            for text, position in zip(group[self.annotation], coords):
+                self.ax.annotate(text, position, fontsize='xx-small')
+
     def plot(self):
         self.plot_config(no_gridline=False, no_ticks=self.no_ticks, no_ticks_label=self.no_ticks_label)
 
@@ -95,38 +136,8 @@ class DiagramTernaryBase(DiagramBase, LegendDrawer):
         for name, group in groups:
 
             if self.is_group_allowed(name):
-                var_sum = group[self.top_var] + group[self.left_var] + group[self.right_var]
-                norm_z = 100 * group[self.left_var] / var_sum
-                norm_x = 100 * group[self.right_var] / var_sum
-                norm_y = 100 * group[self.top_var] / var_sum
-
-                if self.marker != '':
-                    marker = self.marker
-                else:
-                    marker = list(group[self.marker_column])[0]
-
-                if self.marker_size_scaled():
-                    size = normalize_marker_size(group[self.markersize['var_scale']], self.markersize['val_max'],
-                                                 self.markersize['val_min'], self.markersize['size_max'],
-                                                 self.markersize['size_min'])
-                else:
-                    size = self.markersize
-
-                label = list(group[self.label_column])[0] if self.label_defined else name
-                zorder = None
-                if self.zorder_column:
-                    zorder = list(group[self.zorder_column])[0]
-
-                # Convert points to tuples
-                points = [(norm_x.get(i), norm_y.get(i), norm_z.get(i)) for i, sample in
-                          group[self.top_var].items()]
-
-                sample_color = to_rgba(list(group[self.color_column])[0], alpha=self.alpha_color)
-                edge_color = to_rgba(list(group[self.color_column])[0], alpha=self.alpha_edge_color)
-                self.tax.scatter(points, edgecolors=edge_color,
-                                 marker=marker, label=label, facecolors=sample_color,
-                                 s=size,
-                                 alpha=self.alpha_color, zorder=zorder)
+                self.scatter_group(group, name, group[self.top_var], group[self.left_var], group[self.right_var],
+                                   alpha=self.alpha_color)
 
         self.plot_legend()
         self.tax.clear_matplotlib_ticks()
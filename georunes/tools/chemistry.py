@@ -1,4 +1,8 @@
 import re
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
 
 name_ox_to_el = {
     'SiO2': 'Si',
@@ -43,7 +47,8 @@ name_el_to_def_ox = {
     'Nb': 'Nb2O5'
 }
 
-ratio_el_to_ox = {
+# Tabulated values, preferred over the values computed from the atomic weights
+_reference_ratio_el_to_ox = {
     'SiO2': 0.467,
     'TiO2': 0.600,
     'Al2O3': 0.529,
@@ -70,7 +75,7 @@ ratio_el_to_ox = {
     'SO3': 0.400504,
 }
 
-molar_mass = {
+_reference_molar_mass = {
     'SiO2': 60.0843,  # a
     'TiO2': 79.8658,  # a
     'Al2O3': 101.961276,  # a
@@ -103,10 +108,15 @@ molar_mass = {
 
 el_molar_mass = {
     'H': 1.00794,  # b
+    'He': 4.002602,  # b
     'Li': 6.941,  # b
+    'Be': 9.012182,  # b
+    'B': 10.811,  # b
     'C': 12.0107,  # b
+    'N': 14.0067,  # b
     'O': 15.9994,  # b
     'F': 18.9984032,  # b
+    'Ne': 20.1797,  # b
     'Na': 22.989770,  # b
     'Mg': 24.3050,  # b
     'Al': 26.981538,  # b
@@ -114,14 +124,73 @@ el_molar_mass = {
     'P': 30.973761,  # b
     'S': 32.065,  # b
     'Cl': 35.4527,  # a
+    'Ar': 39.948,  # b
     'K': 39.0983,  # b
     'Ca': 40.078,  # b
+    'Sc': 44.955910,  # b
     'Ti': 47.867,  # b
+    'V': 50.9415,  # b
+    'Cr': 51.9961,  # b
     'Mn': 54.938049,  # b
     'Fe': 55.845,  # b
+    'Co': 58.933200,  # b
+    'Ni': 58.6934,  # b
+    'Cu': 63.546,  # b
+    'Zn': 65.409,  # b
+    'Ga': 69.723,  # b
+    'Ge': 72.64,  # b
+    'As': 74.92160,  # b
+    'Se': 78.96,  # b
+    'Br': 79.904,  # b
+    'Kr': 83.798,  # b
     'Rb': 85.4678,  # b
+    'Sr': 87.62,  # b
+    'Y': 88.90585,  # b
+    'Zr': 91.224,  # b
     'Nb': 92.90638,  # b
+    'Mo': 95.94,  # b
+    'Ru': 101.07,  # b
+    'Rh': 102.90550,  # b
+    'Pd': 106.42,  # b
+    'Ag': 107.8682,  # b
+    'Cd': 112.411,  # b
+    'In': 114.818,  # b
+    'Sn': 118.710,  # b
+    'Sb': 121.760,  # b
+    'Te': 127.60,  # b
+    'I': 126.90447,  # b
+    'Xe': 131.293,  # b
+    'Cs': 132.90545,  # b
+    'Ba': 137.327,  # b
+    'La': 138.9055,  # b
+    'Ce': 140.116,  # b
+    'Pr': 140.90765,  # b
+    'Nd': 144.24,  # b
+    'Sm': 150.36,  # b
+    'Eu': 151.964,  # b
+    'Gd': 157.25,  # b
+    'Tb': 158.92534,  # b
+    'Dy': 162.500,  # b
+    'Ho': 164.93032,  # b
+    'Er': 167.259,  # b
+    'Tm': 168.93421,  # b
+    'Yb': 173.04,  # b
+    'Lu': 174.967,  # b
+    'Hf': 178.49,  # b
     'Ta': 180.9479,  # b
+    'W': 183.84,  # b
+    'Re': 186.207,  # b
+    'Os': 190.23,  # b
+    'Ir': 192.217,  # b
+    'Pt': 195.078,  # b
+    'Au': 196.96655,  # b
+    'Hg': 200.59,  # b
+    'Tl': 204.3833,  # b
+    'Pb': 207.2,  # b
+    'Bi': 208.98038,  # b
+    'Th': 232.0381,  # b
+    'Pa': 231.03588,  # b
+    'U': 238.02891,  # b
     'Nb_Ta': 92.90638 / 180.9479,  # b
     'K_Rb': 39.0983 / 85.4678  # b
 }
@@ -135,6 +204,168 @@ all_elts = ("H", "He", "Li", "Be", "B", "C", "N", "O", "F", "Ne",
             "Fr", "Ra", "Ac", "Th", "Pa", "U")
 
 
+halogens = ('F', 'Cl', 'Br', 'I')
+
+_element_pattern = re.compile(r"([A-Z][a-z]?)(\d*(?:\.\d+)?)")
+_group_pattern = re.compile(r"\(([^()]*)\)(\d*)")
+_parsed_formulas = dict()
+
+
+def _count(number):
+    if not number:
+        return 1
+    number = float(number)
+    return int(number) if number.is_integer() else number
+
+
+def _parse_part(part):
+    # Parenthesized groups, as in Mg(OH)2, are expanded first
+    while _group_pattern.search(part):
+        part = _group_pattern.sub(lambda m: "".join(el + str(_count(nb) * _count(m.group(2)))
+                                                    for el, nb in _element_pattern.findall(m.group(1))), part)
+    items = _element_pattern.findall(part)
+    if not items or "".join(el + nb for el, nb in items) != part:
+        raise ValueError("Invalid formula : " + part)
+    return items
+
+
+def _species(formula):
+    species = formula.strip().rstrip('+-')
+    return re.sub(r"(?<=[O\d])[tT]$", "", species)
+
+
+def parse_formula(formula):
+    """
+    Parse the formula of an oxide or of another species, the result being memoised. Suffixes of total iron (FeOt,
+    Fe2O3T) and of water (H2O+, H2O-) are ignored ; hydrates are written with '·' or '*' (CaSO4·2H2O).
+    :param formula: the formula
+    :return: the elements and their number, in order of appearance (tuple of (str, number))
+    """
+    if formula in _parsed_formulas:
+        return _parsed_formulas[formula]
+    species = _species(formula)
+    elements = dict()
+    for part in re.split(r"[·*]", species):
+        multiplier = re.match(r"\d*", part).group()
+        for el, nb in _parse_part(part[len(multiplier):]):
+            if el not in all_elts:
+                raise ValueError("Unknown element " + el + " in formula : " + formula)
+            elements[el] = elements.get(el, 0) + _count(nb) * _count(multiplier)
+    _parsed_formulas[formula] = tuple(elements.items())
+    return _parsed_formulas[formula]
+
+
+class Oxide:
+    """
+    Properties of an oxide, or of another species (halogen, water, hydrate), computed once from its formula.
+    The charge is the formal charge of the cation, with O2-, OH- and halogens- as anions (nan if the species has
+    several cations); a halogen alone is an anion of charge -1.
+    """
+    properties = ('cation', 'nb_cation', 'nb_oxygen', 'nb_halogen', 'oxygen_equiv', 'charge', 'molar_mass',
+                  'ratio_el_to_ox')
+
+    def __init__(self, formula):
+        self.formula = formula
+        self.elements = dict(parse_formula(formula))
+        others = [el for el in self.elements if el not in ('O', 'H', *halogens)]
+        if others:
+            self.cation = others[0]
+        else:  # Water, hydroxyl, halogens, oxygen
+            self.cation = next((el for el in self.elements if el != 'O'), 'O')
+        self.nb_cation = self.elements[self.cation]
+        self.nb_oxygen = self.elements.get('O', 0) if self.cation != 'O' else 0
+        self.nb_halogen = sum(nb for el, nb in self.elements.items() if el in halogens and el != self.cation)
+        self.oxygen_equiv = self.nb_oxygen + self.nb_halogen / 2
+        if self.cation in halogens:
+            self.charge = -1.
+            self.oxygen_equiv = self.nb_cation / 2
+        elif len(others) > 1:
+            self.charge = np.nan
+        else:
+            nb_hydrogen = self.elements.get('H', 0) if self.cation != 'H' else 0
+            self.charge = (2 * self.nb_oxygen + self.nb_halogen - nb_hydrogen) / self.nb_cation
+        reference = formula if formula in _reference_molar_mass else _species(formula)
+        if reference in _reference_molar_mass:
+            self.molar_mass = _reference_molar_mass[reference]
+        else:
+            self.molar_mass = sum(nb * el_molar_mass[el] for el, nb in self.elements.items())
+        reference = formula if formula in _reference_ratio_el_to_ox else _species(formula)
+        if reference in _reference_ratio_el_to_ox:
+            self.ratio_el_to_ox = _reference_ratio_el_to_ox[reference]
+        else:
+            self.ratio_el_to_ox = self.nb_cation * el_molar_mass[self.cation] / self.molar_mass
+
+
+class OxideRegistry:
+    """
+    Registry of the oxides, each formula being parsed once on first use
+    """
+
+    def __init__(self):
+        self._oxides = dict()
+
+    def __getitem__(self, formula):
+        if formula not in self._oxides:
+            try:
+                self._oxides[formula] = Oxide(formula)
+            except (ValueError, KeyError, TypeError, AttributeError):
+                raise KeyError(formula)
+        return self._oxides[formula]
+
+    def __contains__(self, formula):
+        try:
+            self[formula]
+        except KeyError:
+            return False
+        return True
+
+    def formulas(self):
+        return list(self._oxides.keys())
+
+    def vector(self, formulas, prop):
+        """
+        Lookup vector of a property, for a given columns order
+        :param formulas: the formulas (list of str)
+        :param prop: the property (str), one of Oxide.properties
+        :return: the values (numpy array)
+        """
+        return np.array([getattr(self[formula], prop) for formula in formulas])
+
+    def table(self, formulas, props=Oxide.properties):
+        """
+        Properties of several oxides
+        :return: the properties, one row per formula (DataFrame)
+        """
+        return pd.DataFrame({prop: [getattr(self[formula], prop) for formula in formulas] for prop in props},
+                            index=list(formulas))
+
+
+oxides = OxideRegistry()
+
+
+class _RegistryView(Mapping):
+    # Read-only mapping of a property of the registered oxides, which accepts any valid formula
+    def __init__(self, prop, reference):
+        self.prop = prop
+        self.reference = reference
+
+    def __getitem__(self, formula):
+        return getattr(oxides[formula], self.prop)
+
+    def _keys(self):
+        return [*self.reference, *[formula for formula in oxides.formulas() if formula not in self.reference]]
+
+    def __iter__(self):
+        return iter(self._keys())
+
+    def __len__(self):
+        return len(self._keys())
+
+
+molar_mass = _RegistryView('molar_mass', _reference_molar_mass)
+ratio_el_to_ox = _RegistryView('ratio_el_to_ox', _reference_ratio_el_to_ox)
+
+
 def val_ox_to_el(group):
     return group * ratio_el_to_ox[group.name]
 
@@ -143,6 +374,23 @@ def val_ox_to_el_ppm(ox_val, ox_formula):
     return (ox_val * ratio_el_to_ox[ox_formula]) * 10000
 
 
+def el_ppm_array(data, listing):
+    """
+    Get the concentrations in ppm of elements, from their columns or else from those of their default oxides
+    :param data: the samples (DataFrame)
+    :param listing: the elements (list)
+    :return: the concentrations (array, samples x elements), NaN if missing
+    """
+    values = np.full((len(data), len(listing)), np.nan)
+    for j, elt in enumerate(listing):
+        if elt in data.columns:
+            values[:, j] = pd.to_numeric(data[elt], errors='coerce')
+        elif elt in name_el_to_def_ox.keys() and name_el_to_def_ox[elt] in data.columns:
+            ox = name_el_to_def_ox[elt]
+            values[:, j] = val_ox_to_el_ppm(pd.to_numeric(data[ox], errors='coerce'), ox)
+    return values
+
+
 def val_ox_to_mc(group):
     return (1000 * group / molar_mass[group.name]) * number_cation_in_oxide(group.name)
 
@@ -160,20 +408,13 @@ def molar_ratio_specified(group, group_name):
 
 
 def get_cation(oxide):
-    items = re.findall(r"([A-Z][a-z]*)\d*O\d*", oxide)
-    if items:
-        cation = items[0]
-        return cation
+    if oxide in oxides:
+        return oxides[oxide].cation
+
 
 def get_nb_cation_oxygen(oxide):
-    items = re.findall(r"[A-Z][a-z]*(\d*)O(\d*)", oxide)
-    if items:
-        nb_cations, nb_oxygen = items[0][0], items[0][1]
-        if not nb_cations:
-            nb_cations = 1
-        if not nb_oxygen:
-            nb_oxygen = 1
-        return int(nb_cations), int(nb_oxygen)
+    if oxide in oxides:
+        return oxides[oxide].nb_cation, oxides[oxide].nb_oxygen
 
 
 def number_cations_per_oxygen(oxide):
@@ -0,0 +1,238 @@
+import numpy as np
+import pandas as pd
+from matplotlib.path import Path
+
+
+def rectangle(xmin, xmax, ymin, ymax):
+    """
+    Get the closed outline of a rectangular frame
+    :return: the vertices (array, 5 x 2)
+    """
+    return np.array([[xmin, ymin], [xmax, ymin], [xmax, ymax], [xmin, ymax], [xmin, ymin]], dtype=float)
+
+
+def _segments(lines):
+    segments = []
+    for line in lines:
+        line = np.asarray(line, dtype=float)
+        segments.append(np.stack([line[:-1], line[1:]], axis=1))
+    segments = np.concatenate(segments)
+    return segments[np.any(segments[:, 0] != segments[:, 1], axis=1)]
+
+
+def _split_parameters(segments, tol):
+    """
+    Get the positions (0 to 1) along each segment where it meets the other ones
+    """
+    p, r = segments[:, 0], segments[:, 1] - segments[:, 0]
+    q, s = p, r
+    cross = r[:, np.newaxis, 0] * s[np.newaxis, :, 1] - r[:, np.newaxis, 1] * s[np.newaxis, :, 0]
+    qp = q[np.newaxis] - p[:, np.newaxis]
+    qp_r = qp[..., 0] * r[:, np.newaxis, 1] - qp[..., 1] * r[:, np.newaxis, 0]
+    qp_s = qp[..., 0] * s[np.newaxis, :, 1] - qp[..., 1] * s[np.newaxis, :, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = qp_s / cross  # Along the segments of the rows
+        u = qp_r / cross  # Along the segments of the columns
+    length = np.linalg.norm(r, axis=1)
+    eps_t, eps_u = tol / length[:, np.newaxis], tol / length[np.newaxis]
+    crossing = (cross != 0) & (t >= -eps_t) & (t <= 1 + eps_t) & (u >= -eps_u) & (u <= 1 + eps_u)
+
+    # Ends of the segments lying on the others (T-junctions and collinear overlaps)
+    ends = np.concatenate([segments[:, 0], segments[:, 1]])
+    proj = np.clip(((ends[np.newaxis] - p[:, np.newaxis]) * r[:, np.newaxis]).sum(axis=2)
+                   / (length[:, np.newaxis] ** 2), 0, 1)
+    dist = np.linalg.norm(p[:, np.newaxis] + proj[..., np.newaxis] * r[:, np.newaxis] - ends[np.newaxis], axis=2)
+
+    params = []
+    for i in range(len(segments)):
+        params.append(np.unique(np.concatenate([[0., 1.], np.clip(t[i, crossing[i]], 0, 1), proj[i, dist[i] < tol]])))
+    return params
+
+
+def _node(segments, tol):
+    """
+    Split the segments where they meet, the nodes being merged within the tolerance
+    :return: the nodes (array, nodes x 2) and the edges (set of pairs of nodes)
+    """
+    points = []
+    for (start, end), params in zip(segments, _split_parameters(segments, tol)):
+        points.append(start + params[:, np.newaxis] * (end - start))
+    index, nodes = dict(), []
+    edges = set()
+    for pts in points:
+        ids = []
+        for pt, key in zip(pts, map(tuple, np.round(pts / tol).astype(np.int64))):
+            if key not in index:
+                index[key] = len(nodes)
+                nodes.append(pt)
+            ids.append(index[key])
+        edges.update((min(a, b), max(a, b)) for a, b in zip(ids[:-1], ids[1:]) if a != b)
+    return np.array(nodes), edges
+
+
+def _ray_hits(origin, direction, segments):
+    """
+    Get the distances, in lengths of the direction, from an origin to the segments along a ray
+    """
+    p, r = segments[:, 0], segments[:, 1] - segments[:, 0]
+    cross = direction[0] * r[:, 1] - direction[1] * r[:, 0]
+    qp = p - origin
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = (qp[:, 0] * r[:, 1] - qp[:, 1] * r[:, 0]) / cross
+        u = (qp[:, 0] * direction[1] - qp[:, 1] * direction[0]) / cross
+    return t[(cross != 0) & (u >= 0) & (u <= 1)]
+
+
+def polygonize(lines, frame, tol=None, extend=False):
+    """
+    Build the faces of the planar subdivision made by boundary lines inside a frame
+    :param lines: the boundary lines (list of arrays, points x 2)
+    :param frame: the closed outline of the frame (array, points x 2)
+    :param tol: the distance below which points are merged (default : 1e-9 of the size of the frame)
+    :param extend: if True, the free ends of the lines are joined to the lines passing within 1e-3 of the size of the
+    frame, or else extended straight to the first line or to the frame, for diagrams whose fields open out
+    :return: the outlines of the faces (list of arrays, points x 2), counterclockwise
+    """
+    frame = np.asarray(frame, dtype=float)
+    if tol is None:
+        tol = 1e-9 * np.ptp(frame, axis=0).max()
+    segments = _segments([*lines, frame])
+    nodes, edges = _node(segments, tol)
+    if extend:
+        # Free ends joined to a line passing close by (splines resampled between their nodes), or else extended
+        # straight to the first segment met
+        snap = 1e-3 * np.ptp(frame, axis=0).max()
+        degrees = np.bincount(np.array(list(edges)).ravel(), minlength=len(nodes))
+        rays = []
+        for a, b in edges:
+            for end, other in ((a, b), (b, a)):
+                if degrees[end] == 1:
+                    point, direction = nodes[end], nodes[end] - nodes[other]
+                    p, r = segments[:, 0], segments[:, 1] - segments[:, 0]
+                    proj = np.clip(((point - p) * r).sum(axis=1) / (r ** 2).sum(axis=1), 0, 1)
+                    closest = p + proj[:, np.newaxis] * r
+                    dist = np.linalg.norm(closest - point, axis=1)
+                    dist[dist < tol] = np.inf  # Segments of the end
+                    if dist.min() < snap:
+                        rays.append([point, closest[dist.argmin()]])
+                        continue
+                    hits = _ray_hits(point, direction, segments)
+                    hits = hits[hits > tol / np.linalg.norm(direction)]
+                    if len(hits):
+                        rays.append([point, point + hits.min() * direction])
+        if rays:
+            segments = np.concatenate([segments, rays])
+            nodes, edges = _node(segments, tol)
+
+    # Keep the edges inside the frame, and remove the dangling ones
+    middles = nodes[[a for a, b in edges]] + nodes[[b for a, b in edges]]
+    inside = Path(frame).contains_points(middles / 2, radius=tol) | Path(frame).contains_points(middles / 2,
+                                                                                                radius=-tol)
+    edges = {edge for edge, keep in zip(edges, inside) if keep}
+    while True:
+        degrees = np.bincount(np.array(list(edges)).ravel(), minlength=len(nodes))
+        dangling = {edge for edge in edges if degrees[edge[0]] == 1 or degrees[edge[1]] == 1}
+        if not dangling:
+            break
+        edges -= dangling
+
+    # Outgoing half-edges of each node, sorted by angle
+    neighbours = dict()
+    for a, b in edges:
+        neighbours.setdefault(a, []).append(b)
+        neighbours.setdefault(b, []).append(a)
+    for a, others in neighbours.items():
+        vectors = nodes[others] - nodes[a]
+        neighbours[a] = [others[i] for i in np.argsort(np.arctan2(vectors[:, 1], vectors[:, 0]))]
+
+    # Trace the faces, turning as much as possible clockwise at each node : interior on the left
+    faces = []
+    visited = set()
+    for a, b in [(a, b) for a, b in edges] + [(b, a) for a, b in edges]:
+        if (a, b) in visited:
+            continue
+        face = [a]
+        u, v = a, b
+        while (u, v) not in visited:
+            visited.add((u, v))
+            face.append(v)
+            others = neighbours[v]
+            u, v = v, others[others.index(u) - 1]
+        vertices = nodes[face]
+        area = np.sum(vertices[:-1, 0] * vertices[1:, 1] - vertices[1:, 0] * vertices[:-1, 1]) / 2
+        if area > 0:  # The outer boundaries of the components run clockwise
+            faces.append(vertices)
+    return faces
+
+
+class FieldClassifier:
+    def __init__(self, lines, seeds, frame, log=(False, False), extend=False):
+        """
+        Classify points in the named fields of a diagram, built once from its boundary lines
+        :param lines: the boundary lines (list of (x, y) arrays)
+        :param seeds: a point inside each field with its name (list of (x, y, name)), several points being allowed
+        for the same name
+        :param frame: the closed outline of the frame closing the fields (array, points x 2)
+        :param log: whether the axes are logarithmic, the boundaries being straight on the diagram
+        :param extend: if True, the free ends of the lines are extended to the first line met, as in polygonize
+        """
+        self.log = np.array(log, dtype=bool)
+        self.lines = [self._transform(np.column_stack(line)) for line in lines]
+        self.seeds = seeds
+        self.frame = self._transform(np.asarray(frame, dtype=float))
+        self.extend = extend
+        self._fields = None
+
+    def _transform(self, points):
+        points = np.array(points, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            points[..., self.log] = np.log10(points[..., self.log])
+        return points
+
+    @property
+    def fields(self):
+        """
+        Get the named fields, from the smallest, which are tested first
+        :return: the names and outlines (list of (name, Path))
+        """
+        if self._fields is None:
+            faces = polygonize(self.lines, self.frame, extend=self.extend)
+            faces.sort(key=lambda v: np.sum(v[:-1, 0] * v[1:, 1] - v[1:, 0] * v[:-1, 1]))
+            paths = [Path(face) for face in faces]
+            names = [None] * len(paths)
+            for x, y, name in self.seeds:
+                seed = self._transform([[x, y]])
+                for i, path in enumerate(paths):
+                    if path.contains_points(seed)[0]:
+                        if names[i] is None:
+                            names[i] = name
+                        break
+            self._fields = [(name, path) for name, path in zip(names, paths) if name is not None]
+        return self._fields
+
+    def classify(self, x, y):
+        """
+        Get the fields of points
+        :param x: the abscissas (array)
+        :param y: the ordinates (array)
+        :return: the names of the fields (array of objects), None outside the fields
+        """
+        points = self._transform(np.column_stack([np.asarray(x, dtype=float), np.asarray(y, dtype=float)]))
+        names = np.full(len(points), None, dtype=object)
+        todo = np.all(np.isfinite(points), axis=1)
+        for name, path in self.fields:
+            (xmin, ymin), (xmax, ymax) = path.vertices.min(axis=0), path.vertices.max(axis=0)
+            candidates = np.flatnonzero(todo & (points[:, 0] >= xmin) & (points[:, 0] <= xmax)
+                                        & (points[:, 1] >= ymin) & (points[:, 1] <= ymax))
+            if len(candidates):
+                inside = candidates[path.contains_points(points[candidates])]
+                names[inside] = name
+                todo[inside] = False
+        return names
+
+    def classify_series(self, x, y, index=None, name='field'):
+        """
+        Get the fields of points as a column
+        :return: the names of the fields (Series), NaN outside the fields
+        """
+        return pd.Series(self.classify(x, y), index=index, name=name).fillna(np.nan)
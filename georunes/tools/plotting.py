@@ -20,7 +20,27 @@ def get_spline(x, y, prec=50):
     return interp_x, interp_y
 
 
+# Projection of the right, top and left variables on the plane of the ternary diagrams
+tern_projection = np.array([[1., 0.], [0.5, sin60], [0., 0.]])
+
+
+def tern_array_to_bin_coords(values, scale=100):
+    """
+    Project ternary coordinates on the plane of the diagram, in one array operation
+    :param values: the right, top and left variables (array, points x 3), normalized to the scale
+    :param scale: the sum of the three normalized variables
+    :return: the coordinates (array, points x 2), NaN if the sum is null or missing
+    """
+    values = np.asarray(values, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = scale * values / values.sum(axis=-1, keepdims=True)
+    return values @ tern_projection
+
+
 def tern_coords_to_bin_coords(rvar, tvar, lvar=None, scale=100):
+    if lvar is not None:  # Normalized to the scale
+        coords = tern_array_to_bin_coords(np.stack(np.broadcast_arrays(rvar, tvar, lvar), axis=-1), scale)
+        return coords[..., 0], coords[..., 1]
     xvar = tvar / 2 + rvar
     yvar = tvar * sin60
     return xvar, yvar
@@ -1,5 +1,9 @@
 import warnings
+import weakref
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
+from georunes.tools.chemistry import el_ppm_array
 from georunes.tools.preprocessing import check_geochem_res
 
 try:
@@ -79,3 +83,100 @@ def get_reservoir_norm(norm_slug, default="CI"):
             warnings.warn(msg)
         norm = res.compos[default]
     return norm
+
+
+# Singleton model, as Reservoirs
+class NormalizationCache:
+    __instance = None
+    max_size = 64  # Maximum number of normalized arrays kept, the least recently used being evicted
+
+    @staticmethod
+    def get_instance():
+        """ Static access method. """
+        if NormalizationCache.__instance is None:
+            NormalizationCache()
+        return NormalizationCache.__instance
+
+    def __init__(self):
+        """ Virtually private constructor. """
+        if NormalizationCache.__instance is not None:
+            raise Exception("This class is a singleton!")
+        else:
+            NormalizationCache.__instance = self
+
+        self._arrays = OrderedDict()
+        self._norms = OrderedDict()
+
+    @staticmethod
+    def _lookup(entries, key, owner):
+        entry = entries.get(key)
+        # The owner is checked, as its identity can be reused once it is garbage collected
+        if entry is not None and entry[0]() is owner:
+            entries.move_to_end(key)
+            return entry[1]
+        return None
+
+    def _store(self, entries, key, owner, values):
+        values.flags.writeable = False
+        entries[key] = (weakref.ref(owner), values)
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+        return values
+
+    def norm_vector(self, norm, listing):
+        """
+        Get the concentrations of a reservoir used as norm
+        :param norm: the reservoir composition (Series)
+        :param listing: the elements (list)
+        :return: the concentrations (read-only array), NaN if missing
+        """
+        key = (id(norm), tuple(listing))
+        values = self._lookup(self._norms, key, norm)
+        if values is None:
+            values = pd.to_numeric(norm.reindex(listing), errors='coerce').to_numpy(dtype=float)
+            values = self._store(self._norms, key, norm, values)
+        return values
+
+    def normalized(self, data, listing, norm, version=None):
+        """
+        Get the concentrations of samples normalized to a reservoir, computed once per dataset, listing and reservoir
+        :param data: the samples (DataFrame), or a composition (Series), kept as long as the object is not modified in
+        place
+        :param listing: the elements, as columns or else as their default oxides (list)
+        :param norm: the reservoir composition (Series)
+        :param version: a version of the dataset, to be changed if it is modified in place
+        :return: the normalized concentrations (read-only array, samples x elements), NaN if missing
+        """
+        norm_values = self.norm_vector(norm, listing)
+        key = (id(data), version, tuple(listing), norm_values.tobytes())
+        values = self._lookup(self._arrays, key, data)
+        if values is None:
+            samples = data.to_frame().T if isinstance(data, pd.Series) else data
+            values = el_ppm_array(samples, listing) / norm_values
+            values = self._store(self._arrays, key, data, values)
+        return values
+
+    def invalidate(self, data=None):
+        """
+        Remove the normalized arrays of a dataset, or all of them
+        """
+        if data is None:
+            self._arrays.clear()
+            self._norms.clear()
+        else:
+            for key in [key for key, entry in self._arrays.items() if entry[0]() is data]:
+                del self._arrays[key]
+
+    def __len__(self):
+        return len(self._arrays)
+
+
+def normalized_array(data, listing, norm="CI", version=None):
+    """
+    Get the concentrations of samples normalized to a reservoir, from the shared normalization cache
+    :param norm: the alias of the reservoir, or its composition (dict or Series)
+    :return: the normalized concentrations (read-only array, samples x elements)
+    """
+    if not isinstance(norm, pd.Series):
+        norm = get_reservoir_norm(norm)
+    return NormalizationCache.get_instance().normalized(data, listing, norm, version=version)
@@ -0,0 +1,206 @@
+import os
+import sys
+import time
+import warnings
+import numpy as np
+import pandas as pd
+from georunes.modmin.norm.cipw import CIPWNorm
+
+# Regression and throughput harness for the CIPW norm. The references were frozen from the original loop-based
+# CIPWNorm, the intentional changes since then are listed in expected_differences.
+# python tests/modmin/cipw_harness.py freeze : write the reference outputs of the current implementation
+# python tests/modmin/cipw_harness.py bench [sizes...] : report the throughput (rows/s)
+
+reference_dir = os.path.join(os.path.dirname(os.path.realpath(__file__)), "cipw_reference")
+outputs = ('partitions', 'free', 'suppl')
+bench_sizes = (1000, 100000, 1000000)
+
+major_oxides = ['SiO2', 'TiO2', 'Al2O3', 'Fe2O3', 'FeO', 'MnO', 'MgO', 'CaO', 'Na2O', 'K2O', 'P2O5']
+volatiles = ['CO2', 'SO3', 'F', 'Cl']  # CO2 and SO3 in wt%, F and Cl in ppm
+trace_elements = ['Cr', 'Ni', 'Ba', 'Sr', 'Rb', 'Zr']  # In ppm
+
+# Average compositions (wt%) of the synthetic families, with the volatiles and trace elements which they carry
+families = {
+    'granite': ({'SiO2': 72.5, 'TiO2': 0.3, 'Al2O3': 14., 'Fe2O3': 1.2, 'FeO': 1., 'MnO': 0.05, 'MgO': 0.5,
+                 'CaO': 1.5, 'Na2O': 3.5, 'K2O': 4.5, 'P2O5': 0.1}, ['Ba', 'Sr', 'Rb', 'Zr']),
+    'peraluminous_granite': ({'SiO2': 73., 'TiO2': 0.2, 'Al2O3': 15., 'Fe2O3': 0.4, 'FeO': 1.1, 'MnO': 0.03,
+                              'MgO': 0.4, 'CaO': 0.6, 'Na2O': 3.1, 'K2O': 4.8, 'P2O5': 0.25}, ['F', 'Rb', 'Ba']),
+    'tholeiite': ({'SiO2': 50., 'TiO2': 1.6, 'Al2O3': 14.5, 'Fe2O3': 2.5, 'FeO': 9., 'MnO': 0.2, 'MgO': 7.,
+                   'CaO': 10.5, 'Na2O': 2.4, 'K2O': 0.3, 'P2O5': 0.15}, ['SO3', 'Cr', 'Ni', 'Sr', 'Zr']),
+    'basanite': ({'SiO2': 43., 'TiO2': 2.6, 'Al2O3': 13., 'Fe2O3': 4., 'FeO': 7.5, 'MnO': 0.2, 'MgO': 9.,
+                  'CaO': 11.5, 'Na2O': 4.2, 'K2O': 2., 'P2O5': 0.8}, ['F', 'Cl', 'Cr', 'Ni', 'Ba', 'Sr', 'Zr']),
+    'phonolite': ({'SiO2': 56., 'TiO2': 0.6, 'Al2O3': 20.5, 'Fe2O3': 2.3, 'FeO': 1.2, 'MnO': 0.15, 'MgO': 0.5,
+                   'CaO': 2., 'Na2O': 9.5, 'K2O': 5.5, 'P2O5': 0.1}, ['F', 'Cl', 'SO3', 'Ba', 'Sr', 'Zr']),
+    'melilitite': ({'SiO2': 36.5, 'TiO2': 3., 'Al2O3': 9.5, 'Fe2O3': 5.5, 'FeO': 7., 'MnO': 0.2, 'MgO': 13.,
+                    'CaO': 16., 'Na2O': 3.5, 'K2O': 1.5, 'P2O5': 1.}, ['CO2', 'F', 'Ni', 'Cr', 'Sr']),
+    'carbonated_lamprophyre': ({'SiO2': 39., 'TiO2': 1.2, 'Al2O3': 10., 'Fe2O3': 3., 'FeO': 5., 'MnO': 0.3,
+                                'MgO': 7., 'CaO': 17., 'Na2O': 2.8, 'K2O': 2.2, 'P2O5': 1.4},
+                               ['CO2', 'F', 'SO3', 'Ba', 'Sr']),
+    'peridotite': ({'SiO2': 42., 'TiO2': 0.1, 'Al2O3': 2., 'Fe2O3': 1.5, 'FeO': 6.5, 'MnO': 0.13, 'MgO': 42.,
+                    'CaO': 1.8, 'Na2O': 0.2, 'K2O': 0.02, 'P2O5': 0.01}, ['Cr', 'Ni']),
+}
+volatile_ranges = {'CO2': (2., 9.), 'SO3': (0.05, 0.4), 'F': (300., 6000.), 'Cl': (100., 3000.)}
+trace_ranges = {'Cr': (200., 3000.), 'Ni': (100., 2500.), 'Ba': (50., 2000.), 'Sr': (50., 1500.), 'Rb': (10., 400.),
+                'Zr': (30., 600.)}
+
+# Options of the reference cases
+cases = {
+    'major': dict(minor_included=False),
+    'major_normalized': dict(minor_included=False, normalize_entry=True),
+    'minor': dict(minor_included=True, co2_calcite=0.8, co2_cancrinite=0.2),
+    'minor_normalized': dict(minor_included=True, normalize_entry=True, co2_calcite=1),
+}
+
+major_cases = ('major', 'major_normalized')
+minor_cases = ('minor', 'minor_normalized')
+not_hematite_normative = [row for row in range(48) if row not in (20, 36, 44)]
+
+# Intentional changes from the references, by reason : the cases, output and columns which differ, for the listed rows
+# only
+expected_differences = {
+    "Rb2O molar weight used for Rb2O in the corrected K2O weight, instead of the Cs2O one": [
+        (minor_cases, 'partitions', ['Or', 'Sum_norm'], [0, 1, 8, 9, 16, 17, 24, 25, 32, 33, 40, 41]),
+        (minor_cases, 'suppl', ['diff_sum'], [0, 1, 8, 9, 16, 17, 24, 25, 32, 33, 40, 41]),
+    ],
+    "Steps 33-35 : the wollastonite and diopside converted on their own rows only, the leucite kept": [
+        (major_cases, 'partitions', ['Lc'], [3, 5, 6, 11, 14, 21, 29, 30, 37, 45, 46]),
+        (major_cases, 'partitions', ['Wo'], [14, 30]),
+        (major_cases, 'partitions', ['Di'], [3, 5, 6, 11, 13, 15, 21, 29, 37, 45, 46]),
+        (major_cases, 'suppl', ['Di-mg', 'Di-fe', 'pp_CI'], [3, 5, 6, 11, 13, 15, 21, 29, 37, 45, 46]),
+        (major_cases, 'partitions', ['Sum_norm'], [3, 5, 6, 11, 13, 14, 15, 21, 29, 30, 37, 45, 46]),
+        (major_cases, 'suppl', ['diff_sum'], [3, 5, 6, 11, 13, 14, 15, 21, 29, 30, 37, 45, 46]),
+        (minor_cases, 'partitions', ['Lc'], [3, 11, 13, 37, 46]),
+        (minor_cases, 'partitions', ['Di', 'Sum_norm'], [3, 11, 13, 15, 37, 46]),
+        (minor_cases, 'suppl', ['Di-mg', 'Di-fe', 'pp_CI', 'diff_sum'], [3, 11, 13, 15, 37, 46]),
+    ],
+    "Null hematite in the femic parameter of the compositions which are not hematite-normative": [
+        ((*major_cases, *minor_cases), 'suppl', ['pp_femic'], not_hematite_normative),
+    ],
+}
+
+
+def make_compositions(nb_samples=48, seed=0):
+    """
+    Build a synthetic set of compositions, cycling over the families, with random variations around their averages
+    :param nb_samples: the number of compositions
+    :param seed: the seed of the random generator
+    :return: the compositions, with a Sample column (DataFrame)
+    """
+    rng = np.random.default_rng(seed)
+    names = list(families.keys())
+    kinds = [names[i % len(names)] for i in range(nb_samples)]
+    data = pd.DataFrame({'Sample': ['S' + str(i) for i in range(nb_samples)]})
+    for ox in major_oxides:
+        base = np.array([families[kind][0][ox] for kind in kinds])
+        data[ox] = base * rng.uniform(0.85, 1.15, nb_samples)
+    for oxel in [*volatiles, *trace_elements]:
+        low, high = volatile_ranges[oxel] if oxel in volatile_ranges else trace_ranges[oxel]
+        carried = np.array([oxel in families[kind][1] for kind in kinds])
+        data[oxel] = np.where(carried, rng.uniform(low, high, nb_samples), np.nan)
+    data['Total'] = data[[*major_oxides, 'CO2', 'SO3']].sum(axis=1)
+    return data
+
+
+def case_data(data, case):
+    # The trace elements are only provided when they are included in the norm
+    if cases[case].get('minor_included'):
+        return data
+    return data[['Sample', *major_oxides, 'Total']]
+
+
+def run_case(norm, data, case):
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        partitions, (free, suppl) = norm.compute(case_data(data, case), skip_cols=1, **cases[case])
+    return dict(zip(outputs, (partitions, free, suppl)))
+
+
+def reference_path(case, output):
+    return os.path.join(reference_dir, case + "_" + output + ".csv")
+
+
+def freeze(norm=None):
+    """
+    Write the outputs of an implementation as the references
+    """
+    norm = norm if norm else CIPWNorm()
+    os.makedirs(reference_dir, exist_ok=True)
+    data = make_compositions()
+    for case in cases:
+        for output, frame in run_case(norm, data, case).items():
+            frame.to_csv(reference_path(case, output), index=False)
+
+
+def load_reference(case):
+    return {output: pd.read_csv(reference_path(case, output)) for output in outputs}
+
+
+def expected_for(case):
+    """
+    Get the expected differences of a case
+    :return: the rows which differ by output and column (dict)
+    """
+    expected = dict()
+    for changes in expected_differences.values():
+        for case_names, output, columns, rows in changes:
+            if case in case_names:
+                for col in columns:
+                    expected[(output, col)] = sorted(set(expected.get((output, col), [])) | set(rows))
+    return expected
+
+
+def compare_outputs(actual, reference, expected=None, rtol=1e-6, atol=2e-4):
+    """
+    Compare the outputs of an implementation to the references, to tolerance. The columns order is ignored, and the
+    missing columns are null (the norm drops the columns null for all the compositions).
+    :param expected: the rows expected to differ by output and column (dict)
+    :return: the differences found other than the expected ones, and the expected ones not found (list of str), empty
+    if the outputs match
+    """
+    expected = expected if expected else dict()
+    differences = []
+    for output in outputs:
+        act, ref = actual[output], reference[output]
+        if len(act.index) != len(ref.index):
+            differences.append(output + ": " + str(len(act.index)) + " rows instead of " + str(len(ref.index)))
+            continue
+        columns = [*ref.columns, *[col for col in act.columns if col not in ref.columns]]
+        for col in columns:
+            if col == 'Sample':
+                continue
+            act_values, ref_values = [frame[col].to_numpy(dtype=float) if col in frame.columns
+                                      else np.zeros(len(frame.index)) for frame in (act, ref)]
+            close = np.isclose(act_values, ref_values, rtol=rtol, atol=atol)
+            rows = [int(row) for row in np.flatnonzero(~close)]
+            if rows != expected.get((output, col), []):
+                differences.append(output + ": column " + col + " differs for rows " + str(rows) + " instead of " +
+                                   str(expected.get((output, col), [])))
+        for (exp_output, col), rows in expected.items():
+            if exp_output == output and col not in columns:
+                differences.append(output + ": column " + col + " expected to differ for rows " + str(rows))
+    return differences
+
+
+def benchmark(norm=None, sizes=bench_sizes, case='minor'):
+    """
+    Measure the throughput of an implementation on synthetic sets of increasing size
+    :return: the rows per second by size (dict)
+    """
+    norm = norm if norm else CIPWNorm()
+    throughput = dict()
+    for size in sizes:
+        data = make_compositions(size, seed=size)
+        start = time.perf_counter()
+        run_case(norm, data, case)
+        throughput[size] = size / (time.perf_counter() - start)
+        print(str(size).rjust(8), "samples :", str(round(throughput[size])).rjust(9), "rows/s")
+    return throughput
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "freeze":
+        freeze()
+    elif len(sys.argv) > 1 and sys.argv[1] == "bench":
+        benchmark(sizes=[int(size) for size in sys.argv[2:]] if len(sys.argv) > 2 else bench_sizes)
+    else:
+        print("Usage : python cipw_harness.py freeze|bench [sizes...]")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The CIPW harness is imported as a module of this directory, whatever the import mode of pytest
+sys.path.insert(0, os.path.dirname(os.path.realpath(__file__)))
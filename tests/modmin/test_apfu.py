@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from georunes.modmin.struct.apfu import APFUCalc
+from georunes.tools.chemistry import molar_mass
+
+
+def weight_percents(moles):
+    weights = {ox: nb * molar_mass[ox] for ox, nb in moles.items()}
+    return {ox: 100 * weight / sum(weights.values()) for ox, weight in weights.items()}
+
+
+def test_fe3_charge_balance():
+    # Alm70Adr30 garnet, with total iron as FeOt, and magnetite
+    grt = weight_percents({'SiO2': 3, 'Al2O3': 0.7, 'FeO': 2.1, 'Fe2O3': 0.3, 'CaO': 0.9})
+    grt['FeOt'] = grt.pop('FeO') + grt.pop('Fe2O3') * 2 * molar_mass['FeO'] / molar_mass['Fe2O3']
+    mt = weight_percents({'FeO': 1, 'Fe2O3': 1})
+    data = pd.DataFrame([{'Sample': 'grt', **grt}])
+    atoms, suppl = APFUCalc().compute_cation_basis(data, 1, 8, oxygen_number=12, fe3_estimation=True)
+    assert np.allclose(atoms.loc[0, ['Fe3+', 'Fe2+', 'O']].to_numpy(dtype=float), [0.6, 2.1, 12])
+    data = pd.DataFrame([{'Sample': 'mt', **mt}])
+    atoms, suppl = APFUCalc().compute_cation_basis(data, 1, 3, oxygen_number=4, fe3_estimation=True)
+    assert np.allclose(atoms.loc[0, ['Fe3+', 'Fe2+']].to_numpy(dtype=float), [2, 1])
+    assert np.isclose(suppl.loc[0, 'Fe2O3_calc'], mt['Fe2O3'], atol=1e-3)
+
+
+def test_compute_bases():
+    data = pd.DataFrame([{'Sample': 'grt', **weight_percents({'SiO2': 3, 'Al2O3': 1, 'FeO': 2, 'MgO': 1})}])
+    atoms, suppl = APFUCalc().compute_bases(data, 1, [12, 24, (12, 8)])
+    assert list(atoms.index.get_level_values('basis')) == [12, 24, (12, 8)]
+    for basis in (12, 24):
+        single, _ = APFUCalc().compute_oxygen_basis(data, 1, basis)
+        assert atoms.loc[basis].equals(single)
+    assert np.isclose(atoms.loc[(12, 8)].loc[0, 'Si'], 3) and np.isnan(suppl.loc[12].loc[0, 'cations_factor'])
@@ -0,0 +1,71 @@
+import warnings
+import numpy as np
+import pandas as pd
+from georunes.modmin.norm.catanorm import BarthNiggliNorm
+from georunes.modmin.norm.mesonorm import GranitoidMesonorm
+from georunes.tools.chemistry import molar_mass
+
+# Compositions given as cations for 100 cations
+saturated = {'SiO2': 70, 'Al2O3': 15 / 2, 'MgO': 3, 'CaO': 2, 'Na2O': 5 / 2, 'K2O': 5 / 2}
+undersaturated = {'SiO2': 40, 'Al2O3': 15 / 2, 'MgO': 20, 'CaO': 12, 'Na2O': 10 / 2, 'K2O': 3 / 2}
+
+
+def weight_percents(moles):
+    weights = {ox: nb * molar_mass[ox] for ox, nb in moles.items()}
+    return {ox: 100 * weight / sum(weights.values()) for ox, weight in weights.items()}
+
+
+def compute_norm(norm, moles):
+    data = pd.DataFrame([{'Sample': 'S', **weight_percents(moles)}])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        partitions, (free, suppl) = norm.compute(data, 1)
+    return partitions, suppl
+
+
+def check_norm(partitions, expected):
+    phases = [col for col in partitions.keys()[1:] if col != 'Sum_norm']
+    assert sorted(phases) == sorted(expected.keys())
+    assert np.allclose(partitions.loc[0, list(expected.keys())].to_numpy(dtype=float), list(expected.values()))
+    assert np.isclose(partitions.loc[0, 'Sum_norm'], 100)
+
+
+def test_catanorm_saturated():
+    # Or = 5 K + 5 Al + 15 Si, Ab = 5 Na + 5 Al + 15 Si, An = 2 Ca + 4 Al + 4 Si, C = 1 Al, Hy = 3 Mg + 3 Si,
+    # Q = 70 - 15 - 15 - 4 - 3 Si
+    partitions, suppl = compute_norm(BarthNiggliNorm(), saturated)
+    check_norm(partitions, {'Or': 25, 'Ab': 25, 'An': 10, 'C': 1, 'Hy': 6, 'Q': 33})
+    assert suppl.loc[0, 'defSi'] == 0
+
+
+def test_catanorm_undersaturated():
+    # Or 3, Ab 10, An 1, Di 11 and Hy 9 (formula units) need 72 Si, for a deficit of 32 Si :
+    # Hy -> 4.5 Ol (4.5 Si), Ab -> 10 Ne (20 Si), Or -> 3 Lc (3 Si), then 4.5 Di -> 2.25 Cs + 2.25 Ol (4.5 Si)
+    partitions, suppl = compute_norm(BarthNiggliNorm(), undersaturated)
+    check_norm(partitions, {'Ne': 30, 'Lc': 12, 'An': 5, 'Di': 26, 'Ol': 20.25, 'Cs': 6.75})
+    assert suppl.loc[0, 'defSi'] == 0
+
+
+def test_mesonorm_saturated():
+    # Bt = 1 K + 3 Mg + 1 Al + 3 Si, Or = 4 K + 4 Al + 12 Si, Ab = 5 Na + 5 Al + 15 Si, An = 2 Ca + 4 Al + 4 Si,
+    # C = 1 Al, no Ca left for Hbl, Q = 70 - 3 - 12 - 15 - 4 Si
+    partitions, suppl = compute_norm(GranitoidMesonorm(), saturated)
+    check_norm(partitions, {'Bt': 8, 'Or': 20, 'Ab': 25, 'An': 10, 'C': 1, 'Q': 36})
+    assert suppl.loc[0, 'defSi'] == 0
+
+
+def test_mesonorm_undersaturated():
+    # Bt 3, Ab 10, An 1, Hbl 2.2 and Wo 6.6 (formula units) need 65.2 Si, for a deficit of 25.2 Si :
+    # Hbl -> 4.4 Di + 6.6 Hy (2.2 Si), Hy -> 3.3 Ol (3.3 Si), then 9.85 Ab -> 9.85 Ne (19.7 Si)
+    partitions, suppl = compute_norm(GranitoidMesonorm(), undersaturated)
+    check_norm(partitions, {'Bt': 24, 'Ab': 0.75, 'Ne': 29.55, 'An': 5, 'Wo': 13.2, 'Di': 17.6, 'Ol': 9.9})
+    assert suppl.loc[0, 'defSi'] == 0
+
+
+def test_deficit_out_of_scope():
+    # Silica deficit left after all the desilication steps
+    moles = {'SiO2': 10, 'MgO': 40, 'CaO': 50}
+    for norm in (BarthNiggliNorm(), GranitoidMesonorm()):
+        partitions, suppl = compute_norm(norm, moles)
+        assert suppl.loc[0, 'defSi'] > 0
+        assert partitions.iloc[0, 1:].isna().all()
@@ -0,0 +1,101 @@
+import warnings
+import numpy as np
+import pandas as pd
+from georunes.modmin.norm.cipw import CIPWNorm
+from georunes.modmin.norm.fe_oxidation import ratio_middlemost, ratio_le_maitre
+from georunes.tools.chemistry import molar_mass
+
+granite = {'SiO2': 72.5, 'TiO2': 0.3, 'Al2O3': 14., 'Fe2O3': 1.2, 'FeO': 1., 'MnO': 0.05, 'MgO': 0.5, 'CaO': 1.5,
+           'Na2O': 3.5, 'K2O': 4.5, 'P2O5': 0.1}
+lamprophyre = {'SiO2': 41.7, 'TiO2': 1.1, 'Al2O3': 10.3, 'Fe2O3': 3.3, 'FeO': 5.7, 'MnO': 0.3, 'MgO': 6., 'CaO': 19.2,
+               'Na2O': 2.7, 'K2O': 2.2, 'P2O5': 1.4}
+tholeiite = {'SiO2': 50., 'TiO2': 1.6, 'Al2O3': 14.5, 'Fe2O3': 2.5, 'FeO': 9., 'MnO': 0.2, 'MgO': 7., 'CaO': 10.5,
+             'Na2O': 2.4, 'K2O': 0.3, 'P2O5': 0.15}
+melilitite = {'SiO2': 36.5, 'TiO2': 3., 'Al2O3': 9.5, 'Fe2O3': 5.5, 'FeO': 7., 'MnO': 0.2, 'MgO': 13., 'CaO': 16.,
+              'Na2O': 3.5, 'K2O': 1.5, 'P2O5': 1.}
+
+
+def compute_norm(compositions, **kwargs):
+    data = pd.DataFrame([{'Sample': 'S' + str(i), **comp, 'Total': 100.} for i, comp in enumerate(compositions)])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        partitions, (free, suppl) = CIPWNorm().compute(data, 1, **kwargs)
+    return partitions, free, suppl
+
+
+def test_rb2o_molar_weight():
+    # The Rb2O folded in K2O was weighted as Cs2O (Or = 27.0287, diff_sum = -0.0555)
+    partitions, free, suppl = compute_norm([{**granite, 'Rb': 1000.}], minor_included=True)
+    assert partitions.loc[0, 'Or'] == 26.9732 and suppl.loc[0, 'diff_sum'] == 0
+
+
+def test_silica_deficiency_steps():
+    partitions, free, suppl = compute_norm([lamprophyre, melilitite, granite])
+    # The wollastonite converted into dicalcium silicate was restored (Wo = 8.9922), the leucite of the compositions
+    # reaching the step 33 was lost, and the diopside of the melilitite, followed by a saturated composition, was not
+    # converted (Di = 52.8131, Sum_norm = 122.1082)
+    assert partitions.loc[0, ['Wo', 'Cs', 'Lc', 'Di']].tolist() == [2.4577, 4.8445, 10.1946, 44.4234]
+    assert partitions.loc[1, ['Cs', 'Lc', 'Di', 'Ol']].tolist() == [12.7197, 6.9508, 20.4541, 18.7627]
+    assert (suppl['diff_sum'] == 0).all()
+
+
+def test_halite_thenardite_pyrite():
+    compositions = [{**granite, 'Na2O': 0.5, 'Cl': 2500.}, {**granite, 'Na2O': 0.5, 'SO3': 0.5},
+                    {**granite, 'FeO': 0.1, 'MnO': 0., 'S': 500.}]
+    partitions, free, suppl = compute_norm(compositions, minor_included=True)
+    # The conditions did not follow the formulas : Hl = 0.2357 with free Cl, Th = 1.1459 and Pr = 0.167 with negative
+    # free SO3 and S
+    assert [partitions.loc[0, 'Hl'], partitions.loc[1, 'Th'], partitions.loc[2, 'Pr']] == [0.4121, 0.8871, 0.0935]
+    assert not {'Cl', 'SO3', 'S'} & set(free.columns)
+    assert (suppl['diff_sum'] == 0).all()
+
+
+def test_free_oxides():
+    # Only the last free oxide, Cl, was accounted (free_oxides = 0.3856, diff_sum = 0.0241)
+    partitions, free, suppl = compute_norm([{**granite, 'CaO': 0.1, 'Na2O': 0.1, 'Cl': 5000.}], minor_included=True)
+    assert free.loc[0, 'P2O5'] > 0 and free.loc[0, 'Cl'] > 0
+    assert partitions.loc[0, 'free_oxides'] == 0.4097 and suppl.loc[0, 'diff_sum'] == 0
+
+
+def test_femic_parameter():
+    # The hematite was undefined for the compositions which are not hematite-normative, nulling their femic parameter
+    partitions, free, suppl = compute_norm([tholeiite, {**granite, 'Fe2O3': 3.}])
+    assert suppl['pp_femic'].tolist() == [39.3492, 1.2679]
+
+
+def test_middlemost_ratio():
+    # Picrobasalt, basalt, andesite and rhyolite (default ratio), then points on the picrobasalt/basalt and
+    # basalt/basaltic andesite boundaries, given to the first field
+    sio2 = np.array([43., 48., 60., 75., 45., 52.])
+    alkali = np.array([1., 3., 3., 8., 2., 2.])
+    assert ratio_middlemost(sio2, alkali).tolist() == [0.15, 0.2, 0.35, 0.5, 0.15, 0.2]
+
+
+def test_le_maitre_ratio():
+    # FeO/(FeO + Fe2O3) = 0.93 - 0.0042 * 50 - 0.022 * 5 = 0.61 (volcanic), 0.88 - 0.0016 * 50 - 0.027 * 5 = 0.665
+    # (plutonic)
+    sio2, alkali = np.array([50.]), np.array([5.])
+    assert np.allclose(ratio_le_maitre(sio2, alkali, "volcanic"), 0.39 / 0.61)
+    assert np.allclose(ratio_le_maitre(sio2, alkali, "plutonic"), 0.335 / 0.665)
+
+
+def test_total_iron_inputs():
+    fe2o3t = tholeiite['Fe2O3'] + tholeiite['FeO'] * molar_mass['Fe2O3'] / (2 * molar_mass['FeO'])
+    feot = fe2o3t * 2 * molar_mass['FeO'] / molar_mass['Fe2O3']
+    thol_feot = {**{ox: val for ox, val in tholeiite.items() if ox not in ('FeO', 'Fe2O3')}, 'FeOt': feot}
+    thol_fe2o3t = {**{ox: val for ox, val in tholeiite.items() if ox not in ('FeO', 'Fe2O3')}, 'Fe2O3t': fe2o3t}
+    for method in ("Middlemost", "LeMaitre", 0.3):
+        partitions, free, suppl = compute_norm([tholeiite, thol_feot, thol_fe2o3t], fe_adjustment=method)
+        for i in (1, 2):
+            assert partitions.iloc[i, 1:].equals(partitions.iloc[0, 1:])
+            assert suppl.loc[i, 'Fe2O3/FeO'] == suppl.loc[0, 'Fe2O3/FeO']
+
+
+def test_fixed_fe_ratio():
+    # Same norm as with FeO and Fe2O3 split by hand at Fe2O3/FeO = 0.3
+    partitions, free, suppl = compute_norm([tholeiite], fe_adjustment=0.3)
+    fe2o3t = tholeiite['Fe2O3'] + tholeiite['FeO'] * molar_mass['Fe2O3'] / (2 * molar_mass['FeO'])
+    feo = fe2o3t / (0.3 + molar_mass['Fe2O3'] / (2 * molar_mass['FeO']))
+    expected, _, _ = compute_norm([{**tholeiite, 'FeO': feo, 'Fe2O3': 0.3 * feo}])
+    assert suppl.loc[0, 'Fe2O3/FeO'] == 0.3
+    assert np.allclose(partitions.iloc[0, 1:].to_numpy(dtype=float), expected.iloc[0, 1:].to_numpy(dtype=float))
@@ -0,0 +1,9 @@
+import pytest
+from georunes.modmin.norm.cipw import CIPWNorm
+from cipw_harness import cases, make_compositions, run_case, load_reference, compare_outputs, expected_for
+
+
+@pytest.mark.parametrize("case", list(cases.keys()))
+def test_cipw_reference(case):
+    actual = run_case(CIPWNorm(), make_compositions(), case)
+    assert compare_outputs(actual, load_reference(case), expected_for(case)) == []
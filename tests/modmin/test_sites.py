@@ -0,0 +1,17 @@
+import numpy as np
+import pandas as pd
+from georunes.modmin.struct.sites import SiteAllocator, fill_site
+
+
+def test_fill_site():
+    available = np.array([[1.5, 1., 1.], [0.5, 0.2, 0.]])
+    assert np.allclose(fill_site(available, 2), [[1.5, 0.5, 0.], [0.5, 0.2, 0.]])
+
+
+def test_feldspar_allocation():
+    data = pd.DataFrame({'Mineral': ['Ab', 'An'], 'SiO2': [68.74, 43.2], 'Al2O3': [19.44, 36.65],
+                         'CaO': [0., 20.16], 'Na2O': [11.82, 0.]})
+    atoms, occupancies, end_members = SiteAllocator('feldspar').compute_from_oxides(data, 1)
+    assert np.allclose(occupancies[['T_Si', 'T_Al', 'A_sum']].to_numpy(dtype=float), [[3, 1, 1], [2, 2, 1]],
+                       atol=5e-3)
+    assert np.allclose(end_members[['Ab', 'An', 'Or']].to_numpy(dtype=float), [[1, 0, 0], [0, 1, 0]])
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from georunes.petromod.finders.cumulate_finder import CumulateFinder, bounded_lsq
+
+minerals = pd.DataFrame({'Mineral': ['Ol', 'Cpx', 'Pl', 'Mt'],
+                         'SiO2': [40., 52., 55., 0.], 'Al2O3': [0., 3., 28., 2.], 'FeO': [12., 6., 0.5, 85.],
+                         'MgO': [47., 16., 0., 1.], 'CaO': [0.3, 21., 10., 0.], 'Na2O': [0., 0.5, 5.5, 0.]})
+parent = pd.Series({'SiO2': 50., 'Al2O3': 15., 'FeO': 10., 'MgO': 9., 'CaO': 10., 'Na2O': 3.})
+cumulate = pd.Series(np.array([0.3, 0.4, 0.25, 0.05]) @ minerals.iloc[:, 1:].to_numpy(), index=parent.index)
+child = (parent - 0.3 * cumulate) / 0.7
+
+
+def test_bounded_lsq_warm_start():
+    matrix = minerals.iloc[:, 1:].to_numpy().T
+    target = cumulate.to_numpy() * 1.1
+    upper = np.array([0.5, 0.5, 0.5, 0.02])
+    cold = bounded_lsq(matrix, target, upper)
+    assert np.allclose(bounded_lsq(matrix, target, upper, start=cold), cold)
+    assert np.allclose(bounded_lsq(matrix, target, upper, start=np.full(4, 0.1)), cold, atol=1e-8)
+
+
+def test_find_cumulate_batch():
+    finder = CumulateFinder(minerals, optimizer='BVLS', nb_results=10)
+    partitions, supplements, betas = finder.find_cumulate_batch(parent, child, refine=False)
+    expected, _, expected_betas = finder.find_cumulate_to_remove(parent.copy(), child.copy())
+    assert np.allclose(betas, expected_betas)
+    assert np.allclose(partitions.to_numpy(dtype=float), expected.to_numpy(dtype=float), atol=1e-3)
+    # The refinement finds the beta used to build the child liquid
+    partitions, supplements, betas = finder.find_cumulate_batch(parent, child, nb_betas=7, tol=1e-6)
+    best = supplements['deviation_euclidian'].idxmin()
+    assert supplements.loc[best, 'refined'] and np.isclose(supplements.loc[best, 'beta'], 0.7, atol=1e-5)
+    assert np.allclose(partitions.loc[best, ['Ol', 'Cpx', 'Pl', 'Mt']], [30, 40, 25, 5], atol=1e-2)
+
+
+def test_search_suite():
+    finder = CumulateFinder(minerals, optimizer='BVLS')
+    grandchild = (child - 0.2 * cumulate) / 0.8
+    data = pd.DataFrame([parent, child, grandchild])
+    data.insert(0, 'Sample', ['P', 'C', 'G'])
+    assert finder.screen_pairs(data[finder.oxel_list].to_numpy()).tolist() == [[False, True, True],
+                                                                                [False, False, True],
+                                                                                [False, False, False]]
+    pairs = finder.search_suite(data, skip_cols=1, workers=1, tol=1e-6)
+    assert len(pairs) == 3 and pairs['deviation_euclidian'].is_monotonic_increasing
+    best = pairs.set_index(['parent', 'daughter']).loc[('P', 'C')]
+    assert np.isclose(best['beta'], 0.7, atol=1e-5)
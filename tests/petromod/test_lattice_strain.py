@@ -0,0 +1,35 @@
+import numpy as np
+from georunes.petromod.modelers.lattice_strain import LatticeStrainModel, LatticeStrainSite, lattice_strain
+from georunes.petromod.modelers.partition import compute_bulk_coeffs
+
+ree = ['La', 'Ce', 'Nd', 'Sm', 'Eu', 'Gd', 'Dy', 'Er', 'Yb', 'Lu']
+
+
+def test_lattice_strain():
+    assert np.isclose(lattice_strain(1.0, 0.8, 1.0, 300, 1500), 0.8)
+    coeffs = lattice_strain([0.9, 1.0, 1.1], 0.8, 1.0, 300, np.array([[1200], [1600]]))
+    assert coeffs.shape == (2, 3) and np.all(coeffs[:, [0, 2]] < 0.8)
+    assert np.all(coeffs[0, [0, 2]] < coeffs[1, [0, 2]])  # The parabola widens with the temperature
+
+
+def test_model_path():
+    cpx = LatticeStrainSite(0.8, 1.0, lambda t, p: 318.6 + 6.9 * p - 0.036 * t, ree)
+    grt = LatticeStrainSite(5., 0.93, 400, ree)
+    model = LatticeStrainModel({'Cpx': [cpx], 'Grt': [grt], 'Ol': []})
+    temperatures = np.linspace(1300, 1600, 4)
+    coeffs = model.coeffs_array(temperatures, 2.)
+    assert coeffs.shape == (4, len(ree), 3) and np.isnan(coeffs[..., 2]).all()
+    assert model.coeffs_array(temperatures, 2.) is coeffs  # Cached
+    modes = {'Cpx': 20, 'Grt': 10, 'Ol': 70}
+    bulk_coeffs = model.bulk_coeffs_array(modes, temperatures, 2.)
+    assert np.allclose(bulk_coeffs[1], compute_bulk_coeffs(modes, model.coeffs(temperatures[1], 2.)))
+
+
+def test_model_cache_site_parameters():
+    grt = LatticeStrainSite(5., 0.93, 400, ree)
+    model = LatticeStrainModel({'Grt': [grt]})
+    coeffs = model.coeffs_array(1400.)
+    grt.d0 = 10.
+    assert np.allclose(model.coeffs_array(1400.), 2 * coeffs)
+    grt.radii = {**grt.radii, 'La': 0.93}
+    assert np.isclose(model.coeffs_array(1400.)[0, 0, 0], 10.)
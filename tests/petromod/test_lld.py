@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+from georunes.petromod.modelers.lld import LLDSimulator, Stage
+from georunes.petromod.modelers.rayleigh import RayleighCrystallization
+from georunes.petromod.modelers.partition import compute_bulk_coeffs
+
+minerals = pd.DataFrame({'Mineral': ['Ol', 'Cpx', 'Pl'],
+                         'SiO2': [40., 52., 55.], 'MgO': [48., 17., 0.], 'CaO': [0.3, 21., 10.], 'Na2O': [0., 0.5, 5.5]})
+parent_majors = pd.Series({'SiO2': 50., 'MgO': 9., 'CaO': 10., 'Na2O': 3.})
+parent_traces = pd.Series({'Ni': 200., 'Sr': 300., 'La': 10.})
+part_coeffs = pd.DataFrame({'Ol': [10., 0.01, 0.001], 'Cpx': [2., 0.1, 0.05], 'Pl': [0.01, 2., 0.1]},
+                           index=['Ni', 'Sr', 'La'])
+
+
+def test_stages():
+    simulator = LLDSimulator(minerals, parent_majors, parent_traces, part_coeffs)
+    majors, traces = simulator.run([Stage({'Ol': 100}, mass_removed=0.1, nb_steps=5),
+                                    Stage({'Ol': 40, 'Cpx': 60}, liq_fract=0.6, nb_steps=5),
+                                    Stage({'Ol': 40, 'Cpx': 60}, liq_fract=0.5, nb_steps=5, name="Late")])
+    assert len(majors) == len(traces) == 16
+    assert np.allclose(majors['F'].iloc[[5, 10, 15]], [0.9, 0.6, 0.5])
+    assert traces['Stage'].iloc[-1] == "Late"
+    # Stages of the same assemblage chain as a single Rayleigh fractionation
+    bulk_coeffs = compute_bulk_coeffs({'Ol': 40, 'Cpx': 60}, part_coeffs)
+    elements = ['Ni', 'Sr', 'La']
+    expected = traces[elements].loc[5] * RayleighCrystallization(bulk_coeffs).ratio_liq(0.5 / 0.9)
+    assert np.allclose(traces[elements].loc[15], expected)
+    # The olivine stage is a mass balance with olivine
+    olivine = minerals.set_index('Mineral').loc['Ol']
+    assert np.allclose(0.9 * majors[simulator.oxel_list].loc[5] + 0.1 * olivine, parent_majors)
+    # Adding a stage keeps the previous ones
+    simulator.add_stage(Stage({'Pl': 100}, mass_removed=0.2, nb_steps=2))
+    assert np.allclose(simulator.traces_path()[elements].iloc[:16], traces[elements])
+    assert np.isclose(simulator.liq_fract, 0.4)
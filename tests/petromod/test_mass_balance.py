@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+from georunes.petromod.modelers.mass_balance import MassBalanceModalModeler
+
+data_minerals = pd.DataFrame({'Mineral': ['Ol', 'Cpx', 'Pl'],
+                              'SiO2': [40., 52., 55.], 'MgO': [48., 17., 0.], 'CaO': [0.3, 21., 10.],
+                              'Na2O': [0., 0.5, 5.5]})
+parent = pd.Series({'SiO2': 50., 'MgO': 9., 'CaO': 10., 'Na2O': 3.})
+cumulate_modal = {'Ol': 30, 'Cpx': 50, 'Pl': 20}
+
+
+def test_residual_liquids():
+    model = MassBalanceModalModeler(data_minerals)
+    cumulate = model.modal_props_to_concentration(cumulate_modal)
+    assert np.isclose(cumulate['MgO'], (30 * 48 + 50 * 17) / 100)
+    alphas = np.array([0, 0.1, 0.3])
+    residual = model.get_residual_liq_concentrations(cumulate_modal, parent, alphas)
+    assert residual.shape == (3, 4)
+    expected = [(parent['CaO'] - alpha * cumulate['CaO']) / (1 - alpha) for alpha in alphas]
+    assert np.allclose(model.get_residual_liq_concentration('CaO', cumulate_modal, parent, alphas), expected)
+    # The cached matrix follows the changes of the mineral compositions
+    minerals_data = model.minerals_data.copy()
+    minerals_data.loc['MgO', 'Ol'] = 50.
+    model.set_minerals_data(minerals_data)
+    assert np.isclose(model.modal_props_to_concentration(cumulate_modal)['MgO'], (30 * 50 + 50 * 17) / 100)
+
+
+def test_assimilation_and_paths():
+    model = MassBalanceModalModeler(data_minerals)
+    content = {'SiO2': 70., 'MgO': 1., 'CaO': 2., 'Na2O': 4.}
+    mixed = model.assimilate(parent, content, 0.25)
+    assert np.isclose(mixed['SiO2'], (50 + 0.25 * 70) / 1.25)
+    grid = model.mixing_grid(parent, [content, parent], [[0, 0.1, 0.2], [0, 0.5]])
+    assert grid.shape == (3, 2, 4)
+    assert np.allclose(grid[2, 1], model.assimilate_array(parent, [content, parent], [[0.2, 0.5]])[0])
+    # The paths match the steps applied one by one
+    paths = model.fractionation_assimilation_paths(cumulate_modal, parent, content, [[0.1] * 4, [0.2] * 4], 0.05)
+    assert paths.shape == (2, 5, 4)
+    liquid = parent
+    for step in range(1, 5):
+        residual = model.get_residual_liq_concentrations(cumulate_modal, liquid, [0.2])[0]
+        liquid = pd.Series(model.assimilate(dict(zip(model.oxel_list, residual)), content, 0.05))
+        assert np.allclose(paths[1, step], liquid[model.oxel_list])
@@ -0,0 +1,112 @@
+import pytest
+import numpy as np
+import pandas as pd
+from georunes.petromod.modelers.batch import BatchMelting
+from georunes.petromod.modelers.rayleigh import RayleighCrystallization, RayleighMelting
+
+elements = ['La', 'Sm', 'Yb']
+bulk_coeffs = pd.Series([0.01, 0.5, 2.], index=elements, name='D')
+initial_c0 = pd.Series([30., 5., 2.], index=elements)
+
+
+def test_ratio_arrays():
+    liq_fracts = np.array([0, 0.25, 0.5, 1])
+    model = RayleighCrystallization(bulk_coeffs)
+    ratios = model.ratio_liq_array(liq_fracts)
+    assert ratios.shape == (4, 3)
+    assert np.allclose(ratios[0], 0.01 ** (bulk_coeffs - 1))  # F=0 clamped to 0.01
+    assert np.allclose(ratios[2], model.ratio_liq(0.5))
+    assert np.allclose(model.ratio_sol_avg_array(1)[0], (1 - 0.99 ** bulk_coeffs) / 0.01)
+    assert np.allclose(RayleighMelting(bulk_coeffs).ratio_liq_avg_array(liq_fracts)[3], 1)
+    assert np.allclose(BatchMelting(bulk_coeffs).ratio_liq_array(liq_fracts)[3], 1)
+
+
+def test_concentration_array():
+    model = RayleighMelting(bulk_coeffs)
+    values = model.concentration_array('LIQ_TOT', [0.1, 0.2], initial_c0, ['Yb', 'La'])
+    expected = [[model.concentration_liq_avg_el(el, f, initial_c0) for el in ['Yb', 'La']] for f in [0.1, 0.2]]
+    assert np.allclose(values, expected)
+
+
+def test_ratio_cache_invalidation():
+    model = RayleighCrystallization(bulk_coeffs)
+    before = model.concentration_sol_avg_el('Yb', 0.5, initial_c0)
+    assert model.concentration_sol_avg_el('Yb', 0.5, initial_c0) == before
+    model.set_bulk_dist_coeffs(bulk_coeffs * 2)
+    assert np.isclose(model.concentration_sol_avg_el('Yb', 0.5, initial_c0), 2 * (1 - 0.5 ** 4) / 0.5)
+
+
+def test_bulk_coeffs_batch():
+    from georunes.petromod.modelers.partition import compute_bulk_coeffs, compute_bulk_coeffs_batch, \
+        get_non_modal_dist_coeffs_batch
+    part_coeffs = pd.DataFrame({'Ol': [0.001, 0.01, 0.02], 'Cpx': [0.05, 0.4, 0.5]}, index=elements)
+    modal = pd.DataFrame({'Ol': [60, 100], 'Cpx': [40, 0]})
+    bulk = compute_bulk_coeffs_batch(modal, part_coeffs)
+    assert bulk.shape == (2, 3)
+    assert np.allclose(bulk[0], compute_bulk_coeffs({'Ol': 60, 'Cpx': 40}, part_coeffs))
+    assert np.allclose(get_non_modal_dist_coeffs_batch(modal / 100, part_coeffs), bulk)
+    with pytest.raises(Exception):
+        compute_bulk_coeffs_batch(np.array([[50, 50]]), part_coeffs, minerals=['Ol', 'Grt'])
+
+
+def test_open_and_non_modal_models():
+    from georunes.petromod.modelers.afc import AFCModeler
+    from georunes.petromod.modelers.nonmodal import NonModalBatchMelting, NonModalFractionalMelting
+    from georunes.petromod.modelers.dynamic import ContinuousMelting
+    from georunes.petromod.modelers.zone_refining import ZoneRefining
+    liq_fracts = np.linspace(0, 1, 11)
+    # Each model reduces to a classical one for particular parameters
+    afc = AFCModeler(bulk_coeffs, initial_c0 * 2, r=0)
+    assert np.allclose(afc.concentration_array('LIQ', liq_fracts, initial_c0),
+                       RayleighCrystallization(bulk_coeffs).concentration_array('LIQ', liq_fracts, initial_c0))
+    grid = afc.concentration_liq_grid(liq_fracts, [0.2, 1 - 0.5, 1], initial_c0)
+    assert grid.shape == (3, 11, 3)
+    assert np.isfinite(grid[1]).all() and np.isnan(grid[2]).all()  # r + D = 1 for Sm, r = 1
+    assert np.allclose(NonModalBatchMelting(bulk_coeffs, bulk_coeffs).ratio_liq_array(liq_fracts),
+                       BatchMelting(bulk_coeffs).ratio_liq_array(liq_fracts))
+    rayleigh = RayleighMelting(bulk_coeffs)
+    for model in [NonModalFractionalMelting(bulk_coeffs, bulk_coeffs), ContinuousMelting(bulk_coeffs, porosity=0)]:
+        for phase in rayleigh.get_phases_labels():
+            assert np.allclose(model.concentration_array(phase, liq_fracts[1:-1], initial_c0),
+                               rayleigh.concentration_array(phase, liq_fracts[1:-1], initial_c0))
+    fractional = NonModalFractionalMelting(bulk_coeffs, bulk_coeffs * 0)
+    assert np.allclose(fractional.ratio_sol_array(0.5), np.exp(-0.5 / bulk_coeffs.to_numpy()) / 0.5)
+    assert np.allclose(ZoneRefining(bulk_coeffs).ratio_liq_array(1), 1)
+
+
+def test_afc_initial_concentrations():
+    from georunes.petromod.modelers.afc import AFCModeler
+    coeffs = pd.Series([0.1], index=['La'], name='D')
+    afc = AFCModeler(coeffs, {'La': 30.}, r=0.3)
+    # DePaolo (1981) : C0.F^-z + r / (r - 1) . Ca / z . (1 - F^-z), for C0 given at each call
+    z = (0.3 + 0.1 - 1) / (0.3 - 1)
+    for c0 in (10., 20.):
+        expected = c0 * 0.5 ** -z + 0.3 / (0.3 - 1) * 30 / z * (1 - 0.5 ** -z)
+        assert np.isclose(afc.concentration_array('LIQ', 0.5, {'La': c0})[0, 0], expected)
+        assert np.isclose(afc.concentration_liq_el('La', 0.5, {'La': c0}), expected)
+        assert np.isclose(afc.concentration_sol_el('La', 0.5, {'La': c0}), expected * 0.1)
+    assert np.isclose(afc.concentration_array('LIQ', 0.5, {'La': 20.})[0, 0], 48.40, atol=0.01)
+
+
+def test_monte_carlo_sweep(tmp_path):
+    from georunes.petromod.modelers.partition import compute_bulk_coeffs
+    from georunes.petromod.modelers.sweep import MonteCarloSweep, LogNormal, Dirichlet, Grid
+    part_coeffs = pd.DataFrame({'Ol': [0.001, 0.01, 0.02], 'Cpx': [0.05, 0.4, 0.5]}, index=elements)
+    modes = {'Ol': 60, 'Cpx': 40}
+    liq_fracts = np.linspace(0.05, 0.3, 6)
+    # Fixed parameters give the deterministic model
+    sweep = MonteCarloSweep(BatchMelting, part_coeffs, modes, initial_c0, liq_fracts, workers=1)
+    envelopes = sweep.run()
+    expected = BatchMelting(compute_bulk_coeffs(modes, part_coeffs)).concentration_array('LIQ', liq_fracts, initial_c0)
+    assert sweep.size == 1 and np.allclose(envelopes.loc[0.5].to_numpy(), expected)
+    # Grids are crossed with the random draws, and the realisations are streamed to disk
+    sweep = MonteCarloSweep(RayleighMelting, LogNormal(part_coeffs, 0.2), Grid([modes, {'Ol': 100}]), initial_c0,
+                            liq_fracts, phase='LIQ_TOT', nb_realisations=50, block_size=30, workers=1, seed=0)
+    output = str(tmp_path / "realisations.npy")
+    envelopes = sweep.run(output)
+    assert np.load(output).shape == (100, 6, 3)
+    assert envelopes.shape == (5 * 6, 3)
+    assert (envelopes.loc[0.025] <= envelopes.loc[0.975]).all().all()
+    again = MonteCarloSweep(RayleighMelting, LogNormal(part_coeffs, 0.2), Dirichlet(modes), initial_c0, liq_fracts,
+                            phase='LIQ_TOT', nb_realisations=50, block_size=30, workers=1, seed=0)
+    assert again.run().equals(again.run())
@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+from georunes.petromod.finders.partition_inversion import PartitionInversion, log_ratio_kernels
+from georunes.petromod.modelers.batch import BatchMelting
+from georunes.petromod.modelers.rayleigh import RayleighCrystallization
+
+elements = ['Rb', 'Ba', 'La', 'Ce', 'Nd', 'Sm', 'Dy', 'Yb', 'Lu']
+part_coeffs = pd.DataFrame({'Ol': [0.001, 0.001, 0.002, 0.003, 0.005, 0.01, 0.02, 0.03, 0.04],
+                            'Cpx': [0.01, 0.01, 0.05, 0.08, 0.15, 0.3, 0.4, 0.45, 0.5],
+                            'Grt': [0.001, 0.001, 0.01, 0.02, 0.07, 0.2, 1.5, 4., 6.]}, index=elements)
+initial_c0 = pd.Series([5., 60., 6., 15., 10., 3., 3., 2., 0.3], index=elements)
+
+
+def test_log_ratio_derivatives():
+    f, d, h = 0.3, np.array([0.01, 0.5, 2.]), 1e-7
+    for _, _, kernel in log_ratio_kernels:
+        log_ratio, d_f, d_d = kernel(f, d)
+        assert np.allclose(d_f, (kernel(f + h, d)[0] - log_ratio) / h, rtol=1e-4)
+        assert np.allclose(d_d, (kernel(f, d + h)[0] - log_ratio) / h, rtol=1e-4)
+
+
+def test_fit_samples():
+    modes = {'Ol': 55, 'Cpx': 30, 'Grt': 15}
+    bulk_coeffs = pd.Series(part_coeffs.to_numpy() @ np.array([0.55, 0.3, 0.15]), index=elements)
+    liq_fracts = [0.02, 0.1, 0.25]
+    data = pd.DataFrame(BatchMelting(bulk_coeffs).concentration_array('LIQ', liq_fracts, initial_c0 * 1.2),
+                        columns=elements)
+    data.insert(0, 'Sample', ['A', 'B', 'C'])
+    inversion = PartitionInversion(BatchMelting, part_coeffs, initial_c0, {'Ol': 60, 'Cpx': 25, 'Grt': 15},
+                                   fit_modes=True, fit_scale=True)
+    fits, predicted = inversion.fit_samples(data, skip_cols=1)
+    assert np.allclose(fits['F'], liq_fracts, atol=1e-4)
+    assert np.allclose(fits['scale'], 1.2, atol=1e-3)
+    assert np.allclose(fits[list(modes)], list(modes.values()), atol=0.05)
+    assert np.allclose(predicted[elements], data[elements], rtol=1e-3)
+
+    sample = pd.Series(RayleighCrystallization(bulk_coeffs).concentration_array('LIQ', 0.6, initial_c0)[0],
+                       index=elements)
+    sample['Rb'] = np.nan
+    fitted = PartitionInversion(RayleighCrystallization, part_coeffs, initial_c0, modes).fit(sample, liq_fract=0.9)
+    assert np.isclose(fitted['F'], 0.6) and fitted['nb_elements'] == len(elements) - 1
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+from georunes.plot.piper.helpers import project_array_piper, project_points_piper, diamond_ox, diamond_oy, \
+    piper_ions, ions_mgl_to_meq, COS60, SIN60
+from georunes.plot.piper.piper_diag import DiagramPiper
+
+
+def test_project_array_piper():
+    delta = 0.1
+    width = (1 - delta) / 2
+    values = np.zeros((3, 8))
+    values[0, [0, 4]] = 100  # Ca, HCO3
+    values[1, [2, 7]] = 100  # Na, Cl
+    values[2] = [40, 20, 30, 5, 150, 10, 60, 35]
+    coords = project_array_piper(values, delta)
+    assert coords.shape == (3, 3, 2)
+    assert np.allclose(coords[0], [[0, 0], [width + delta, 0], [diamond_ox(delta), diamond_oy(delta)]])
+    assert np.allclose(coords[1], [[width, 0], [1, 0], [diamond_ox(delta) + width, diamond_oy(delta)]])
+    # Projection of the point by point formulas
+    ca, mg, nak, hco, so, cl = ions_mgl_to_meq(tuple(values[2]))
+    val_left, val_right = nak / (mg + ca + nak), (so + cl) / (so + hco + cl)
+    expected = [[width * COS60 * (2 * nak + mg) / (mg + ca + nak), width * SIN60 * mg / (mg + ca + nak)],
+                [width + delta + width * COS60 * (2 * cl + so) / (so + hco + cl), width * SIN60 * so / (so + hco + cl)],
+                [diamond_ox(delta) + (val_left + val_right) * width * COS60,
+                 diamond_oy(delta) + (val_right - val_left) * width * SIN60]]
+    assert np.allclose(coords[2], expected)
+    assert np.allclose(project_points_piper(tuple(values[2]), delta), expected)
+    assert np.isnan(project_array_piper(np.zeros((1, 8)), delta)).all()
+
+
+def test_piper(tmp_path):
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame(rng.uniform(1, 200, (30, 8)), columns=piper_ions)
+    data['group'] = rng.choice(['A', 'B'], 30)
+    source = tmp_path / "piper.csv"
+    data.to_csv(source, index=False)
+    piper_diag = DiagramPiper(datasource=str(source))
+    piper_diag.plot()
+    assert sum(len(c.get_offsets()) for c in piper_diag.ax.collections if len(c.get_offsets()) > 1) == 90
@@ -0,0 +1,24 @@
+import numpy as np
+from georunes.plot.ternary.afm import DiagramAFM
+from georunes.tools.plotting import tern_array_to_bin_coords, tern_coords_to_bin_coords
+
+source = 'tests/WAC_granitoids_comp.xls'
+sheet = 'ggtest'
+
+
+def test_tern_projection():
+    coords = tern_array_to_bin_coords([[1, 0, 0], [0, 2, 0], [0, 0, 3], [1, 1, 2], [0, 0, 0]])
+    assert np.allclose(coords[:4], [[100, 0], [50, 100 * np.sqrt(3) / 2], [0, 0], [37.5, 25 * np.sqrt(3) / 2]])
+    assert np.isnan(coords[4]).all()
+    x, y = tern_coords_to_bin_coords(np.array([1, 0]), np.array([1, 1]), np.array([2, 0]))
+    assert np.allclose(x, [37.5, 50]) and np.allclose(y, coords[[3, 1], 1])
+
+
+def test_afm():
+    afm_diag = DiagramAFM(datasource=source,
+                          sheet=sheet,
+                          group_name='Lithology')
+    afm_diag.plot()
+    data = afm_diag.data[afm_diag.data['Lithology'] == 'Granite']
+    offsets = afm_diag.ax.collections[-4].get_offsets()
+    assert len(offsets) == len(data)
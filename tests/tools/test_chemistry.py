@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+from georunes.tools.chemistry import oxides, parse_formula, molar_mass, ratio_el_to_ox, get_cation, \
+    get_nb_cation_oxygen, el_ppm_array, val_ox_to_el_ppm
+
+
+def test_parse_formula():
+    assert parse_formula('Fe2O3') == (('Fe', 2), ('O', 3))
+    assert parse_formula('FeOt') == (('Fe', 1), ('O', 1))
+    assert parse_formula('Mg(OH)2') == (('Mg', 1), ('O', 2), ('H', 2))
+    assert parse_formula('CaSO4·2H2O') == (('Ca', 1), ('S', 1), ('O', 6), ('H', 4))
+    with pytest.raises(ValueError):
+        parse_formula('LOI')
+
+
+def test_oxide_properties():
+    assert get_cation('Al2O3') == 'Al' and get_nb_cation_oxygen('Al2O3') == (2, 3)
+    assert oxides['Mn2O3'].charge == 3
+    assert oxides['F'].charge == -1 and oxides['CaF2'].oxygen_equiv == 1
+    assert np.isclose(oxides['La2O3'].molar_mass, 325.8092, atol=1e-4)
+    assert 'LOI' not in oxides and get_cation('Total') is None
+
+
+def test_views():
+    assert molar_mass['SiO2'] == 60.0843 and molar_mass['H2O+'] == molar_mass['H2O']
+    assert ratio_el_to_ox['FeOt'] == ratio_el_to_ox['FeO']
+    assert 'Mn2O3' in molar_mass and 'LOI' not in molar_mass
+    assert np.allclose(oxides.vector(['SiO2', 'MgO'], 'nb_oxygen'), [2, 1])
+
+
+def test_el_ppm_array():
+    data = pd.DataFrame({'La': [10., np.nan], 'TiO2': [0.5, 1.], 'K': [1000., 2000.], 'K2O': [9., 9.]})
+    values = el_ppm_array(data, ['La', 'Ti', 'K', 'Yb'])
+    assert values.shape == (2, 4) and np.isnan(values[1, 0]) and np.isnan(values[:, 3]).all()
+    assert np.allclose(values[:, 1], [val_ox_to_el_ppm(0.5, 'TiO2'), val_ox_to_el_ppm(1., 'TiO2')])
+    assert np.allclose(values[:, 2], [1000., 2000.])  # The element column first
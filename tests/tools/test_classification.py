@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+from georunes.plot.binary.sialkali import DiagramSiAlkali
+from georunes.plot.ternary.qap import DiagramQAP
+from georunes.tools.classification import FieldClassifier, polygonize, rectangle
+
+
+def test_polygonize():
+    # A line across the frame, a line ending on it and a dangling one
+    lines = [np.array([[0, 5], [10, 5]]), np.array([[5, 5], [5, 10]]), np.array([[2, 1], [3, 2]])]
+    faces = polygonize(lines, rectangle(0, 10, 0, 10))
+    areas = sorted(np.sum(v[:-1, 0] * v[1:, 1] - v[1:, 0] * v[:-1, 1]) / 2 for v in faces)
+    assert np.allclose(areas, [25, 25, 50])
+
+    # Open ends extended to the frame
+    faces = polygonize([np.array([[3, 5], [7, 5]])], rectangle(0, 10, 0, 10), extend=True)
+    assert len(faces) == 2
+
+
+def test_field_classifier():
+    lines = [([1, 100], [100, 1])]
+    seeds = [(2, 2, "low"), (50, 50, "high")]
+    classifier = FieldClassifier(lines, seeds, rectangle(1, 100, 1, 100), log=(True, True))
+    names = classifier.classify([5, 20, 0.5, np.nan], [5, 20, 5, 5])
+    assert names.tolist() == ["low", "high", None, None]
+    column = classifier.classify_series([5, 200], [5, 5], index=[3, 4], name="test")
+    assert column.name == "test" and column[3] == "low" and pd.isna(column[4])
+
+
+def test_classify_diagrams():
+    data = pd.DataFrame({'SiO2': [48, 75, 57, 90], 'Na2O': [2, 5, 7, 2], 'K2O': [1, 5, 7, 2]})
+    assert DiagramSiAlkali.classify(data).tolist()[:3] == ["basalt", "rhyolite", "phonolite"]
+    assert pd.isna(DiagramSiAlkali.classify(data)[3])
+
+    data = pd.DataFrame({'Qnorm': [40, 10, 2], 'Anorm': [35, 45, 3], 'Pnorm': [25, 45, 95]})
+    assert DiagramQAP.classify(data).tolist() == ["granite", "quartz monzonite", "diorite/gabbro"]
+    assert DiagramQAP.classify(data, decor_set="Volc").tolist()[:2] == ["rhyolite", "quartz latite"]
@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+from georunes.tools.reservoirs import NormalizationCache
+
+
+def test_normalization_cache():
+    cache = NormalizationCache.get_instance()
+    cache.invalidate()
+    norm = pd.Series({'alias': 'TEST', 'La': 0.5, 'Ti': 100., 'Yb': 0.25})
+    data = pd.DataFrame({'La': [5., 10.], 'TiO2': [0.5, 1.], 'Yb': [1., np.nan]})
+    values = cache.normalized(data, ['La', 'Ti', 'Yb'], norm)
+    assert np.allclose(values[:, 0], [10, 20]) and np.isnan(values[1, 2])
+    assert np.allclose(values[:, 1], data['TiO2'] * 0.5995 * 100, rtol=1e-3)
+    assert not values.flags.writeable
+
+    # Reused for the same dataset, listing and reservoir, recomputed for another version or reservoir
+    assert cache.normalized(data, ['La', 'Ti', 'Yb'], norm) is values
+    assert cache.normalized(data, ['La', 'Ti', 'Yb'], norm, version=1) is not values
+    other = cache.normalized(data, ['La', 'Ti', 'Yb'], norm * 2)
+    assert np.allclose(other, values / 2, equal_nan=True) and len(cache) == 3
+
+    # Least recently used arrays evicted first
+    cache.max_size = 2
+    cache.normalized(data, ['La', 'Ti', 'Yb'], norm)
+    cache.normalized(data, ['La'], norm)
+    assert len(cache) == 2 and cache.normalized(data, ['La', 'Ti', 'Yb'], norm) is values
+    cache.invalidate(data)
+    assert len(cache) == 0
+    del cache.max_size